@@ -1,12 +1,33 @@
 import argparse
+import contextlib
+import functools
+import os
 import sys
+import threading
+import time
 from pathlib import Path
+from typing import Any, List, Optional, Sequence
 
 from PyQt6 import QtWidgets, QtCore, QtGui
 
-from audio_utils import validate_audio_file
-from config import ensure_output_dir
-from whisper_local import transcribe_audio
+from audio_utils import SUPPORTED_EXTENSIONS, is_supported_audio_file, validate_audio_file
+from config import get_batch_size, get_model_policy, get_profile_mode
+from export import TranscriptWriter
+from search_index import format_ms, refresh_index, search, transcript_segments
+from metrics import ProgressInfo, format_duration
+from model_tiers import discover_models
+from segment_store import SegmentStore
+from whisper_local import (
+    Segment,
+    configure_model,
+    format_segment,
+    preload_model,
+    transcribe_segments,
+)
+
+# Segments are handed to the GUI thread in batches at most this often, so a
+# fast cached or batched run does not flood the event loop with signals
+SEGMENT_BATCH_INTERVAL = 0.1
 
 
 # macOS-style color palette
@@ -97,7 +118,7 @@ QPushButton#secondaryButton:hover {{
     background-color: #E8E8ED;
 }}
 
-QPlainTextEdit {{
+QPlainTextEdit, QListView {{
     background-color: {COLORS['surface']};
     border: 1px solid {COLORS['border']};
     border-radius: 8px;
@@ -122,72 +143,205 @@ QProgressBar::chunk {{
 """
 
 
-def save_transcript(audio_path: Path, transcript: str) -> Path:
+class TranscriptModel(QtCore.QAbstractListModel):
     """
-    Write transcript to a markdown file and return its path.
-    In app mode: saves to ~/Documents/EchoDraft/
-    In dev mode: saves to output/ directory.
-    """
-    output_dir = ensure_output_dir()
-    base_name = audio_path.stem
-
-    out_path = output_dir / f"{base_name}_transcript.md"
-    out_path.write_text(transcript, encoding="utf-8")
-    return out_path
-
+    List model over a SegmentStore, one row per transcript line.
 
-def run_cli(audio_file: str) -> None:
+    Lines are formatted only when the view asks for a visible row, so the
+    GUI holds the compact store rather than one string per segment, and
+    appending a batch costs the same no matter how long the transcript is.
     """
-    CLI entry: transcribe audio and print transcript.
-    """
-    try:
-        audio_path = validate_audio_file(audio_file)
-        print(f"音频文件：{audio_path}")
-        print("开始转写，请稍候...")
 
-        def progress_callback(progress: float, language: str) -> None:
-            print(f"\r进度: {progress:.1f}% (检测到语言: {language})", end="", flush=True)
+    def __init__(self, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self.store = SegmentStore()
 
-        transcript = transcribe_audio(audio_path, progress_callback=progress_callback)
-        print()  # New line after progress
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.store)
 
-        out_path = save_transcript(audio_path, transcript)
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        if role in (QtCore.Qt.ItemDataRole.DisplayRole, QtCore.Qt.ItemDataRole.ToolTipRole):
+            return format_segment(self.store[index.row()])
+        return None
 
-        print("转写完成，结果已保存：")
-        print(f"  transcript: {out_path}")
+    def set_store(self, store: SegmentStore) -> None:
+        self.beginResetModel()
+        self.store = store
+        self.endResetModel()
 
-        print("\n=== 转写全文 ===\n")
-        print(transcript or "(转写结果为空)")
+    def clear(self) -> None:
+        self.set_store(SegmentStore())
 
-    except Exception as exc:
-        print(f"\n发生错误：{exc}", file=sys.stderr)
-        sys.exit(1)
+    def append_segments(self, segments: Sequence[Segment]) -> None:
+        if not segments:
+            return
+        first = len(self.store)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(segments) - 1)
+        for segment in segments:
+            self.store.append(segment)
+        self.endInsertRows()
+
+    def text(self, rows: Optional[Sequence[int]] = None) -> str:
+        """Transcript text of the given rows (all by default), read from the store."""
+        if rows is None:
+            return "\n".join(format_segment(segment) for segment in self.store)
+        return "\n".join(format_segment(self.store[row]) for row in rows)
 
 
 class TranscribeWorker(QtCore.QThread):
     """
     Background worker thread for audio transcription.
+    Streams each transcript line to the GUI and to the output file.
     """
 
-    progress_updated = QtCore.pyqtSignal(float, str)  # progress, language
-    finished = QtCore.pyqtSignal(str)  # transcript
+    # progress, language, speed (x real time), eta seconds (-1 = unknown)
+    progress_updated = QtCore.pyqtSignal(float, str, float, float)
+    segments_ready = QtCore.pyqtSignal(list)  # batch of Segments
+    finished = QtCore.pyqtSignal(str)  # saved transcript path
     error = QtCore.pyqtSignal(str)  # error message
+    cancelled = QtCore.pyqtSignal()
 
-    def __init__(self, audio_path: Path) -> None:
+    def __init__(
+        self, audio_path: Path, batch_size: int = 0, model_name: Optional[str] = None
+    ) -> None:
         super().__init__()
         self.audio_path = audio_path
+        self.batch_size = batch_size
+        self.model_name = model_name
+        self.out_path: Optional[Path] = None
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        """
+        Ask the worker to stop; it closes the segment generator at the next
+        segment (or the next draft segment of an "auto" clip), which ends
+        decoding and leaves the journal for a later resume. Preparation
+        (model load, decoding a whole file, language detection) runs to its
+        end first.
+        """
+        self._cancel.set()
 
     def run(self) -> None:
         try:
-            transcript = transcribe_audio(
-                self.audio_path, progress_callback=self._progress_callback
-            )
-            self.finished.emit(transcript)
+            profiler = None
+            profile_mode = get_profile_mode()
+            if profile_mode:
+                from profiling import JobProfiler
+
+                profiler = JobProfiler(self.audio_path, profile_mode)
+            with profiler or contextlib.nullcontext():
+                stopped = self._transcribe()
+            if stopped:
+                self.cancelled.emit()
+            else:
+                self.finished.emit(str(self.out_path))
+        except Exception as exc:
+            self.error.emit(str(exc))
+
+    def _transcribe(self) -> bool:
+        """Transcribe and stream segments to the view; True if cancelled."""
+        if self._cancel.is_set():
+            return True
+        segments, _ = transcribe_segments(
+            self.audio_path,
+            stats_callback=self._stats_callback,
+            batch_size=self.batch_size,
+            model=self.model_name,
+            cancel=self._cancel,
+        )
+        pending: List[Segment] = []
+        last_emit = time.monotonic()
+        stopped = False
+        with TranscriptWriter(self.audio_path) as writer:
+            for segment in segments:
+                if self._cancel.is_set():
+                    stopped = True
+                    break
+                writer.write_line(format_segment(segment))
+                pending.append(segment)
+                if time.monotonic() - last_emit >= SEGMENT_BATCH_INTERVAL:
+                    self.segments_ready.emit(pending)
+                    pending, last_emit = [], time.monotonic()
+            # The generator also ends early on cancel without yielding
+            stopped = stopped or self._cancel.is_set()
+            if stopped:
+                # A partial transcript must not be indexed or taken for a
+                # finished one; the journal keeps it for a resume
+                writer.abort()
+        if pending:
+            self.segments_ready.emit(pending)
+        if stopped:
+            segments.close()
+        self.out_path = writer.path
+        return stopped
+
+    def _stats_callback(self, info: ProgressInfo) -> None:
+        eta = info.eta if info.eta is not None else -1.0
+        self.progress_updated.emit(info.progress, info.language, info.speed, eta)
+
+
+class ModelPreloadWorker(QtCore.QThread):
+    """
+    Background thread that loads and warms up the model at startup.
+    """
+
+    ready = QtCore.pyqtSignal()
+    error = QtCore.pyqtSignal(str)  # error message
+
+    def run(self) -> None:
+        try:
+            preload_model()
+            self.ready.emit()
         except Exception as exc:
             self.error.emit(str(exc))
 
-    def _progress_callback(self, progress: float, language: str) -> None:
-        self.progress_updated.emit(progress, language)
+
+class FolderScanWorker(QtCore.QThread):
+    """
+    Background thread that lists the supported audio files under dropped
+    folders, which can be large or on a slow network share.
+    """
+
+    found = QtCore.pyqtSignal(list)  # sorted file paths
+
+    def __init__(self, folders: Sequence[Path]) -> None:
+        super().__init__()
+        self.folders = list(folders)
+
+    def run(self) -> None:
+        files: List[Path] = []
+        for folder in self.folders:
+            try:
+                files.extend(sorted(p for p in folder.rglob("*") if is_supported_audio_file(p)))
+            except OSError:
+                continue
+        self.found.emit(files)
+
+
+class QueueJob:
+    """
+    One file in the GUI job queue, its live state and its transcript.
+    """
+
+    def __init__(
+        self, audio_path: Path, batch_size: int = 0, model_name: Optional[str] = None
+    ) -> None:
+        self.audio_path = audio_path
+        self.batch_size = batch_size
+        self.model_name = model_name  # model or routing policy, see transcribe_audio
+        self.state = "queued"  # queued / running / done / failed / cancelled
+        self.progress = 0.0
+        self.error: Optional[str] = None
+        self.out_path: Optional[str] = None
+        self.model = TranscriptModel()
+        self.worker: Optional[TranscribeWorker] = None
+        self.progress_bar: Optional[QtWidgets.QProgressBar] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "failed", "cancelled")
 
 
 class MainWindow(QtWidgets.QMainWindow):
@@ -195,10 +349,20 @@ class MainWindow(QtWidgets.QMainWindow):
     PyQt6-based main window for the transcriber with macOS styling.
     """
 
+    QUEUE_COLUMNS = ("文件", "状态", "进度")
+    STATE_NAMES = {
+        "queued": "等待中",
+        "running": "转写中",
+        "done": "✓ 完成",
+        "failed": "失败",
+        "cancelled": "已取消",
+    }
+
     def __init__(self) -> None:
         super().__init__()
         self.setWindowTitle("EchoDraft")
-        self.resize(900, 700)
+        self.resize(900, 800)
+        self.setAcceptDrops(True)
 
         # Apply macOS style
         self.setStyleSheet(MACOS_STYLE)
@@ -221,7 +385,7 @@ class MainWindow(QtWidgets.QMainWindow):
         file_layout.setContentsMargins(0, 0, 0, 0)
         file_layout.setSpacing(8)
 
-        file_label = QtWidgets.QLabel("音频文件", self)
+        file_label = QtWidgets.QLabel("音频文件（可多选，或直接拖入窗口）", self)
         file_layout.addWidget(file_label)
 
         file_row = QtWidgets.QHBoxLayout()
@@ -229,6 +393,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.path_edit = QtWidgets.QLineEdit(self)
         self.path_edit.setPlaceholderText("选择 .m4a / .mp3 / .wav 文件")
+        self.path_edit.returnPressed.connect(self.start_transcribe)
         file_row.addWidget(self.path_edit, stretch=1)
 
         self.browse_btn = QtWidgets.QPushButton("浏览", self)
@@ -237,6 +402,34 @@ class MainWindow(QtWidgets.QMainWindow):
         file_row.addWidget(self.browse_btn)
 
         file_layout.addLayout(file_row)
+
+        options_row = QtWidgets.QHBoxLayout()
+        self.fast_checkbox = QtWidgets.QCheckBox("快速模式（批量推理，适合长录音，精度略低）", self)
+        options_row.addWidget(self.fast_checkbox)
+        options_row.addStretch()
+        options_row.addWidget(QtWidgets.QLabel("模型", self))
+        self.model_combo = QtWidgets.QComboBox(self)
+        self.model_combo.addItem("默认", "default")
+        self.model_combo.addItem("自动（短录音用小模型）", "auto")
+        for model in discover_models():
+            self.model_combo.addItem(model.name, model.name)
+        index = self.model_combo.findData(get_model_policy())
+        self.model_combo.setCurrentIndex(max(0, index))
+        self.model_combo.setToolTip("新加入队列的文件使用的模型；可为每批文件分别选择")
+        options_row.addWidget(self.model_combo)
+        options_row.addWidget(QtWidgets.QLabel("同时转写", self))
+        self.concurrency_spin = QtWidgets.QSpinBox(self)
+        self.concurrency_spin.setRange(1, max(1, (os.cpu_count() or 2) // 2))
+        self.concurrency_spin.setValue(1)
+        self.concurrency_spin.setToolTip("同时运行的转写任务数，共享同一个已加载的模型")
+        self.concurrency_spin.valueChanged.connect(self._schedule)
+        # One model instance serves every concurrent job, so it gets a worker
+        # per job up front: the preloaded model keeps its key whatever the
+        # spin box is set to later
+        configure_model(num_workers=self.concurrency_spin.maximum())
+        options_row.addWidget(self.concurrency_spin)
+        file_layout.addLayout(options_row)
+
         layout.addWidget(file_group)
 
         # Progress bar
@@ -266,6 +459,53 @@ class MainWindow(QtWidgets.QMainWindow):
         self.start_btn.setMinimumHeight(40)
         layout.addWidget(self.start_btn)
 
+        # Job queue
+        self.queue_table = QtWidgets.QTableWidget(0, len(self.QUEUE_COLUMNS), self)
+        self.queue_table.setHorizontalHeaderLabels(self.QUEUE_COLUMNS)
+        self.queue_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.queue_table.setSelectionMode(
+            QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection
+        )
+        self.queue_table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.queue_table.verticalHeader().setVisible(False)
+        header = self.queue_table.horizontalHeader()
+        header.setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeMode.ResizeToContents)
+        self.queue_table.setColumnWidth(2, 160)
+        self.queue_table.setMaximumHeight(180)
+        self.queue_table.setVisible(False)
+        self.queue_table.itemSelectionChanged.connect(self.on_queue_selection_changed)
+        layout.addWidget(self.queue_table)
+
+        queue_buttons = QtWidgets.QHBoxLayout()
+        queue_buttons.addStretch()
+        self.cancel_btn = QtWidgets.QPushButton("取消所选", self)
+        self.cancel_btn.setObjectName("secondaryButton")
+        self.cancel_btn.clicked.connect(self.cancel_selected)
+        queue_buttons.addWidget(self.cancel_btn)
+        self.clear_btn = QtWidgets.QPushButton("清除已结束", self)
+        self.clear_btn.setObjectName("secondaryButton")
+        self.clear_btn.clicked.connect(self.clear_finished)
+        queue_buttons.addWidget(self.clear_btn)
+        self.queue_buttons = QtWidgets.QWidget(self)
+        self.queue_buttons.setLayout(queue_buttons)
+        self.queue_buttons.setVisible(False)
+        layout.addWidget(self.queue_buttons)
+
+        # Full-text search over saved transcripts
+        self.search_edit = QtWidgets.QLineEdit(self)
+        self.search_edit.setPlaceholderText("搜索历史转写（回车搜索）")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.returnPressed.connect(self.run_search)
+        layout.addWidget(self.search_edit)
+
+        self.search_results = QtWidgets.QListWidget(self)
+        self.search_results.setVisible(False)
+        self.search_results.setMaximumHeight(160)
+        self.search_results.itemActivated.connect(self.open_search_result)
+        layout.addWidget(self.search_results)
+        self._index_refreshed = False
+
         # Transcript area with copy button
         transcript_header = QtWidgets.QHBoxLayout()
         transcript_label = QtWidgets.QLabel("转写结果", self)
@@ -281,16 +521,74 @@ class MainWindow(QtWidgets.QMainWindow):
 
         layout.addLayout(transcript_header)
 
-        self.text_edit = QtWidgets.QPlainTextEdit(self)
-        self.text_edit.setReadOnly(True)
-        self.text_edit.setPlaceholderText("转写结果将在此处显示...")
-        layout.addWidget(self.text_edit, stretch=1)
-
-        self.worker = None
+        # Only visible rows are laid out and formatted: uniform row heights
+        # let the view skip measuring the other (possibly 50k+) lines
+        self.transcript_model = TranscriptModel(self)
+        self.transcript_view = QtWidgets.QListView(self)
+        self.transcript_view.setModel(self.transcript_model)
+        self.transcript_view.setUniformItemSizes(True)
+        self.transcript_view.setSelectionMode(
+            QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection
+        )
+        self.transcript_view.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        copy_action = QtGui.QAction(self.transcript_view)
+        copy_action.setShortcut(QtGui.QKeySequence.StandardKey.Copy)
+        copy_action.setShortcutContext(QtCore.Qt.ShortcutContext.WidgetShortcut)
+        copy_action.triggered.connect(self.copy_selection)
+        self.transcript_view.addAction(copy_action)
+        layout.addWidget(self.transcript_view, stretch=1)
+
+        self.jobs: List[QueueJob] = []
+        self.preload_worker = None
+        self.scan_workers: List[FolderScanWorker] = []
+
+    def preload_model(self) -> None:
+        """Load and warm up the model in the background so the first job starts fast."""
+        self.status_label.setText("正在预加载模型...")
+        self.preload_worker = ModelPreloadWorker()
+        self.preload_worker.ready.connect(self.on_model_ready)
+        self.preload_worker.error.connect(self.on_model_preload_error)
+        self.preload_worker.start()
+
+    def _is_transcribing(self) -> bool:
+        return any(not job.finished for job in self.jobs)
+
+    def on_model_ready(self) -> None:
+        if not self._is_transcribing():
+            self.status_label.setText("就绪（模型已加载）")
+
+    def on_model_preload_error(self, error_msg: str) -> None:
+        # The transcription itself will retry the load and report the error
+        if not self._is_transcribing():
+            self.status_label.setText(f"模型预加载失败: {error_msg}")
+
+    def show_model(self, model: TranscriptModel) -> None:
+        """Display a transcript (a job's or a loaded one) in the transcript view."""
+        self.transcript_model = model
+        self.transcript_view.setModel(model)
+        self.copy_btn.setEnabled(model.rowCount() > 0)
+
+    def show_segments(self, job: QueueJob, segments: List[Segment]) -> None:
+        """Append a batch of a job's segments, following the end if it was in view."""
+        if job.model is not self.transcript_model:
+            job.model.append_segments(segments)
+            return
+        scrollbar = self.transcript_view.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+        job.model.append_segments(segments)
+        self.copy_btn.setEnabled(True)
+        if at_bottom:
+            self.transcript_view.scrollToBottom()
+
+    def copy_selection(self) -> None:
+        """Copy the selected transcript lines (Ctrl+C in the transcript view)."""
+        rows = sorted(index.row() for index in self.transcript_view.selectionModel().selectedRows())
+        if rows:
+            QtWidgets.QApplication.clipboard().setText(self.transcript_model.text(rows))
 
     def copy_transcript(self) -> None:
         """Copy transcript text to clipboard."""
-        text = self.text_edit.toPlainText()
+        text = self.transcript_model.text()
         if text:
             clipboard = QtWidgets.QApplication.clipboard()
             clipboard.setText(text)
@@ -299,14 +597,94 @@ class MainWindow(QtWidgets.QMainWindow):
             self.copy_btn.setText("✓ 已复制!")
             QtCore.QTimer.singleShot(2000, lambda: self.copy_btn.setText(original_text))
 
+    def run_search(self) -> None:
+        query = self.search_edit.text().strip()
+        self.search_results.clear()
+        if not query:
+            self.search_results.setVisible(False)
+            return
+        try:
+            if not self._index_refreshed:
+                # Pick up transcripts saved before the index existed
+                refresh_index()
+                self._index_refreshed = True
+            hits = search(query)
+        except Exception as exc:
+            self.status_label.setText(f"搜索失败: {exc}")
+            return
+
+        for hit in hits:
+            name = Path(hit.audio_path or hit.transcript).name
+            item = QtWidgets.QListWidgetItem(
+                f"{name}  [{format_ms(hit.start_ms)} - {format_ms(hit.end_ms)}]  {hit.text}"
+            )
+            item.setData(QtCore.Qt.ItemDataRole.UserRole, hit)
+            self.search_results.addItem(item)
+        if not hits:
+            self.search_results.addItem("没有找到匹配的片段")
+        self.search_results.setVisible(True)
+
+    def open_search_result(self, item: QtWidgets.QListWidgetItem) -> None:
+        """Show the transcript containing a search hit, with the hit selected."""
+        hit = item.data(QtCore.Qt.ItemDataRole.UserRole)
+        if hit is None:
+            return
+        try:
+            rows = transcript_segments(Path(hit.transcript))
+        except OSError as exc:
+            self.status_label.setText(f"无法打开转写结果: {exc}")
+            return
+        store = SegmentStore()
+        found = None
+        for row, (start_ms, end_ms, text) in enumerate(rows):
+            store.append(Segment(start_ms / 1000, end_ms / 1000, text))
+            if found is None and start_ms == hit.start_ms and text == hit.text:
+                found = row
+        model = TranscriptModel(self)
+        model.set_store(store)
+        self.queue_table.clearSelection()
+        self.show_model(model)
+        if found is not None:
+            index = model.index(found)
+            self.transcript_view.setCurrentIndex(index)
+            self.transcript_view.scrollTo(index, QtWidgets.QAbstractItemView.ScrollHint.PositionAtCenter)
+        self.status_label.setText(f"转写结果：{hit.transcript}")
+
     def browse_file(self) -> None:
         dlg = QtWidgets.QFileDialog(self, "选择音频文件")
-        dlg.setFileMode(QtWidgets.QFileDialog.FileMode.ExistingFile)
+        dlg.setFileMode(QtWidgets.QFileDialog.FileMode.ExistingFiles)
         dlg.setNameFilter("Audio Files (*.m4a *.mp3 *.wav);;All Files (*)")
         if dlg.exec():
             files = dlg.selectedFiles()
-            if files:
+            if len(files) == 1:
                 self.path_edit.setText(files[0])
+            elif files:
+                self.enqueue_files([Path(f) for f in files])
+
+    def dragEnterEvent(self, event: QtGui.QDragEnterEvent) -> None:
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+
+    def dropEvent(self, event: QtGui.QDropEvent) -> None:
+        paths = [Path(url.toLocalFile()) for url in event.mimeData().urls() if url.isLocalFile()]
+        folders = [path for path in paths if path.is_dir()]
+        files = [path for path in paths if path not in folders]
+        if not paths:
+            return
+        event.acceptProposedAction()
+        if files:
+            self.enqueue_files(files)
+        if folders:
+            # Keep a reference while the thread runs; finished ones are dropped
+            self.scan_workers = [w for w in self.scan_workers if w.isRunning()]
+            worker = FolderScanWorker(folders)
+            worker.found.connect(self._on_folder_scanned)
+            self.scan_workers.append(worker)
+            worker.start()
+
+    def _on_folder_scanned(self, files: List[Path]) -> None:
+        if files:
+            self.enqueue_files(files)
 
     def start_transcribe(self) -> None:
         audio_path_str = self.path_edit.text().strip()
@@ -315,57 +693,187 @@ class MainWindow(QtWidgets.QMainWindow):
         except Exception as exc:
             QtWidgets.QMessageBox.critical(self, "错误", str(exc))
             return
-
-        # Disable UI during transcription
-        self.start_btn.setEnabled(False)
-        self.browse_btn.setEnabled(False)
-        self.path_edit.setEnabled(False)
-        self.copy_btn.setEnabled(False)
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setValue(0)
-        self.status_label.setText("正在加载模型...")
-        self.text_edit.clear()
-
-        # Start background worker
-        self.worker = TranscribeWorker(audio_path)
-        self.worker.progress_updated.connect(self.on_progress_updated)
-        self.worker.finished.connect(self.on_transcribe_finished)
-        self.worker.error.connect(self.on_transcribe_error)
-        self.worker.start()
-
-    def on_progress_updated(self, progress: float, language: str) -> None:
-        self.progress_bar.setValue(int(progress))
+        self.path_edit.clear()
+        self.enqueue_files([audio_path])
+
+    def enqueue_files(self, files: Sequence[Path]) -> None:
+        """
+        Add files to the job queue. Only the extension is checked here, so a
+        large drop never blocks the window: unsupported files are listed as
+        failed right away, and missing, empty or corrupt ones fail when
+        their job starts (its header probe runs in the worker thread).
+        """
+        batch_size = get_batch_size() if self.fast_checkbox.isChecked() else 0
+        model_name = self.model_combo.currentData()
+        first_row = len(self.jobs)
+        for path in files:
+            job = QueueJob(Path(path).expanduser(), batch_size=batch_size, model_name=model_name)
+            suffix = job.audio_path.suffix.lower()
+            if suffix not in SUPPORTED_EXTENSIONS:
+                exts = ", ".join(sorted(SUPPORTED_EXTENSIONS))
+                job.state = "failed"
+                job.error = f"不支持的音频格式：{job.audio_path.suffix}，目前支持：{exts}"
+            self._add_job_row(job)
+
+        self.queue_table.setVisible(True)
+        self.queue_buttons.setVisible(True)
+        if not self.queue_table.selectedItems():
+            self.queue_table.selectRow(first_row)
+        self._schedule()
+
+    def _add_job_row(self, job: QueueJob) -> None:
+        row = len(self.jobs)
+        self.jobs.append(job)
+        self.queue_table.insertRow(row)
+        name = QtWidgets.QTableWidgetItem(job.audio_path.name)
+        name.setToolTip(str(job.audio_path))
+        self.queue_table.setItem(row, 0, name)
+        self.queue_table.setItem(row, 1, QtWidgets.QTableWidgetItem())
+        job.progress_bar = QtWidgets.QProgressBar(self)
+        job.progress_bar.setRange(0, 100)
+        job.progress_bar.setTextVisible(False)
+        self.queue_table.setCellWidget(row, 2, job.progress_bar)
+        self._update_job_row(job)
+
+    def _update_job_row(self, job: QueueJob, detail: str = "") -> None:
+        row = self.jobs.index(job)
+        status = self.queue_table.item(row, 1)
+        status.setText(self.STATE_NAMES[job.state] + (f" {detail}" if detail else ""))
+        status.setToolTip(job.error or job.out_path or "")
+        job.progress_bar.setValue(100 if job.state == "done" else int(job.progress))
+
+    def _schedule(self) -> None:
+        """Start queued jobs while fewer than the chosen number are running."""
+        limit = self.concurrency_spin.value()
+        running = sum(job.state == "running" for job in self.jobs)
+        for job in self.jobs:
+            if running >= limit:
+                break
+            if job.state == "queued":
+                self._start_job(job)
+                running += 1
+        self._update_summary()
+
+    def _start_job(self, job: QueueJob) -> None:
+        job.state = "running"
+        job.model.clear()
+        worker = TranscribeWorker(
+            job.audio_path, batch_size=job.batch_size, model_name=job.model_name
+        )
+        worker.progress_updated.connect(functools.partial(self.on_progress_updated, job))
+        worker.segments_ready.connect(functools.partial(self.show_segments, job))
+        worker.finished.connect(functools.partial(self.on_transcribe_finished, job))
+        worker.error.connect(functools.partial(self.on_transcribe_error, job))
+        worker.cancelled.connect(functools.partial(self.on_transcribe_cancelled, job))
+        job.worker = worker
+        self._update_job_row(job, "(加载模型)")
+        worker.start()
+
+    def on_queue_selection_changed(self) -> None:
+        rows = sorted({index.row() for index in self.queue_table.selectedIndexes()})
+        if rows:
+            self.show_model(self.jobs[rows[0]].model)
+
+    def cancel_selected(self) -> None:
+        rows = sorted({index.row() for index in self.queue_table.selectedIndexes()})
+        for job in [self.jobs[row] for row in rows]:
+            self.cancel_job(job)
+        self._schedule()
+
+    def cancel_job(self, job: QueueJob) -> None:
+        if job.state == "queued":
+            job.state = "cancelled"
+            self._update_job_row(job)
+        elif job.state == "running" and job.worker is not None:
+            job.worker.cancel()
+            self._update_job_row(job, "(正在停止)")
+
+    def clear_finished(self) -> None:
+        for row in reversed(range(len(self.jobs))):
+            job = self.jobs[row]
+            if job.finished and (job.worker is None or not job.worker.isRunning()):
+                self.queue_table.removeRow(row)
+                del self.jobs[row]
+        if not self.jobs:
+            self.queue_table.setVisible(False)
+            self.queue_buttons.setVisible(False)
+        self._update_summary()
+
+    def _update_summary(self) -> None:
+        """Overall progress of the queue in the main progress bar and status line."""
+        counts = {state: 0 for state in self.STATE_NAMES}
+        for job in self.jobs:
+            counts[job.state] += 1
+        active = counts["queued"] + counts["running"]
+        self.progress_bar.setVisible(active > 0)
+        if not active:
+            if self.jobs:
+                self.status_label.setText(
+                    f"队列已完成：完成 {counts['done']} · 失败 {counts['failed']} · 取消 {counts['cancelled']}"
+                )
+            return
+        total = sum(100.0 if job.finished else job.progress for job in self.jobs)
+        self.progress_bar.setValue(int(total / len(self.jobs)))
+        self.status_label.setText(
+            f"转写中 {counts['running']} · 等待 {counts['queued']} · "
+            f"完成 {counts['done']} · 失败 {counts['failed']} · 取消 {counts['cancelled']}"
+        )
+
+    def on_progress_updated(
+        self, job: QueueJob, progress: float, language: str, speed: float, eta: float
+    ) -> None:
+        if job.state != "running":
+            return
+        job.progress = progress
         lang_name = self.get_language_name(language)
-        self.status_label.setText(f"转写中... {progress:.0f}% (检测到语言: {lang_name})")
-
-    def on_transcribe_finished(self, transcript: str) -> None:
-        try:
-            audio_path = Path(self.path_edit.text())
-            out_path = save_transcript(audio_path, transcript)
-
-            self.text_edit.setPlainText(transcript or "")
-            self.status_label.setText(f"✓ 转写完成！已保存至: {out_path.name}")
-
-            # Enable copy button if there's content
-            self.copy_btn.setEnabled(bool(transcript))
-        except Exception as exc:
-            self.status_label.setText(f"保存失败: {exc}")
-
-        # Re-enable UI
-        self.start_btn.setEnabled(True)
-        self.browse_btn.setEnabled(True)
-        self.path_edit.setEnabled(True)
-        self.progress_bar.setVisible(False)
-
-    def on_transcribe_error(self, error_msg: str) -> None:
-        QtWidgets.QMessageBox.critical(self, "转写失败", error_msg)
-        self.status_label.setText("转写失败")
-
-        # Re-enable UI
-        self.start_btn.setEnabled(True)
-        self.browse_btn.setEnabled(True)
-        self.path_edit.setEnabled(True)
-        self.progress_bar.setVisible(False)
+        eta_text = format_duration(eta if eta >= 0 else None)
+        self._update_job_row(job, f"{progress:.0f}% · {speed:.1f}x · 剩余 {eta_text} · {lang_name}")
+        self._update_summary()
+
+    def on_transcribe_finished(self, job: QueueJob, out_path: str) -> None:
+        job.state, job.out_path = "done", out_path
+        self._finish_job(job)
+        if not self._is_transcribing():
+            self.status_label.setText(f"✓ 转写完成！已保存至: {Path(out_path).name}")
+
+    def on_transcribe_error(self, job: QueueJob, error_msg: str) -> None:
+        job.state, job.error = "failed", error_msg
+        self._finish_job(job)
+        if not self._is_transcribing():
+            self.status_label.setText(f"转写失败: {job.audio_path.name}: {error_msg}")
+
+    def on_transcribe_cancelled(self, job: QueueJob) -> None:
+        job.state = "cancelled"
+        self._finish_job(job)
+
+    def _finish_job(self, job: QueueJob) -> None:
+        if job in self.jobs:
+            self._update_job_row(job)
+        if job.model is self.transcript_model:
+            self.copy_btn.setEnabled(job.model.rowCount() > 0)
+        self._schedule()
+
+    def closeEvent(self, event: QtGui.QCloseEvent) -> None:
+        """
+        Cancel queued and running jobs and wait for their threads, so no
+        decoding keeps using the CPU after the window is gone.
+        """
+        running = [job for job in self.jobs if job.state == "running"]
+        for job in self.jobs:
+            self.cancel_job(job)
+        if running or (self.preload_worker is not None and self.preload_worker.isRunning()):
+            self.status_label.setText("正在停止转写任务...")
+            QtWidgets.QApplication.processEvents()
+        # A worker stops at its next segment; a model load or warm-up in
+        # progress cannot be interrupted and is waited for
+        for job in running:
+            job.worker.wait()
+        if self.preload_worker is not None:
+            self.preload_worker.wait()
+        for worker in self.scan_workers:
+            worker.found.disconnect()
+            worker.wait()
+        super().closeEvent(event)
 
     @staticmethod
     def get_language_name(code: str) -> str:
@@ -397,9 +905,20 @@ def launch_gui() -> None:
 
     window = MainWindow()
     window.show()
+    if os.environ.get("ECHODRAFT_STARTUP_PROBE"):
+        # startup_benchmark: report once the event loop has run with the
+        # window shown, and whether the inference stack was imported by then
+        QtCore.QTimer.singleShot(0, _report_window_shown)
+    else:
+        window.preload_model()
     app.exec()
 
 
+def _report_window_shown() -> None:
+    print(f"window_shown {time.time():.6f} {int('faster_whisper' in sys.modules)}", flush=True)
+    os._exit(0)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="本地 Whisper 语音转写工具（支持 GUI 与 CLI）"
@@ -420,6 +939,8 @@ def main() -> None:
         return
 
     if args.cli:
+        from cli import run_cli
+
         run_cli(args.cli)
     else:
         launch_gui()
@@ -1,7 +1,31 @@
+import atexit
+import itertools
+import json
+import os
+import threading
 from pathlib import Path
-from typing import Set
+from typing import TYPE_CHECKING, Dict, Iterator, NamedTuple, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    import numpy
 
 SUPPORTED_EXTENSIONS: Set[str] = {".m4a", ".mp3", ".wav"}
+_PROBE_INDEX_NAME = "probe.json"
+
+
+class AudioInfo(NamedTuple):
+    duration: float  # seconds, 0.0 if the container does not say
+    sample_rate: int
+    channels: int
+    codec: str
+
+
+_probe_memo: Dict[str, Tuple[int, int, AudioInfo]] = {}
+# The on-disk index is read once per process; new entries are collected in
+# _probe_dirty and written together by save_probe_index()
+_probe_index: Optional[Dict[str, list]] = None
+_probe_dirty: Dict[str, list] = {}
+_probe_lock = threading.Lock()
 
 
 def is_supported_audio_file(path: Path) -> bool:
@@ -30,3 +54,151 @@ def validate_audio_file(path_str: str) -> Path:
 
     return path
 
+
+def _probe_index_path() -> Path:
+    from config import get_cache_dir
+
+    return get_cache_dir() / _PROBE_INDEX_NAME
+
+
+def _load_probe_index() -> Dict[str, list]:
+    try:
+        return json.loads(_probe_index_path().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_probe_index() -> None:
+    """
+    Merge the entries probed since the last call into the on-disk index.
+    Called once a batch is planned and at exit, so probing n files costs
+    one index write instead of n. Entries written meanwhile by other
+    processes are kept (re-read just before the write).
+    """
+    with _probe_lock:
+        if not _probe_dirty:
+            return
+        dirty = dict(_probe_dirty)
+        _probe_dirty.clear()
+    try:
+        index = _load_probe_index()
+        index.update(dirty)
+        path = _probe_index_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass  # The index is only a memo
+
+
+atexit.register(save_probe_index)
+
+
+def _read_header(path: Path) -> AudioInfo:
+    """
+    Read stream metadata from the container header with PyAV; no audio
+    frames are decoded.
+    """
+    import av
+
+    try:
+        with av.open(str(path), metadata_errors="ignore") as container:
+            if not container.streams.audio:
+                raise ValueError(f"文件中没有音频流：{path}")
+            stream = container.streams.audio[0]
+            if stream.duration is not None and stream.time_base is not None:
+                duration = float(stream.duration * stream.time_base)
+            elif container.duration is not None:
+                duration = container.duration / av.time_base
+            else:
+                # No duration in the header: make sure at least one packet
+                # of audio follows (demuxing reads it without decoding)
+                duration = None
+                if not any(packet.size for packet in itertools.islice(container.demux(stream), 4)):
+                    raise ValueError(f"音频文件没有音频数据：{path}")
+            if duration is not None and duration <= 0:
+                raise ValueError(f"音频时长为 0：{path}")
+            ctx = stream.codec_context
+            return AudioInfo(
+                duration=duration or 0.0,
+                sample_rate=int(ctx.sample_rate or 0),
+                channels=int(ctx.channels or 0),
+                codec=ctx.name or "unknown",
+            )
+    except av.error.FFmpegError as exc:
+        raise ValueError(f"无法读取音频文件（文件可能已损坏）：{path}（{exc}）") from exc
+    except ValueError:
+        raise
+    except Exception as exc:
+        raise ValueError(f"无法读取音频文件（文件可能已损坏）：{path}（{exc}）") from exc
+
+
+def probe_audio(path: Path) -> AudioInfo:
+    """
+    Return duration, sample rate, channel count and codec of an audio file
+    from its header, without decoding it. Results are memoized by (path,
+    size, mtime) in memory and in the cache dir (see save_probe_index).
+    Raises ValueError for empty, corrupt or zero-length files.
+    """
+    global _probe_index
+    resolved = str(Path(path).resolve())
+    st = os.stat(resolved)
+    stamp = (st.st_size, st.st_mtime_ns)
+    if st.st_size == 0:
+        raise ValueError(f"音频文件为空：{path}")
+
+    with _probe_lock:
+        memo = _probe_memo.get(resolved)
+    if memo and memo[:2] == stamp:
+        return memo[2]
+
+    with _probe_lock:
+        if _probe_index is None:
+            _probe_index = _load_probe_index()
+        cached = _probe_index.get(resolved)
+    if cached and tuple(cached[:2]) == stamp:
+        info = AudioInfo(*cached[2])
+    else:
+        info = _read_header(Path(resolved))
+        with _probe_lock:
+            _probe_dirty[resolved] = [stamp[0], stamp[1], list(info)]
+
+    with _probe_lock:
+        _probe_memo[resolved] = (stamp[0], stamp[1], info)
+    return info
+
+
+def iter_audio_blocks(
+    path: Path, sampling_rate: int = 16000, skip: float = 0.0
+) -> Iterator["numpy.ndarray"]:
+    """
+    Decode an audio file incrementally into mono float32 blocks at
+    sampling_rate, the same samples faster_whisper.audio.decode_audio returns
+    for the whole file, but holding only one decoded frame at a time. The
+    first skip seconds are dropped. Frames the demuxer cannot decode are
+    skipped, as decode_audio does.
+    """
+    import av
+    import numpy as np
+
+    to_skip = int(skip * sampling_rate)
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=sampling_rate)
+    with av.open(str(path), mode="r", metadata_errors="ignore") as container:
+        frames = container.decode(audio=0)
+        while True:
+            try:
+                frame = next(frames)
+            except StopIteration:
+                frame = None  # Flush the resampler
+            except av.error.InvalidDataError:
+                continue
+            for out in resampler.resample(frame):
+                block = out.to_ndarray().reshape(-1).astype(np.float32) / 32768.0
+                if to_skip:
+                    dropped = min(to_skip, len(block))
+                    block, to_skip = block[dropped:], to_skip - dropped
+                if len(block):
+                    yield block
+            if frame is None:
+                break
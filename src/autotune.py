@@ -0,0 +1,316 @@
+import argparse
+import difflib
+import json
+import multiprocessing as mp
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_COMPUTE_TYPE,
+    TUNING_PROFILE_VERSION,
+    get_tuning_profile_path,
+    get_whisper_model_dir,
+    machine_signature,
+    total_memory_bytes,
+)
+
+CALIBRATION_SECONDS = 30.0
+# A candidate counts as accurate enough when its transcript is at least this
+# close (1 - character similarity) to the reference transcript
+DEFAULT_TOLERANCE = 0.02
+# Most precise first: the first one the CPU supports is the reference
+COMPUTE_TYPES = ("float32", "int8_float32", "int8")
+BATCH_SIZES = (4, 8, 16)
+MAX_NUM_WORKERS = 4
+# Rough resident memory per concurrent transcription with the small model
+MEMORY_PER_WORKER_GB = 1.0
+
+
+def detect_hardware() -> Dict[str, Any]:
+    memory = total_memory_bytes()
+    return dict(
+        machine_signature(),
+        memory_gb=round(memory / 1024**3, 1) if memory else None,
+        platform=platform.platform(),
+    )
+
+
+def supported_compute_types() -> List[str]:
+    import ctranslate2
+
+    supported = ctranslate2.get_supported_compute_types("cpu")
+    return [c for c in COMPUTE_TYPES if c in supported] or [DEFAULT_COMPUTE_TYPE]
+
+
+def thread_candidates(cores: int) -> List[int]:
+    return sorted({max(1, cores // 4), max(1, cores // 2), cores})
+
+
+def worker_candidates(cores: int, memory_gb: Optional[float]) -> List[int]:
+    limit = min(MAX_NUM_WORKERS, cores)
+    if memory_gb:
+        limit = min(limit, max(1, int(memory_gb // MEMORY_PER_WORKER_GB) - 1))
+    return [w for w in (1, 2, 4) if w <= limit]
+
+
+def similarity(reference: str, text: str) -> float:
+    """Character-level similarity of two transcripts (1.0 = identical)."""
+    if not reference and not text:
+        return 1.0
+    return difflib.SequenceMatcher(None, reference, text, autojunk=False).ratio()
+
+
+def _calibrate(
+    model_dir: str, settings: Dict[str, Any], audio_path: str, duration: float, repeat: int
+) -> Dict[str, Any]:
+    """
+    Child process: load the model with settings and transcribe the clip
+    repeat times, num_workers copies at once. A fresh process per candidate
+    keeps one model in memory and load effects out of later measurements.
+    """
+    from whisper_local import configure_model, decode_audio_file, get_model, transcribe_rows, warm_up
+
+    configure_model(
+        model_dir=Path(model_dir),
+        compute_type=settings["compute_type"],
+        cpu_threads=settings["cpu_threads"],
+        num_workers=settings["num_workers"],
+    )
+    start = time.perf_counter()
+    warm_up(get_model())
+    load_time = time.perf_counter() - start
+    audio = decode_audio_file(Path(audio_path))
+    workers = settings["num_workers"]
+
+    def transcribe(_: int) -> str:
+        _, rows = transcribe_rows(audio, batch_size=settings["batch_size"])
+        return " ".join(row[2] for row in rows)
+
+    times, text = [], ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            texts = list(pool.map(transcribe, range(workers)))
+        times.append(time.perf_counter() - start)
+        text = texts[0]
+    elapsed = statistics.median(times)
+    return {
+        "load_time": round(load_time, 3),
+        "elapsed": round(elapsed, 3),
+        # Wall seconds per second of audio across all concurrent copies
+        "rtf": round(elapsed / (duration * workers), 4),
+        "text": text,
+    }
+
+
+class Calibrator:
+    """
+    Runs candidate settings on the calibration clip, one child process each,
+    and keeps every measurement for the saved profile.
+    """
+
+    def __init__(self, model_dir: Path, audio_path: Path, duration: float, repeat: int) -> None:
+        self.model_dir = model_dir
+        self.audio_path = audio_path
+        self.duration = duration
+        self.repeat = repeat
+        self.measurements: List[Dict[str, Any]] = []
+        self._ctx = mp.get_context("spawn")
+
+    def measure(self, stage: str, settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        label = ", ".join(f"{k}={v}" for k, v in settings.items())
+        print(f"[{stage}] {label} ...", end="", flush=True)
+        with ProcessPoolExecutor(max_workers=1, mp_context=self._ctx) as pool:
+            try:
+                result = pool.submit(
+                    _calibrate,
+                    str(self.model_dir),
+                    settings,
+                    str(self.audio_path),
+                    self.duration,
+                    self.repeat,
+                ).result()
+            except Exception as exc:
+                print(f" 失败：{exc}")
+                return None
+        print(f" RTF {result['rtf']}")
+        record = dict(stage=stage, settings=settings, **result)
+        self.measurements.append(record)
+        return record
+
+
+def _pick(
+    candidates: List[Dict[str, Any]], reference_text: Optional[str], tolerance: float
+) -> Dict[str, Any]:
+    """Fastest candidate whose transcript is within tolerance of the reference."""
+    accepted = []
+    for record in candidates:
+        if reference_text is not None:
+            record["similarity"] = round(similarity(reference_text, record["text"]), 4)
+            if record["similarity"] < 1.0 - tolerance:
+                continue
+        accepted.append(record)
+    return min(accepted or candidates, key=lambda r: r["rtf"])
+
+
+def autotune(
+    model_dir: Path,
+    audio_path: Path,
+    duration: float,
+    tolerance: float = DEFAULT_TOLERANCE,
+    repeat: int = 2,
+) -> Dict[str, Any]:
+    """
+    Choose compute_type, cpu_threads, num_workers and batch_size for this
+    machine, one dimension at a time:
+
+    1. compute_type x cpu_threads for a single job. The most precise
+       compute type at full threads is the accuracy reference; the fastest
+       candidate within tolerance of its transcript wins.
+    2. num_workers (concurrent jobs on one model) by total throughput, with
+       the chosen threads; transcripts must stay within tolerance too.
+    3. batch_size of the batched "fast" mode by speed alone: batching does
+       not change what each speech window decodes to.
+
+    Returns the profile to save.
+    """
+    hardware = detect_hardware()
+    cores = hardware["cpu_count"] or 1
+    memory = f"{hardware['memory_gb']} GB" if hardware["memory_gb"] else "未知"
+    print(f"硬件：{cores} 核 CPU，内存 {memory}，{hardware['platform']}")
+    calibrator = Calibrator(model_dir, audio_path, duration, repeat)
+
+    compute_types = supported_compute_types()
+    base = dict(compute_type=compute_types[0], cpu_threads=cores, num_workers=1, batch_size=0)
+    reference = calibrator.measure("reference", base)
+    if reference is None:
+        raise RuntimeError("基准配置测量失败，请检查模型目录")
+    reference_text = reference["text"]
+
+    candidates = [reference]
+    for compute_type in compute_types:
+        for threads in thread_candidates(cores):
+            if compute_type == base["compute_type"] and threads == cores:
+                continue
+            settings = dict(base, compute_type=compute_type, cpu_threads=threads)
+            record = calibrator.measure("compute", settings)
+            if record is not None:
+                candidates.append(record)
+    best = _pick(candidates, reference_text, tolerance)["settings"]
+
+    candidates = [r for r in calibrator.measurements if r["settings"] == best]
+    for workers in worker_candidates(cores, hardware["memory_gb"])[1:]:
+        record = calibrator.measure("workers", dict(best, num_workers=workers))
+        if record is not None:
+            candidates.append(record)
+    best = _pick(candidates, reference_text, tolerance)["settings"]
+
+    candidates = []
+    for batch_size in BATCH_SIZES:
+        record = calibrator.measure("batch", dict(best, num_workers=1, batch_size=batch_size))
+        if record is not None:
+            candidates.append(record)
+    batch_size = _pick(candidates, None, tolerance)["settings"]["batch_size"] if candidates else None
+
+    settings = dict(
+        compute_type=best["compute_type"],
+        cpu_threads=best["cpu_threads"],
+        num_workers=best["num_workers"],
+        batch_size=batch_size or DEFAULT_BATCH_SIZE,
+    )
+    return {
+        "version": TUNING_PROFILE_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": machine_signature(),
+        "hardware": hardware,
+        "model_dir": str(model_dir),
+        "calibration": dict(audio=str(audio_path), duration=round(duration, 2), tolerance=tolerance),
+        "settings": settings,
+        "measurements": [
+            {k: v for k, v in r.items() if k != "text"} for r in calibrator.measurements
+        ],
+    }
+
+
+def save_profile(profile: Dict[str, Any], path: Optional[Path] = None) -> Path:
+    path = path or get_tuning_profile_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(profile, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+def run_autotune_cli(
+    audio: Optional[str] = None,
+    seconds: float = CALIBRATION_SECONDS,
+    tolerance: float = DEFAULT_TOLERANCE,
+    repeat: int = 2,
+    model_dir: Optional[str] = None,
+    save: bool = True,
+) -> None:
+    """
+    CLI entry for --autotune: calibrate on a clip (synthetic speech-like
+    audio unless one is given) and save the profile config.py loads.
+    """
+    from benchmark import generate_audio, write_wav
+    from whisper_local import SAMPLING_RATE, decode_audio_file
+
+    try:
+        model_path = Path(model_dir).expanduser() if model_dir else get_whisper_model_dir()
+        with tempfile.TemporaryDirectory(prefix="echodraft-autotune-") as tmp:
+            if audio:
+                audio_path = Path(audio).expanduser()
+                duration = len(decode_audio_file(audio_path)) / SAMPLING_RATE
+            else:
+                audio_path = Path(tmp) / "calibration.wav"
+                write_wav(audio_path, generate_audio("speech", seconds))
+                duration = seconds
+            profile = autotune(model_path, audio_path, duration, tolerance, max(1, repeat))
+
+        settings = profile["settings"]
+        print("\n最佳设置：" + "，".join(f"{k}={v}" for k, v in settings.items()))
+        if save:
+            path = save_profile(profile)
+            print(f"已保存：{path}（启动时自动加载，环境变量与命令行参数优先）")
+    except Exception as exc:
+        print(f"\n发生错误：{exc}", file=sys.stderr)
+        sys.exit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="EchoDraft 解码设置自动调优")
+    parser.add_argument("--audio", help="校准用音频（建议使用一段真实语音；默认生成合成音频）")
+    parser.add_argument(
+        "--seconds", type=float, default=CALIBRATION_SECONDS, help="合成校准音频时长（秒）"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="允许的转写差异（相对基准配置的字符差异比例，默认 0.02）",
+    )
+    parser.add_argument("--repeat", type=int, default=2, help="每个候选重复次数（取中位数）")
+    parser.add_argument("--model-dir", help="模型目录（默认 models/whisper/small-int8）")
+    parser.add_argument("--no-save", action="store_true", help="只测量，不保存配置")
+    args = parser.parse_args()
+    run_autotune_cli(
+        audio=args.audio,
+        seconds=args.seconds,
+        tolerance=args.tolerance,
+        repeat=args.repeat,
+        model_dir=args.model_dir,
+        save=not args.no_save,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+import glob
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from export import save_transcript
+from audio_utils import is_supported_audio_file, probe_audio, save_probe_index
+from config import get_window_seconds
+from metrics import format_duration
+from prefetch import AudioPrefetcher
+from whisper_local import (
+    configure_model,
+    get_model,
+    has_cached_transcript,
+    resolve_model_key,
+    transcribe_audio,
+)
+
+# Threads per worker process when not specified; a few threads per model keeps
+# CTranslate2 efficient while leaving room for several processes.
+DEFAULT_CPU_THREADS = 4
+
+
+class BatchResult(NamedTuple):
+    audio_path: str
+    out_path: Optional[str]
+    elapsed: float
+    error: Optional[str]
+
+
+def _read_manifest(manifest: Path) -> List[str]:
+    """
+    Read one path per line from a manifest file.
+    Blank lines and lines starting with '#' are ignored; relative paths are
+    resolved against the manifest's directory.
+    """
+    entries = []
+    for line in manifest.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        path = Path(line).expanduser()
+        if not path.is_absolute():
+            path = manifest.parent / path
+        entries.append(str(path))
+    return entries
+
+
+def _expand_input(entry: str) -> List[Path]:
+    """
+    Expand a single input (file, directory or glob pattern) into audio files.
+    """
+    if glob.has_magic(entry):
+        matches = [Path(p) for p in glob.glob(os.path.expanduser(entry), recursive=True)]
+        return sorted(p for p in matches if is_supported_audio_file(p))
+
+    path = Path(entry).expanduser()
+    if path.is_dir():
+        return sorted(p for p in path.rglob("*") if is_supported_audio_file(p))
+    if is_supported_audio_file(path):
+        return [path]
+    raise ValueError(f"无法识别的输入（不是支持的音频文件、目录或通配符）：{entry}")
+
+
+def collect_audio_files(
+    inputs: Iterable[str], manifest: Optional[str] = None
+) -> List[Path]:
+    """
+    Resolve directories, glob patterns, plain files and an optional manifest
+    into a de-duplicated list of audio files, keeping input order.
+    """
+    entries = list(inputs)
+    if manifest:
+        manifest_path = Path(manifest).expanduser()
+        if not manifest_path.is_file():
+            raise ValueError(f"清单文件不存在：{manifest_path}")
+        entries.extend(_read_manifest(manifest_path))
+
+    files: List[Path] = []
+    seen = set()
+    for entry in entries:
+        for path in _expand_input(entry):
+            key = path.resolve()
+            if key in seen:
+                continue
+            seen.add(key)
+            files.append(path)
+    return files
+
+
+def default_worker_count(cpu_threads: int) -> int:
+    """
+    Number of worker processes that fit on this machine at cpu_threads each.
+    """
+    cores = os.cpu_count() or 1
+    return max(1, cores // max(1, cpu_threads))
+
+
+def plan_jobs(files: List[Path]) -> Tuple[List[Path], Dict[str, float], List[BatchResult]]:
+    """
+    Probe every file's header and order the batch longest first, so long
+    recordings start early instead of finishing last on a single worker.
+    Returns (ordered files, duration per path, results for rejected files).
+    """
+    durations: Dict[str, float] = {}
+    rejected: List[BatchResult] = []
+    for path in files:
+        try:
+            durations[str(path)] = probe_audio(path).duration
+        except (OSError, ValueError) as exc:
+            rejected.append(BatchResult(str(path), None, 0.0, str(exc)))
+    save_probe_index()
+    ordered = [path for path in files if str(path) in durations]
+    ordered.sort(key=lambda path: durations[str(path)], reverse=True)
+    return ordered, durations, rejected
+
+
+def _worker_main(
+    task_queue,
+    result_queue,
+    cpu_threads: int,
+    compute_type: Optional[str],
+    use_cache: bool,
+    batch_size: int,
+    refine: bool,
+    window: Optional[float] = None,
+    model: Optional[str] = None,
+) -> None:
+    """
+    Worker process loop: load the model once, then transcribe paths from
+    task_queue until a None sentinel arrives.
+
+    The next file is taken from the queue and decoded in a background thread
+    while the current one is on the model, so decoding overlaps inference.
+    In windowed mode files are decoded incrementally by the transcription
+    itself instead, so the prefetcher only hands out paths.
+    """
+    window = get_window_seconds() if window is None else window
+    load_error = None
+    try:
+        configure_model(cpu_threads=cpu_threads, compute_type=compute_type)
+        get_model(resolve_model_key(model).key)
+    except Exception as exc:
+        load_error = f"模型加载失败：{exc}"
+
+    def skip_decode(path: Path) -> bool:
+        # Cache hits, windowed runs and workers without a model need no
+        # decoded audio
+        if load_error or window > 0:
+            return True
+        try:
+            return use_cache and has_cached_transcript(
+                path, batch_size=batch_size, refine=refine, window=window, model=model
+            )
+        except OSError:
+            return False
+
+    with AudioPrefetcher(iter(task_queue.get, None), skip=skip_decode) as prefetcher:
+        for item in prefetcher:
+            path_str = str(item.path)
+            start = time.perf_counter()
+            try:
+                if load_error:
+                    raise RuntimeError(load_error)
+                if item.error is not None:
+                    raise item.error
+                transcript = transcribe_audio(
+                    item.path,
+                    use_cache=use_cache,
+                    batch_size=batch_size,
+                    audio=item.audio,
+                    refine=refine,
+                    window=window,
+                    model=model,
+                )
+                out_path = save_transcript(item.path, transcript)
+                result = BatchResult(path_str, str(out_path), time.perf_counter() - start, None)
+            except Exception as exc:
+                result = BatchResult(path_str, None, time.perf_counter() - start, str(exc))
+            del item
+            result_queue.put(result)
+
+
+def _warn_duplicate_stems(files: List[Path]) -> None:
+    stems: Dict[str, List[Path]] = {}
+    for path in files:
+        stems.setdefault(path.stem, []).append(path)
+    for stem, paths in stems.items():
+        if len(paths) > 1:
+            print(
+                f"警告：{len(paths)} 个文件同名（{stem}），输出的 {stem}_transcript.md 会相互覆盖",
+                file=sys.stderr,
+            )
+
+
+def run_batch(
+    files: List[Path],
+    workers: Optional[int] = None,
+    cpu_threads: int = DEFAULT_CPU_THREADS,
+    use_cache: bool = True,
+    compute_type: Optional[str] = None,
+    batch_size: int = 0,
+    refine: bool = False,
+    durations: Optional[Dict[str, float]] = None,
+    window: Optional[float] = None,
+    model: Optional[str] = None,
+) -> List[BatchResult]:
+    """
+    Transcribe files across a pool of worker processes, each holding its own
+    model, and save one transcript per input. Files are handed out in the
+    given order; with durations (from plan_jobs) progress lines include an
+    estimate of the remaining batch time.
+    Returns one BatchResult per file, in completion order.
+    """
+    if not files:
+        return []
+
+    if workers is None:
+        workers = default_worker_count(cpu_threads)
+    workers = max(1, min(workers, len(files)))
+
+    ctx = mp.get_context("spawn")
+    task_queue = ctx.Queue()
+    result_queue = ctx.Queue()
+    for path in files:
+        task_queue.put(str(path))
+    for _ in range(workers):
+        task_queue.put(None)
+
+    procs = [
+        ctx.Process(
+            target=_worker_main,
+            args=(
+                task_queue,
+                result_queue,
+                cpu_threads,
+                compute_type,
+                use_cache,
+                batch_size,
+                refine,
+                window,
+                model,
+            ),
+        )
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+
+    results: List[BatchResult] = []
+    pending = {str(path) for path in files}
+    total = len(files)
+    durations = durations or {}
+    audio_left = sum(durations.get(p, 0.0) for p in pending)
+    audio_done = 0.0
+    start = time.perf_counter()
+    try:
+        while pending:
+            try:
+                result = result_queue.get(timeout=1.0)
+            except queue.Empty:
+                if not any(proc.is_alive() for proc in procs):
+                    break
+                continue
+            pending.discard(result.audio_path)
+            results.append(result)
+            seconds = durations.get(result.audio_path, 0.0)
+            audio_done += seconds
+            audio_left -= seconds
+            eta = ""
+            if audio_done > 0 and pending:
+                rate = audio_done / (time.perf_counter() - start)
+                eta = f"，预计剩余 {format_duration(max(0.0, audio_left) / rate)}"
+            status = "完成" if result.error is None else "失败"
+            print(
+                f"[{len(results)}/{total}] {status} {result.audio_path} "
+                f"({result.elapsed:.1f}s{eta})",
+                flush=True,
+            )
+    finally:
+        for proc in procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+
+    # Files still pending were owned by a worker that died without reporting.
+    for path_str in sorted(pending):
+        results.append(BatchResult(path_str, None, 0.0, "工作进程异常退出"))
+    return results
+
+
+def print_summary(results: List[BatchResult], wall_time: float) -> None:
+    """
+    Print throughput and failures for a finished batch.
+    """
+    failures = [r for r in results if r.error is not None]
+    succeeded = len(results) - len(failures)
+    busy = sum(r.elapsed for r in results)
+
+    print("\n=== 批量转写汇总 ===")
+    print(f"文件总数：{len(results)}，成功：{succeeded}，失败：{len(failures)}")
+    print(f"总耗时：{wall_time:.1f}s，累计处理时间：{busy:.1f}s")
+    if wall_time > 0:
+        print(f"吞吐量：{len(results) / wall_time * 60:.1f} 个文件/分钟")
+    if failures:
+        print("\n失败列表：")
+        for r in failures:
+            print(f"  {r.audio_path}: {r.error}")
+
+
+def run_batch_cli(
+    inputs: List[str],
+    manifest: Optional[str] = None,
+    workers: Optional[int] = None,
+    cpu_threads: int = DEFAULT_CPU_THREADS,
+    use_cache: bool = True,
+    compute_type: Optional[str] = None,
+    batch_size: int = 0,
+    refine: bool = False,
+    window: Optional[float] = None,
+    model: Optional[str] = None,
+) -> None:
+    """
+    CLI entry: transcribe every matched file and print a summary.
+    Exits with status 1 if any file failed.
+    """
+    try:
+        files = collect_audio_files(inputs, manifest)
+    except Exception as exc:
+        print(f"发生错误：{exc}", file=sys.stderr)
+        sys.exit(1)
+
+    if not files:
+        print("没有找到可转写的音频文件。", file=sys.stderr)
+        sys.exit(1)
+
+    _warn_duplicate_stems(files)
+    files, durations, rejected = plan_jobs(files)
+    for r in rejected:
+        print(f"跳过 {r.audio_path}：{r.error}", file=sys.stderr)
+
+    start = time.perf_counter()
+    results = list(rejected)
+    if files:
+        if workers is None:
+            workers = default_worker_count(cpu_threads)
+        workers = max(1, min(workers, len(files)))
+        total_audio = format_duration(sum(durations.values()))
+        print(
+            f"共 {len(files)} 个文件（音频总时长 {total_audio}），"
+            f"使用 {workers} 个进程（每进程 {cpu_threads} 线程）"
+        )
+        results += run_batch(
+            files,
+            workers=workers,
+            cpu_threads=cpu_threads,
+            use_cache=use_cache,
+            compute_type=compute_type,
+            batch_size=batch_size,
+            refine=refine,
+            durations=durations,
+            window=window,
+            model=model,
+        )
+    print_summary(results, time.perf_counter() - start)
+
+    if any(r.error is not None for r in results):
+        sys.exit(1)
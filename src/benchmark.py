@@ -0,0 +1,346 @@
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from audio_utils import SUPPORTED_EXTENSIONS
+from config import ensure_output_dir, get_whisper_model_dir
+
+SAMPLING_RATE = 16000
+AUDIO_KINDS = ("tone", "speech", "silence")
+# Metrics where a higher value is worse, with the smallest absolute change
+# that counts as a regression (so timer noise on tiny values is ignored)
+REGRESSION_METRICS = {"rtf": 0.005, "ttfs": 0.05, "load_time": 0.05, "peak_rss_mb": 5.0}
+
+
+def generate_audio(kind: str, seconds: float, seed: int = 0) -> np.ndarray:
+    """
+    Synthesize deterministic 16 kHz mono test audio.
+
+    tone:    a 220 Hz + 440 Hz chord
+    speech:  band-limited noise with a syllable-rate (~4 Hz) envelope and
+             word pauses, which keeps VAD and the decoder busy like real speech
+    silence: near-silent noise floor, the best case for VAD
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SAMPLING_RATE)
+    t = np.arange(n, dtype=np.float32) / SAMPLING_RATE
+
+    if kind == "tone":
+        audio = 0.2 * np.sin(2 * np.pi * 220 * t) + 0.1 * np.sin(2 * np.pi * 440 * t)
+    elif kind == "speech":
+        noise = rng.standard_normal(n).astype(np.float32)
+        # Crude low-pass so energy sits in the voice band
+        kernel = np.ones(8, dtype=np.float32) / 8
+        voiced = np.convolve(noise, kernel, mode="same")
+        syllables = np.abs(np.sin(2 * np.pi * 4 * t))
+        words = (np.sin(2 * np.pi * 0.3 * t + rng.uniform(0, np.pi)) > -0.5).astype(np.float32)
+        audio = 0.4 * voiced * syllables * words
+    elif kind == "silence":
+        audio = 1e-4 * rng.standard_normal(n)
+    else:
+        raise ValueError(f"未知的音频类型：{kind}")
+    return np.clip(audio, -1.0, 1.0).astype(np.float32)
+
+
+def write_wav(path: Path, samples: np.ndarray) -> None:
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLING_RATE)
+        f.writeframes(pcm.tobytes())
+
+
+def _audio_duration(path: Path) -> float:
+    from faster_whisper.audio import decode_audio
+
+    return len(decode_audio(str(path), sampling_rate=SAMPLING_RATE)) / SAMPLING_RATE
+
+
+def prepare_inputs(
+    work_dir: Path, kinds: List[str], lengths: List[float], fixtures: Optional[Path]
+) -> List[Tuple[str, Path, float]]:
+    """
+    Return (name, path, duration_seconds) for generated clips and fixtures.
+    """
+    inputs = []
+    for kind, seconds in itertools.product(kinds, lengths):
+        path = work_dir / f"{kind}-{int(seconds)}s.wav"
+        write_wav(path, generate_audio(kind, seconds))
+        inputs.append((path.stem, path, float(seconds)))
+
+    if fixtures:
+        for path in sorted(fixtures.iterdir()):
+            if path.suffix.lower() in SUPPORTED_EXTENSIONS:
+                inputs.append((f"fixture:{path.name}", path, _audio_duration(path)))
+    return inputs
+
+
+def _cpu_seconds() -> float:
+    t = os.times()
+    return t.user + t.system
+
+
+def _peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _measure(
+    model_dir: str, config: Dict[str, Any], audio_path: str, duration: float, repeat: int
+) -> Dict[str, Any]:
+    """
+    Child process: load the model with config, transcribe audio_path repeat
+    times and report timings. Running each case in a fresh process keeps load
+    time and peak RSS independent of earlier cases.
+    """
+    from whisper_local import configure_model, get_model, transcribe_rows, transcribe_windowed
+
+    start = time.perf_counter()
+    configure_model(
+        model_dir=Path(model_dir),
+        compute_type=config["compute_type"],
+        cpu_threads=config["cpu_threads"],
+    )
+    get_model()
+    load_time = time.perf_counter() - start
+
+    options = dict(beam_size=config["beam_size"], vad_filter=config["vad"])
+    runs = []
+    for _ in range(repeat):
+        cpu_start = _cpu_seconds()
+        start = time.perf_counter()
+        ttfs = None
+        segments = 0
+        if config.get("window"):
+            _, rows = transcribe_windowed(Path(audio_path), config["window"], options=options)
+        else:
+            _, rows = transcribe_rows(audio_path, options=options)
+        for _ in rows:
+            if ttfs is None:
+                ttfs = time.perf_counter() - start
+            segments += 1
+        elapsed = time.perf_counter() - start
+        runs.append((elapsed, ttfs, _cpu_seconds() - cpu_start, segments))
+
+    elapsed = statistics.median(r[0] for r in runs)
+    ttfs_values = [r[1] for r in runs if r[1] is not None]
+    cpu = statistics.median(r[2] for r in runs)
+    return {
+        "load_time": round(load_time, 3),
+        "ttfs": round(statistics.median(ttfs_values), 3) if ttfs_values else None,
+        "elapsed": round(elapsed, 3),
+        "rtf": round(elapsed / duration, 4) if duration > 0 else None,
+        "cpu_percent": round(cpu / elapsed * 100, 1) if elapsed > 0 else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "segments": runs[-1][3],
+    }
+
+
+def config_name(config: Dict[str, Any]) -> str:
+    vad = "vad" if config["vad"] else "novad"
+    name = f"beam{config['beam_size']}-{config['compute_type']}-t{config['cpu_threads']}-{vad}"
+    # Whole-file decoding keeps the historical names so old baselines still match
+    return f"{name}-w{config['window']}" if config.get("window") else name
+
+
+def run_benchmark(
+    inputs: List[Tuple[str, Path, float]],
+    configs: List[Dict[str, Any]],
+    model_dir: Path,
+    repeat: int = 1,
+) -> List[Dict[str, Any]]:
+    ctx = mp.get_context("spawn")
+    results = []
+    for config, (name, path, duration) in itertools.product(configs, inputs):
+        label = f"{config_name(config)} / {name}"
+        print(f"测量 {label} ...", end="", flush=True)
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            try:
+                metrics = pool.submit(
+                    _measure, str(model_dir), config, str(path), duration, repeat
+                ).result()
+                error = None
+            except Exception as exc:
+                metrics, error = {}, str(exc)
+        results.append(
+            {
+                "config": config_name(config),
+                "input": name,
+                "duration": round(duration, 2),
+                **config,
+                **metrics,
+                "error": error,
+            }
+        )
+        print(f" 失败：{error}" if error else f" RTF {metrics.get('rtf')}")
+    return results
+
+
+def compare_with_baseline(
+    results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    """
+    Print per-case changes against a baseline run and return descriptions of
+    metrics that got worse by more than threshold (a fraction, e.g. 0.1).
+    """
+    previous = {(r["config"], r["input"]): r for r in baseline.get("results", [])}
+    regressions = []
+    print("\n=== 与基线对比 ===")
+    for r in results:
+        base = previous.get((r["config"], r["input"]))
+        if base is None or r.get("error"):
+            continue
+        changes = []
+        for metric, min_change in REGRESSION_METRICS.items():
+            old, new = base.get(metric), r.get(metric)
+            if not old or new is None:
+                continue
+            delta = (new - old) / old
+            changes.append(f"{metric} {delta:+.1%}")
+            if delta > threshold and new - old >= min_change:
+                regressions.append(f"{r['config']} / {r['input']}: {metric} {old} -> {new}")
+        print(f"{r['config']} / {r['input']}: " + ", ".join(changes))
+    return regressions
+
+
+def print_memory_scaling(results: List[Dict[str, Any]]) -> None:
+    """
+    Print peak RSS against audio length per config and audio kind: whole-file
+    decoding grows with the recording, windowed decoding should stay flat.
+    """
+    series: Dict[Tuple[str, str], List[Tuple[float, float]]] = {}
+    for r in results:
+        if r.get("error") or r.get("peak_rss_mb") is None or r["input"].startswith("fixture:"):
+            continue
+        kind = r["input"].rsplit("-", 1)[0]
+        series.setdefault((r["config"], kind), []).append((r["duration"], r["peak_rss_mb"]))
+    series = {key: points for key, points in series.items() if len(points) > 1}
+    if not series:
+        return
+    print("\n=== 峰值内存随音频时长变化 ===")
+    for (config, kind), points in sorted(series.items()):
+        points.sort()
+        cells = ", ".join(f"{seconds:.0f}s: {rss:.0f} MB" for seconds, rss in points)
+        growth = points[-1][1] - points[0][1]
+        print(f"{config} / {kind}: {cells}（增长 {growth:+.0f} MB）")
+
+
+def _parse_list(value: str, cast=str) -> list:
+    return [cast(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def _parse_vad(value: str) -> bool:
+    if value.lower() in ("on", "true", "1", "yes"):
+        return True
+    if value.lower() in ("off", "false", "0", "no"):
+        return False
+    raise ValueError(f"无效的 VAD 取值：{value}")
+
+
+def _package_version(name: str) -> Optional[str]:
+    try:
+        from importlib.metadata import version
+
+        return version(name)
+    except Exception:
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="EchoDraft 转写性能基准测试（离线）")
+    parser.add_argument("--kinds", default=",".join(AUDIO_KINDS), help="生成音频类型")
+    parser.add_argument("--lengths", default="10,60", help="生成音频时长（秒）")
+    parser.add_argument("--fixtures", help="额外的测试音频目录")
+    parser.add_argument("--beam-sizes", default="1,5")
+    parser.add_argument("--compute-types", default="int8")
+    parser.add_argument("--cpu-threads", default=str(min(4, os.cpu_count() or 1)))
+    parser.add_argument("--vad", default="on,off", help="VAD 开关组合，如 on,off")
+    parser.add_argument(
+        "--windows",
+        default="0",
+        help="分窗解码的窗口长度（秒），0 表示整段解码，如 0,300 对比两者的峰值内存",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="每个用例重复次数（取中位数）")
+    parser.add_argument("--model-dir", help="模型目录（默认 models/whisper/small-int8）")
+    parser.add_argument("--output", help="结果 JSON 路径")
+    parser.add_argument("--baseline", help="用于对比的基线结果 JSON")
+    parser.add_argument(
+        "--threshold", type=float, default=0.10, help="判定回退的相对阈值（默认 0.10）"
+    )
+    args = parser.parse_args()
+
+    model_dir = Path(args.model_dir).expanduser() if args.model_dir else get_whisper_model_dir()
+    configs = [
+        dict(beam_size=beam, compute_type=ctype, cpu_threads=threads, vad=vad, window=window)
+        for beam, ctype, threads, vad, window in itertools.product(
+            _parse_list(args.beam_sizes, int),
+            _parse_list(args.compute_types),
+            _parse_list(args.cpu_threads, int),
+            _parse_list(args.vad, _parse_vad),
+            _parse_list(args.windows, int),
+        )
+    ]
+
+    with tempfile.TemporaryDirectory(prefix="echodraft-bench-") as tmp:
+        inputs = prepare_inputs(
+            Path(tmp),
+            _parse_list(args.kinds),
+            _parse_list(args.lengths, float),
+            Path(args.fixtures).expanduser() if args.fixtures else None,
+        )
+        results = run_benchmark(inputs, configs, model_dir, repeat=max(1, args.repeat))
+    print_memory_scaling(results)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "faster_whisper": _package_version("faster-whisper"),
+            "ctranslate2": _package_version("ctranslate2"),
+            "model_dir": str(model_dir),
+        },
+        "results": results,
+    }
+
+    if args.output:
+        out_path = Path(args.output).expanduser()
+    else:
+        out_dir = ensure_output_dir() / "benchmarks"
+        out_dir.mkdir(parents=True, exist_ok=True)
+        out_path = out_dir / f"benchmark-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n结果已保存：{out_path}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).expanduser().read_text(encoding="utf-8"))
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 项性能回退（阈值 {args.threshold:.0%}）：")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\n未发现超过阈值的性能回退。")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,462 @@
+import argparse
+import contextlib
+import glob
+import multiprocessing
 import sys
-from typing import NoReturn
+from pathlib import Path
+from typing import TYPE_CHECKING, List, NoReturn, Optional, Sequence
 
-from app import run_cli
+# Only the standard library is imported at module level: everything else is
+# imported by the mode that needs it, so --help, argument errors and daemon
+# client runs stay fast and no mode ever pulls in Qt.
+if TYPE_CHECKING:
+    from metrics import ProgressInfo
+
+
+def _is_single_file(inputs, manifest) -> bool:
+    if manifest or len(inputs) != 1:
+        return False
+    path = Path(inputs[0]).expanduser()
+    return not glob.has_magic(inputs[0]) and not path.is_dir()
+
+
+def run_cli(
+    audio_file: str,
+    use_cache: bool = True,
+    parallel: int = 0,
+    batch_size: int = 0,
+    resume: bool = True,
+    refine: bool = False,
+    formats: Sequence[str] = ("md",),
+    window: Optional[float] = None,
+    model: Optional[str] = None,
+    profile: Optional[str] = None,
+) -> None:
+    """
+    CLI entry: transcribe audio, printing and saving each line as it arrives.
+    Set use_cache=False to force a fresh transcription; parallel > 1 splits a
+    long recording across that many worker processes; batch_size > 0 selects
+    batched fast mode. An interrupted run of the same file is resumed from its
+    journal unless resume=False. refine=True runs the two-pass draft/refine
+    decoding and reports how many segments were re-decoded. formats lists
+    the export.EXPORT_FORMATS to write, all in the same pass. window > 0
+    decodes in bounded-memory windows of that many seconds (None: config).
+    model picks the model or routing policy (see transcribe_audio).
+    profile ("sample" or "cprofile") runs the job under profiling.JobProfiler.
+    """
+    from audio_utils import probe_audio, validate_audio_file
+    from export import MultiFormatWriter
+    from metrics import format_duration
+    from whisper_local import format_segment, transcribe_segments
+
+    try:
+        audio_path = validate_audio_file(audio_file)
+        audio_info = probe_audio(audio_path)
+        print(f"音频文件：{audio_path}（时长 {format_duration(audio_info.duration or None)}）")
+        print("开始转写，请稍候...")
+
+        interactive = sys.stdout.isatty()
+        # Erase the progress line before printing a transcript line over it
+        clear_line = "\r\033[K" if interactive else ""
+        last_info: List["ProgressInfo"] = []
+
+        def stats_callback(info: "ProgressInfo") -> None:
+            last_info[:] = [info]
+            if interactive:
+                print(
+                    f"\r进度: {info.progress:.1f}% | 速度 {info.speed:.1f}x | "
+                    f"剩余 {format_duration(info.eta)} (检测到语言: {info.language})",
+                    end="",
+                    flush=True,
+                )
+
+        profiler = None
+        if profile:
+            from profiling import JobProfiler
+
+            profiler = JobProfiler(audio_path, profile)
+        with profiler or contextlib.nullcontext():
+            segments, language = transcribe_segments(
+                audio_path,
+                stats_callback=stats_callback,
+                use_cache=use_cache,
+                parallel=parallel,
+                batch_size=batch_size,
+                resume=resume,
+                refine=refine,
+                window=window,
+                model=model,
+            )
+
+            print("\n=== 转写全文 ===\n")
+            with MultiFormatWriter(audio_path, formats, language) as writer:
+                for segment in segments:
+                    writer.write(segment)
+                    print(f"{clear_line}{format_segment(segment)}", flush=True)
+            print(clear_line, end="")
+
+        if not writer.line_count:
+            print("(转写结果为空)")
+        if refine and last_info:
+            print(f"二次精修：{last_info[0].refined} 段低置信度片段已用 beam search 重新解码")
+        print("\n转写完成，结果已保存：")
+        for fmt, path in writer.paths.items():
+            print(f"  {fmt}: {path}")
+        if profiler is not None:
+            print("性能分析结果：")
+            for kind, path in profiler.paths.items():
+                print(f"  {kind}: {path}")
+
+    except Exception as exc:
+        print(f"\n发生错误：{exc}", file=sys.stderr)
+        sys.exit(1)
+
+
+def _print_job_status(job_id) -> None:
+    from daemon import is_daemon_running, job_status
+
+    if not is_daemon_running():
+        print("转写守护进程未运行。", file=sys.stderr)
+        sys.exit(1)
+    try:
+        jobs = job_status(job_id)
+    except Exception as exc:
+        print(f"发生错误：{exc}", file=sys.stderr)
+        sys.exit(1)
+    for job in [jobs] if job_id else jobs:
+        line = f"{job['job_id']}  {job['state']:<8} {job['progress']:5.1f}%  {job['path']}"
+        if job.get("error"):
+            line += f"  ({job['error']})"
+        print(line)
 
 
 def main() -> NoReturn:
     """
     Simple CLI entry wrapper.
     Usage: python3 cli.py input.m4a
+           python3 cli.py recordings/ "memos/*.m4a" --manifest list.txt -j 8
+           python3 cli.py --serve   (then cli.py input.m4a uses the daemon)
+           python3 cli.py recordings/ --queue /mnt/share/q   (on each node:)
+           python3 cli.py --queue /mnt/share/q --work
+           arecord -f S16_LE -r 16000 -c 1 | python3 cli.py --stream -
     """
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(description="本地 Whisper 语音转写（命令行）")
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        metavar="AUDIO",
+        help="音频文件、目录或通配符；多个输入时进入批量模式",
+    )
+    parser.add_argument("--manifest", help="批量模式：每行一个音频路径的清单文件")
+    parser.add_argument(
+        "-j", "--workers", type=int, help="批量模式：工作进程数（默认按 CPU 核数计算）"
+    )
+    parser.add_argument(
+        "--cpu-threads",
+        type=int,
+        help="每个模型的 CPU 线程数（批量模式下为每个工作进程；默认用 --autotune 测得的值）",
+    )
+    parser.add_argument(
+        "--compute-type", help="模型计算精度，如 int8、int8_float32、float32（默认 int8）"
+    )
+    parser.add_argument(
+        "--num-workers", type=int, help="单个模型可同时运行的转写数"
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=0,
+        metavar="N",
+        help="单文件：在静音处切分长录音，用 N 个进程并行转写",
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="快速模式：对 VAD 切分的语音片段做批量推理（吞吐更高，精度略低）",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, help="快速模式的批大小（默认 8，或 --autotune 测得的值）"
+    )
+    parser.add_argument(
+        "--refine",
+        action="store_true",
+        help="两遍解码：先贪心快速转写，再用 beam search 重解码低置信度片段",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="忽略上次中断留下的进度日志，从头转写",
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        metavar="SECONDS",
+        help="分窗解码：边解码边按此长度（如 300 秒）分窗转写，内存占用不随音频时长增长（0 关闭）",
+    )
+    parser.add_argument(
+        "--model",
+        metavar="NAME",
+        help="使用的模型：models/whisper/ 下的目录名或尺寸（如 tiny、medium-int8）；"
+        "auto 表示短录音用最小模型、置信度低时再用默认模型重转（默认 default）",
+    )
+    parser.add_argument(
+        "--list-models", action="store_true", help="列出 models/whisper/ 下可用的模型"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="sample",
+        choices=("sample", "cprofile"),
+        help="单文件：在性能分析器下运行，在转写结果旁写出火焰图折叠栈与耗时排行"
+        "（默认 sample 采样；cprofile 为确定性分析）",
+    )
+    parser.add_argument(
+        "--formats",
+        default="md",
+        help="单文件：输出格式，逗号分隔，可选 md,srt,vtt,json,txt（默认 md）",
+    )
+    parser.add_argument(
+        "--export",
+        metavar="FORMATS",
+        help="不重新转写，用已有结果（JSON 导出或转写缓存）导出指定格式",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="忽略转写缓存，强制重新转写"
+    )
+    parser.add_argument(
+        "--serve", action="store_true", help="启动常驻转写守护进程（保持模型常驻内存）"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="守护进程 / 监视模式：同时运行的转写任务数",
+    )
+    parser.add_argument(
+        "--no-daemon", action="store_true", help="即使守护进程在运行也在当前进程内转写"
+    )
+    parser.add_argument(
+        "--watch",
+        action="append",
+        metavar="DIR",
+        help="监视目录，自动转写新放入的音频（可重复指定；并发数见 --concurrency）",
+    )
+    parser.add_argument(
+        "--queue",
+        metavar="DIR",
+        help="共享目录任务队列（如 NFS）：带音频参数时加入队列，配合 --work 作为工作进程处理，"
+        "否则显示队列状态",
+    )
+    parser.add_argument(
+        "--work", action="store_true", help="作为工作进程处理 --queue 中的任务（并发数见 --concurrency）"
+    )
+    parser.add_argument(
+        "--exit-when-empty", action="store_true", help="工作进程：队列处理完后退出"
+    )
+    parser.add_argument(
+        "--stream",
+        metavar="SOURCE",
+        help="实时转写 16 kHz 单声道 16 位 PCM：- 表示标准输入，也可以是 FIFO 或正在写入的 WAV",
+    )
+    parser.add_argument(
+        "--language", help="实时转写：指定语言代码（如 zh、en），默认自动检测"
+    )
+    parser.add_argument(
+        "--stream-step",
+        type=float,
+        default=1.0,
+        metavar="SECONDS",
+        help="实时转写：两次解码之间至少累积的新音频时长（默认 1 秒）",
+    )
+    parser.add_argument(
+        "--search",
+        metavar="QUERY",
+        help="在已保存的转写结果中全文搜索（支持中文），输出匹配片段及毫秒时间戳",
+    )
+    parser.add_argument(
+        "--reindex",
+        action="store_true",
+        help="重新扫描输出目录，更新搜索索引",
+    )
+    parser.add_argument(
+        "--autotune",
+        action="store_true",
+        help="按本机硬件测量并保存最佳解码设置（compute_type、线程数、并发数、批大小）",
+    )
+    parser.add_argument(
+        "--job-status",
+        nargs="?",
+        const="",
+        metavar="JOB_ID",
+        help="查询守护进程中的任务状态（不带参数时列出全部任务）",
+    )
+    args = parser.parse_args()
+    batch_size = 0
+    if args.fast or args.batch_size:
+        from config import get_batch_size
+
+        batch_size = args.batch_size or get_batch_size()
+
+    if args.serve:
+        from daemon import run_daemon
+
+        run_daemon(concurrency=args.concurrency)
+        sys.exit(0)
+
+    if args.list_models:
+        from model_tiers import print_models
+
+        print_models()
+        sys.exit(0)
+
+    if args.autotune:
+        from autotune import run_autotune_cli
+
+        run_autotune_cli()
+        sys.exit(0)
+
+    if args.search or args.reindex:
+        from search_index import run_search_cli
+
+        run_search_cli(args.search or "", reindex=args.reindex)
+        sys.exit(0)
+
+    if args.export:
+        from export import parse_formats, run_export_cli
+
+        if len(args.inputs) != 1:
+            print("用法：python3 cli.py --export srt,vtt <音频文件或 _transcript.json>")
+            sys.exit(1)
+        try:
+            formats = parse_formats(args.export)
+        except ValueError as exc:
+            print(f"发生错误：{exc}", file=sys.stderr)
+            sys.exit(1)
+        run_export_cli(args.inputs[0], formats)
+        sys.exit(0)
+
+    if args.watch:
+        from watch import run_watch_cli
+        from whisper_local import configure_model
+
+        configure_model(compute_type=args.compute_type, cpu_threads=args.cpu_threads)
+        run_watch_cli(args.watch, workers=args.concurrency, use_cache=not args.no_cache)
+        sys.exit(0)
+
+    if args.queue:
+        if args.work:
+            from whisper_local import configure_model
+            from work_queue import run_worker_cli
+
+            configure_model(compute_type=args.compute_type, cpu_threads=args.cpu_threads)
+            run_worker_cli(
+                args.queue, concurrency=args.concurrency, exit_when_empty=args.exit_when_empty
+            )
+        elif args.inputs or args.manifest:
+            from work_queue import run_submit_cli
+
+            run_submit_cli(
+                args.queue,
+                args.inputs,
+                manifest=args.manifest,
+                use_cache=not args.no_cache,
+                batch_size=batch_size,
+                model=args.model,
+            )
+        else:
+            from work_queue import print_queue_status
+
+            print_queue_status(args.queue)
+        sys.exit(0)
+
+    if args.stream:
+        from streaming import run_stream_cli
+        from whisper_local import configure_model
+
+        configure_model(
+            compute_type=args.compute_type,
+            cpu_threads=args.cpu_threads,
+            num_workers=args.num_workers,
+        )
+        run_stream_cli(args.stream, language=args.language, step=args.stream_step)
+        sys.exit(0)
+
+    if args.job_status is not None:
+        _print_job_status(args.job_status or None)
+        sys.exit(0)
+
+    if not args.inputs and not args.manifest:
         print("用法：python3 cli.py <音频文件路径>")
         sys.exit(1)
 
-    audio_file = sys.argv[1]
-    run_cli(audio_file)
+    if _is_single_file(args.inputs, args.manifest):
+        # Hand the job to a running daemon when possible: it already has a
+        # warm model, so this process never imports the inference stack.
+        # The daemon runs plain resumable jobs on its own model settings and
+        # writes Markdown only.
+        plain = (
+            args.parallel <= 1
+            and args.compute_type is None
+            and args.cpu_threads is None
+            and args.num_workers is None
+            and args.window is None
+            and args.model is None
+            and args.profile is None
+            and not (args.no_resume or args.refine)
+        )
+        if not args.no_daemon and plain and args.formats.strip().lower() == "md":
+            from daemon import is_daemon_running, run_client
+
+            if is_daemon_running():
+                run_client(args.inputs[0], use_cache=not args.no_cache, batch_size=batch_size)
+                sys.exit(0)
+
+        from export import parse_formats
+        from whisper_local import configure_model
+
+        try:
+            formats = parse_formats(args.formats)
+        except ValueError as exc:
+            print(f"发生错误：{exc}", file=sys.stderr)
+            sys.exit(1)
+        configure_model(
+            compute_type=args.compute_type,
+            cpu_threads=args.cpu_threads,
+            num_workers=args.num_workers,
+        )
+        run_cli(
+            args.inputs[0],
+            use_cache=not args.no_cache,
+            parallel=args.parallel,
+            batch_size=batch_size,
+            resume=not args.no_resume,
+            refine=args.refine,
+            formats=formats,
+            window=args.window,
+            model=args.model,
+            profile=args.profile,
+        )
+        sys.exit(0)
+
+    from batch import DEFAULT_CPU_THREADS, run_batch_cli
+    from config import get_cpu_threads
+
+    run_batch_cli(
+        args.inputs,
+        manifest=args.manifest,
+        workers=args.workers,
+        # The tuned thread count (or ECHODRAFT_CPU_THREADS) unless given
+        cpu_threads=args.cpu_threads or get_cpu_threads() or DEFAULT_CPU_THREADS,
+        use_cache=not args.no_cache,
+        compute_type=args.compute_type,
+        batch_size=batch_size,
+        refine=args.refine,
+        window=args.window,
+        model=args.model,
+    )
+    sys.exit(0)
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
-
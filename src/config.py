@@ -1,4 +1,10 @@
 from pathlib import Path
+from typing import Any, Dict, Optional
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
 import sys
 
 
@@ -21,13 +27,19 @@ def get_default_output_dir() -> Path:
     Determine the default output directory.
     In app mode, use ~/Documents/EchoDraft to ensure write permissions.
     In dev mode, use local output/ directory.
+    Override with ECHODRAFT_OUTPUT_DIR.
     """
+    env_dir = os.environ.get("ECHODRAFT_OUTPUT_DIR")
+    if env_dir:
+        return Path(env_dir).expanduser()
     if getattr(sys, "frozen", False):
         return Path.home() / "Documents" / "EchoDraft"
     return BASE_DIR / "output"
 
 
 OUTPUT_DIR = get_default_output_dir()
+# Set by use_output_dir(keep_cache=True); None keeps caches in the output dir
+_cache_root: Optional[Path] = None
 
 
 def get_models_root() -> Path:
@@ -58,7 +70,187 @@ def get_models_root() -> Path:
     return candidates[0]
 
 
-DEFAULT_WHISPER_MODEL_DIR = get_models_root() / "whisper" / "small-int8"
+WHISPER_MODELS_DIR = get_models_root() / "whisper"
+DEFAULT_WHISPER_MODEL_DIR = WHISPER_MODELS_DIR / "small-int8"
+
+
+DEFAULT_COMPUTE_TYPE = "int8"
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_MODEL_POLICY = "default"
+TUNING_PROFILE_VERSION = 1
+
+# Settings measured by autotune, loaded once per process; None = not loaded
+_tuning_profile: Optional[Dict[str, Any]] = None
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"环境变量 {name} 必须是整数，当前值：{value}")
+
+
+def total_memory_bytes() -> Optional[int]:
+    """Physical memory of this machine, or None when it cannot be read."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        pass
+    if sys.platform == "darwin":
+        try:
+            out = subprocess.run(["sysctl", "-n", "hw.memsize"], capture_output=True, text=True)
+            return int(out.stdout.strip())
+        except (OSError, ValueError):
+            pass
+    return None
+
+
+def machine_signature() -> Dict[str, Any]:
+    """
+    Hardware a tuning profile is valid for, so a profile in a synced output
+    dir is not applied on a different machine.
+    """
+    return dict(system=platform.system(), machine=platform.machine(), cpu_count=os.cpu_count())
+
+
+def get_tuning_profile_path() -> Path:
+    """
+    Where autotune saves the measured settings.
+    Override with ECHODRAFT_TUNING_PROFILE.
+    """
+    env_path = os.environ.get("ECHODRAFT_TUNING_PROFILE")
+    if env_path:
+        return Path(env_path).expanduser()
+    return get_cache_dir() / "tuning_profile.json"
+
+
+def load_tuning_profile() -> Dict[str, Any]:
+    """
+    Return the settings autotune measured on this machine, or {} when there
+    is no profile or it was made on other hardware or for another model
+    directory than get_whisper_model_dir(). Read once per process.
+    """
+    global _tuning_profile
+    if _tuning_profile is None:
+        _tuning_profile = {}
+        try:
+            data = json.loads(get_tuning_profile_path().read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        if (
+            data.get("version") == TUNING_PROFILE_VERSION
+            and data.get("machine") == machine_signature()
+        ):
+            problem = _model_dir_problem(data.get("model_dir"))
+            if problem is None:
+                _tuning_profile = dict(data.get("settings", {}))
+            elif multiprocessing.parent_process() is None:
+                # Batch and parallel workers read the profile too; the parent
+                # has already said so
+                print(f"{problem}，未使用调优配置。", file=sys.stderr)
+    return _tuning_profile
+
+
+def _model_dir_problem(profile_dir: Optional[str]) -> Optional[str]:
+    """
+    Why a tuning profile's model directory rules it out for the configured
+    model, or None when it applies.
+    """
+    if not profile_dir:
+        return None  # A profile without one still applies
+    try:
+        model_dir = get_whisper_model_dir()
+    except FileNotFoundError:
+        return "找不到当前的模型目录"
+    try:
+        if Path(profile_dir).expanduser().resolve() == model_dir.resolve():
+            return None
+    except (OSError, RuntimeError):
+        pass
+    return f"调优配置是为模型 {profile_dir} 测量的，当前模型为 {model_dir}（请重新运行 --autotune）"
+
+
+def get_compute_type(tuned: bool = True) -> str:
+    """
+    CTranslate2 compute type for the model (e.g. int8, int8_float32, float32).
+    Override with ECHODRAFT_COMPUTE_TYPE; otherwise the tuning profile's, which
+    was measured for the default model only (tuned=False for other models).
+    """
+    profile = load_tuning_profile() if tuned else {}
+    return (
+        os.environ.get("ECHODRAFT_COMPUTE_TYPE", "").strip()
+        or profile.get("compute_type")
+        or DEFAULT_COMPUTE_TYPE
+    )
+
+
+def get_cpu_threads(tuned: bool = True) -> int:
+    """
+    CPU threads per model (0 = CTranslate2 default).
+    Override with ECHODRAFT_CPU_THREADS; otherwise the tuning profile's (see
+    get_compute_type for tuned).
+    """
+    profile = load_tuning_profile() if tuned else {}
+    return _env_int("ECHODRAFT_CPU_THREADS", profile.get("cpu_threads", 0))
+
+
+def get_num_workers() -> int:
+    """
+    Number of concurrent transcriptions one model instance can run.
+    Override with ECHODRAFT_NUM_WORKERS; otherwise the tuning profile's.
+    """
+    return max(1, _env_int("ECHODRAFT_NUM_WORKERS", load_tuning_profile().get("num_workers", 1)))
+
+
+def get_batch_size() -> int:
+    """
+    Batch size of the batched "fast" mode.
+    Override with ECHODRAFT_BATCH_SIZE; otherwise the tuning profile's.
+    """
+    tuned = load_tuning_profile().get("batch_size", DEFAULT_BATCH_SIZE)
+    return max(1, _env_int("ECHODRAFT_BATCH_SIZE", tuned))
+
+
+def get_window_seconds() -> int:
+    """
+    Window length for bounded-memory decoding (0 = decode the whole file at
+    once). Override with ECHODRAFT_WINDOW_SECONDS.
+    """
+    return max(0, _env_int("ECHODRAFT_WINDOW_SECONDS", 0))
+
+
+def get_model_policy() -> str:
+    """
+    Which model a job uses: "default" (the configured model), "auto" (route
+    by recording length, see model_tiers) or a model name under
+    models/whisper/ such as tiny or medium-int8. Override with ECHODRAFT_MODEL.
+    """
+    return os.environ.get("ECHODRAFT_MODEL", "").strip() or DEFAULT_MODEL_POLICY
+
+
+def get_profile_mode() -> Optional[str]:
+    """
+    Profiler for GUI jobs: "sample" or "cprofile" (see profiling.JobProfiler),
+    None when off. Set with ECHODRAFT_PROFILE (1 means sample).
+    """
+    value = os.environ.get("ECHODRAFT_PROFILE", "").strip().lower()
+    if value in ("", "0", "off", "false"):
+        return None
+    return "sample" if value in ("1", "on", "true") else value
+
+
+def get_model_memory_budget() -> int:
+    """
+    Bytes the loaded models may take together before the least recently used
+    ones are unloaded. Override with ECHODRAFT_MODEL_MEMORY_MB; by default a
+    quarter of physical memory, at least 1 GB.
+    """
+    memory = total_memory_bytes()
+    default_mb = max(1024, memory // 4 // 1024**2) if memory else 2048
+    return max(1, _env_int("ECHODRAFT_MODEL_MEMORY_MB", default_mb)) * 1024**2
 
 
 def ensure_output_dir() -> Path:
@@ -73,9 +265,8 @@ def get_whisper_model_dir() -> Path:
     """
     Resolve local Whisper model directory.
     """
-    env_dir = None
-    # 将来如果需要支持自定义模型路径，可以通过环境变量 WHISPER_MODEL_DIR 扩展
-    # 这里先固定为 DEFAULT_WHISPER_MODEL_DIR，保证行为简单稳定。
+    # 可以通过环境变量 WHISPER_MODEL_DIR 指定自定义模型路径
+    env_dir = os.environ.get("WHISPER_MODEL_DIR")
     if env_dir:
         model_dir = Path(env_dir).expanduser()
     else:
@@ -88,3 +279,24 @@ def get_whisper_model_dir() -> Path:
             "参考 README.md 中的模型下载说明。"
         )
     return model_dir
+
+
+def use_output_dir(path: Path, keep_cache: bool = True) -> None:
+    """
+    Write results to path from now on. keep_cache leaves the caches (transcript
+    cache, search index, tuning profile) where they were, e.g. on local disk
+    when path is a network share, where SQLite locking is unreliable.
+    """
+    global OUTPUT_DIR, _cache_root
+    if keep_cache and _cache_root is None:
+        _cache_root = get_cache_dir()
+    OUTPUT_DIR = Path(path)
+
+
+def get_cache_dir() -> Path:
+    """
+    Directory for persistent caches, kept inside the output directory.
+    """
+    cache_dir = _cache_root or ensure_output_dir() / ".cache"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
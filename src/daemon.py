@@ -0,0 +1,379 @@
+import asyncio
+import itertools
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from audio_utils import probe_audio, validate_audio_file
+from config import get_cache_dir
+
+# Finished jobs kept around for status queries
+MAX_FINISHED_JOBS = 200
+_CONNECT_TIMEOUT = 0.5
+
+
+def get_socket_path() -> Path:
+    """
+    Unix socket path of the daemon; override with ECHODRAFT_DAEMON_SOCKET.
+    """
+    env_path = os.environ.get("ECHODRAFT_DAEMON_SOCKET")
+    if env_path:
+        return Path(env_path).expanduser()
+    return get_cache_dir() / "daemon.sock"
+
+
+class Job:
+    """
+    One transcription request and its live state on the server.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, audio_path: Path, use_cache: bool, batch_size: int = 0) -> None:
+        self.id = f"{int(time.time())}-{next(self._ids)}"
+        self.audio_path = audio_path
+        self.use_cache = use_cache
+        self.batch_size = batch_size
+        self.state = "queued"  # queued / running / done / failed
+        self.progress = 0.0
+        self.language = ""
+        self.error: Optional[str] = None
+        self.out_path: Optional[str] = None
+        # Lines of a running job for streaming clients; dropped when it
+        # finishes (the transcript file has them) so finished jobs stay small
+        self.lines: List[str] = []
+        self.segment_count = 0
+        self.submitted_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "failed")
+
+    def touch(self) -> None:
+        """Wake up everything waiting for a change; must run on the loop."""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def changed_event(self) -> asyncio.Event:
+        """Event set on the next change after this call."""
+        return self._changed
+
+    def saved_lines(self) -> List[str]:
+        """Lines of the saved transcript of a finished job."""
+        if not self.out_path:
+            return []
+        try:
+            return Path(self.out_path).read_text(encoding="utf-8").splitlines()
+        except OSError:
+            return []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "path": str(self.audio_path),
+            "state": self.state,
+            "progress": round(self.progress, 1),
+            "language": self.language,
+            "segments": self.segment_count,
+            "error": self.error,
+            "out_path": self.out_path,
+            "submitted_at": self.submitted_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class TranscriptionServer:
+    """
+    asyncio server with a job queue drained by a bounded number of runners.
+    Each runner transcribes in a worker thread against the shared warm model.
+
+    Clients speak newline-delimited JSON over a Unix socket, one request per
+    connection:
+
+        {"op": "ping"}
+        {"op": "submit", "path": "/abs/file.m4a", "use_cache": true, "batch_size": 0}
+        {"op": "status", "job_id": "..."}    (omit job_id to list all jobs)
+        {"op": "stream", "job_id": "..."}    segment/progress events, then done
+    """
+
+    def __init__(self, socket_path: Path, concurrency: int = 1) -> None:
+        self.socket_path = socket_path
+        self.concurrency = max(1, concurrency)
+        self.jobs: Dict[str, Job] = {}
+        self.queue: "asyncio.Queue[Job]" = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency)
+
+    def _run_job(self, job: Job, loop: asyncio.AbstractEventLoop) -> None:
+        """Worker thread: transcribe, write the transcript, report to the loop."""
+        from export import TranscriptWriter
+        from whisper_local import format_segment, transcribe_segments
+
+        def update(**fields) -> None:
+            def apply() -> None:
+                line = fields.pop("line", None)
+                if line is not None:
+                    job.lines.append(line)
+                    job.segment_count += 1
+                for name, value in fields.items():
+                    setattr(job, name, value)
+                job.touch()
+
+            loop.call_soon_threadsafe(apply)
+
+        def progress_callback(progress: float, language: str) -> None:
+            update(progress=progress, language=language)
+
+        segments, language = transcribe_segments(
+            job.audio_path,
+            progress_callback=progress_callback,
+            use_cache=job.use_cache,
+            batch_size=job.batch_size,
+        )
+        update(language=language)
+        with TranscriptWriter(job.audio_path) as writer:
+            for segment in segments:
+                line = format_segment(segment)
+                writer.write_line(line)
+                update(line=line)
+        update(out_path=str(writer.path))
+
+    async def _runner(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            job.state = "running"
+            job.touch()
+            try:
+                await loop.run_in_executor(self.executor, self._run_job, job, loop)
+                job.state = "done"
+                job.progress = 100.0
+            except Exception as exc:
+                job.state = "failed"
+                job.error = str(exc)
+            job.finished_at = time.time()
+            job.lines = []
+            job.touch()
+            self.queue.task_done()
+            self._prune()
+
+    def _prune(self) -> None:
+        finished = [j for j in self.jobs.values() if j.finished]
+        finished.sort(key=lambda j: j.finished_at or 0)
+        for job in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job.id]
+
+    async def _send(self, writer: asyncio.StreamWriter, payload: Dict[str, Any]) -> None:
+        writer.write((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+        await writer.drain()
+
+    async def _stream(self, writer: asyncio.StreamWriter, job: Job) -> None:
+        sent = 0
+        while True:
+            changed = job.changed_event()
+            if job.finished:
+                break
+            while sent < len(job.lines):
+                await self._send(writer, {"event": "segment", "line": job.lines[sent]})
+                sent += 1
+            await self._send(
+                writer,
+                {"event": "progress", "progress": round(job.progress, 1), "language": job.language},
+            )
+            await changed.wait()
+        # The rest (or all, for a client that attached late) comes from the file
+        for line in (await asyncio.to_thread(job.saved_lines))[sent:]:
+            await self._send(writer, {"event": "segment", "line": line})
+        await self._send(writer, {"event": "done", "job": job.to_dict()})
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = json.loads(await reader.readline())
+            op = request.get("op")
+            if op == "ping":
+                await self._send(writer, {"ok": True, "pid": os.getpid()})
+            elif op == "submit":
+                audio_path = validate_audio_file(request.get("path", ""))
+                probe_audio(audio_path)  # Reject empty or corrupt files at submit time
+                job = Job(
+                    audio_path,
+                    bool(request.get("use_cache", True)),
+                    int(request.get("batch_size", 0)),
+                )
+                self.jobs[job.id] = job
+                await self.queue.put(job)
+                await self._send(writer, {"ok": True, "job_id": job.id})
+            elif op == "status":
+                job_id = request.get("job_id")
+                if job_id:
+                    job = self.jobs.get(job_id)
+                    if job is None:
+                        raise ValueError(f"任务不存在：{job_id}")
+                    await self._send(writer, {"ok": True, "job": job.to_dict()})
+                else:
+                    jobs = [j.to_dict() for j in self.jobs.values()]
+                    await self._send(writer, {"ok": True, "jobs": jobs})
+            elif op == "stream":
+                job = self.jobs.get(request.get("job_id", ""))
+                if job is None:
+                    raise ValueError(f"任务不存在：{request.get('job_id')}")
+                await self._stream(writer, job)
+            else:
+                raise ValueError(f"未知请求：{op}")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as exc:
+            try:
+                await self._send(writer, {"ok": False, "error": str(exc)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        if self.socket_path.exists():
+            if is_daemon_running(self.socket_path):
+                raise RuntimeError(f"守护进程已在运行：{self.socket_path}")
+            self.socket_path.unlink()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+        server = await asyncio.start_unix_server(self._handle, path=str(self.socket_path))
+        runners = [asyncio.create_task(self._runner()) for _ in range(self.concurrency)]
+        print(f"转写守护进程已启动：{self.socket_path}（并发 {self.concurrency}）", flush=True)
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            for task in runners:
+                task.cancel()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+
+def run_daemon(concurrency: int = 1) -> None:
+    """
+    Load and warm up the model, then serve jobs until interrupted.
+    """
+    from whisper_local import configure_model, preload_model
+
+    configure_model(num_workers=concurrency)
+    print("正在加载模型...", flush=True)
+    preload_model()
+    server = TranscriptionServer(get_socket_path(), concurrency=concurrency)
+    asyncio.run(server.serve())
+    print("\n守护进程已停止")
+
+
+# Client helpers below only use the standard library, so submitting a job
+# does not import faster_whisper.
+
+
+def _request(payload: Dict[str, Any], socket_path: Optional[Path] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Send one request and yield the JSON replies until the server closes.
+    """
+    path = socket_path or get_socket_path()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(_CONNECT_TIMEOUT)
+    try:
+        sock.connect(str(path))
+        sock.settimeout(None)
+        sock.sendall((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+        with sock.makefile("r", encoding="utf-8") as f:
+            for line in f:
+                reply = json.loads(line)
+                if reply.get("ok") is False:
+                    raise RuntimeError(reply.get("error", "守护进程返回错误"))
+                yield reply
+    finally:
+        sock.close()
+
+
+def is_daemon_running(socket_path: Optional[Path] = None) -> bool:
+    """
+    Return True if a daemon answers on the socket.
+    """
+    path = socket_path or get_socket_path()
+    if not hasattr(socket, "AF_UNIX") or not path.exists():
+        return False
+    try:
+        return any(reply.get("ok") for reply in _request({"op": "ping"}, path))
+    except (OSError, ValueError, RuntimeError):
+        return False
+
+
+def submit_job(audio_path: Path, use_cache: bool = True, batch_size: int = 0) -> str:
+    """
+    Queue a transcription on the daemon and return its job id.
+    """
+    payload = {
+        "op": "submit",
+        "path": str(Path(audio_path).resolve()),
+        "use_cache": use_cache,
+        "batch_size": batch_size,
+    }
+    for reply in _request(payload):
+        return reply["job_id"]
+    raise RuntimeError("守护进程没有返回任务编号")
+
+
+def job_status(job_id: Optional[str] = None) -> Any:
+    """
+    Return one job's status dict, or a list of all jobs when job_id is None.
+    """
+    for reply in _request({"op": "status", "job_id": job_id}):
+        return reply.get("job") if job_id else reply.get("jobs")
+    return None
+
+
+def stream_job(job_id: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield "segment" / "progress" events for a job, ending with "done".
+    """
+    return _request({"op": "stream", "job_id": job_id})
+
+
+def run_client(audio_file: str, use_cache: bool = True, batch_size: int = 0) -> None:
+    """
+    CLI entry when a daemon is running: submit the file and print segments
+    as the daemon produces them. Mirrors run_cli's output.
+    """
+    try:
+        audio_path = validate_audio_file(audio_file)
+        print(f"音频文件：{audio_path}")
+        print("已提交到转写守护进程，请稍候...")
+        job_id = submit_job(audio_path, use_cache=use_cache, batch_size=batch_size)
+
+        print("\n=== 转写全文 ===\n")
+        job: Dict[str, Any] = {}
+        for event in stream_job(job_id):
+            if event["event"] == "segment":
+                print(event["line"], flush=True)
+            elif event["event"] == "done":
+                job = event["job"]
+
+        if job.get("state") != "done":
+            raise RuntimeError(job.get("error") or "守护进程转写失败")
+        if not job.get("segments"):
+            print("(转写结果为空)")
+        print("\n转写完成，结果已保存：")
+        print(f"  transcript: {job.get('out_path')}")
+
+    except Exception as exc:
+        print(f"\n发生错误：{exc}", file=sys.stderr)
+        sys.exit(1)
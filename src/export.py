@@ -0,0 +1,341 @@
+import json
+import os
+import sys
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
+
+from config import ensure_output_dir
+from search_index import update_index
+from segment_store import SegmentStore
+from whisper_local import Segment, format_segment, lookup_cached_rows
+
+EXPORT_FORMATS = ("md", "srt", "vtt", "json", "txt")
+# Markdown keeps the historical <stem>_transcript.md name
+_SUFFIXES = {
+    "md": "_transcript.md",
+    "srt": ".srt",
+    "vtt": ".vtt",
+    "json": "_transcript.json",
+    "txt": ".txt",
+}
+# Outputs are written under this extra suffix and renamed into place when
+# complete, so a file under its final name is never a partial result
+_PARTIAL_SUFFIX = ".partial"
+
+
+def export_path(audio_path: Path, fmt: str) -> Path:
+    return ensure_output_dir() / f"{audio_path.stem}{_SUFFIXES[fmt]}"
+
+
+def _partial_path(path: Path) -> Path:
+    return path.with_name(path.name + _PARTIAL_SUFFIX)
+
+
+def parse_formats(value: str) -> List[str]:
+    formats = [f.strip().lower().lstrip(".") for f in value.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in EXPORT_FORMATS]
+    if unknown:
+        raise ValueError(f"不支持的导出格式：{', '.join(unknown)}，可选：{', '.join(EXPORT_FORMATS)}")
+    return formats or ["md"]
+
+
+def transcript_path(audio_path: Path) -> Path:
+    """
+    Return the markdown transcript path for an audio file in the output dir.
+    """
+    return export_path(audio_path, "md")
+
+
+def save_transcript(audio_path: Path, transcript: str) -> Path:
+    """
+    Write transcript to a markdown file and return its path.
+    In app mode: saves to ~/Documents/EchoDraft/
+    In dev mode: saves to output/ directory.
+    """
+    out_path = transcript_path(audio_path)
+    partial = _partial_path(out_path)
+    partial.write_text(transcript, encoding="utf-8")
+    os.replace(partial, out_path)
+    update_index(out_path, audio_path, source=out_path)
+    return out_path
+
+
+class TranscriptWriter:
+    """
+    Incrementally write transcript lines to the same markdown file that
+    save_transcript produces, flushing after every line so partial results
+    are on disk (as <name>.partial) while transcription is still running.
+    close() moves the finished transcript into place and indexes it;
+    abort(), or leaving the with-block on an exception, drops it instead
+    (the segment journal keeps the segments for a resume).
+    """
+
+    def __init__(self, audio_path: Path) -> None:
+        self.audio_path = audio_path
+        self.path = transcript_path(audio_path)
+        self.line_count = 0
+        self._partial = _partial_path(self.path)
+        self._file = self._partial.open("w", encoding="utf-8")
+
+    def write_line(self, line: str) -> None:
+        if self.line_count:
+            self._file.write("\n")
+        self._file.write(line)
+        self._file.flush()
+        self.line_count += 1
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._file.close()
+        os.replace(self._partial, self.path)
+        update_index(self.path, self.audio_path, source=self.path)
+
+    def abort(self) -> None:
+        if self._file.closed:
+            return
+        self._file.close()
+        self._partial.unlink(missing_ok=True)
+
+    def __enter__(self) -> "TranscriptWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _clock(seconds: float, separator: str) -> str:
+    millis = int(round(max(0.0, seconds) * 1000))
+    h, rest = divmod(millis, 3_600_000)
+    m, rest = divmod(rest, 60_000)
+    s, ms = divmod(rest, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{separator}{ms:03d}"
+
+
+class _FormatWriter(ABC):
+    def __init__(self, f: TextIO, language: str, audio_path: Path) -> None:
+        self.f = f
+        self.language = language
+        self.audio_path = audio_path
+        self.count = 0  # segments written so far
+
+    @abstractmethod
+    def write(self, segment: Segment) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class _MarkdownWriter(_FormatWriter):
+    # Same layout as save_transcript: one line per segment, no trailing newline
+    def write(self, segment: Segment) -> None:
+        if self.count:
+            self.f.write("\n")
+        self.f.write(format_segment(segment))
+
+
+class _SrtWriter(_FormatWriter):
+    def write(self, segment: Segment) -> None:
+        start, end = _clock(segment.start, ","), _clock(segment.end, ",")
+        self.f.write(f"{self.count + 1}\n{start} --> {end}\n{segment.text}\n\n")
+
+
+class _VttWriter(_FormatWriter):
+    def __init__(self, f: TextIO, language: str, audio_path: Path) -> None:
+        super().__init__(f, language, audio_path)
+        f.write("WEBVTT\n\n")
+
+    def write(self, segment: Segment) -> None:
+        start, end = _clock(segment.start, "."), _clock(segment.end, ".")
+        self.f.write(f"{start} --> {end}\n{segment.text}\n\n")
+
+
+class _JsonWriter(_FormatWriter):
+    # The source audio is recorded so --export can rebuild other formats from
+    # this file alone, whatever it has been renamed to
+    def __init__(self, f: TextIO, language: str, audio_path: Path) -> None:
+        super().__init__(f, language, audio_path)
+        language = json.dumps(self.language)
+        audio = json.dumps(str(Path(self.audio_path).resolve()), ensure_ascii=False)
+        f.write('{"language": %s, "audio_path": %s, "segments": [' % (language, audio))
+
+    def write(self, segment: Segment) -> None:
+        record = {
+            "start": round(segment.start, 3),
+            "end": round(segment.end, 3),
+            "text": segment.text,
+            "avg_logprob": round(segment.avg_logprob, 4),
+            "no_speech_prob": round(segment.no_speech_prob, 4),
+        }
+        self.f.write(("\n  " if not self.count else ",\n  ") + json.dumps(record, ensure_ascii=False))
+
+    def close(self) -> None:
+        self.f.write("\n]}\n")
+
+
+class _TextWriter(_FormatWriter):
+    def write(self, segment: Segment) -> None:
+        self.f.write(segment.text + "\n")
+
+
+_WRITERS = {
+    "md": _MarkdownWriter,
+    "srt": _SrtWriter,
+    "vtt": _VttWriter,
+    "json": _JsonWriter,
+    "txt": _TextWriter,
+}
+
+
+class MultiFormatWriter:
+    """
+    Streaming writer for several output formats at once: each segment is
+    written to every open file as it arrives and flushed, so partial output
+    is on disk while transcription is still running (like
+    TranscriptWriter, whose Markdown output the "md" format matches, and
+    with the same close() and abort()).
+    """
+
+    def __init__(self, audio_path: Path, formats: Iterable[str], language: str = "unknown") -> None:
+        self.audio_path = audio_path
+        self.paths: Dict[str, Path] = {}
+        self.line_count = 0
+        self._writers: List[_FormatWriter] = []
+        self._closed = False
+        try:
+            for fmt in dict.fromkeys(formats):
+                path = export_path(audio_path, fmt)
+                f = _partial_path(path).open("w", encoding="utf-8")
+                self.paths[fmt] = path
+                self._writers.append(_WRITERS[fmt](f, language, audio_path))
+        except BaseException:
+            self.abort()
+            raise
+
+    @property
+    def path(self) -> Path:
+        return next(iter(self.paths.values()))
+
+    def write(self, segment: Segment) -> None:
+        for writer in self._writers:
+            writer.write(segment)
+            writer.count += 1
+            writer.f.flush()
+        self.line_count += 1
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for writer in self._writers:
+            writer.close()
+            writer.f.close()
+        for path in self.paths.values():
+            os.replace(_partial_path(path), path)
+        if "md" in self.paths:
+            source = self.paths.get("json", self.paths["md"])
+            update_index(self.paths["md"], self.audio_path, source=source)
+
+    def abort(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for writer in self._writers:
+            writer.f.close()
+        for path in self.paths.values():
+            _partial_path(path).unlink(missing_ok=True)
+
+    def __enter__(self) -> "MultiFormatWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_formats(
+    store: SegmentStore, audio_path: Path, formats: Iterable[str]
+) -> Dict[str, Path]:
+    """
+    Write every requested format from a segment store in a single pass.
+    """
+    with MultiFormatWriter(audio_path, formats, store.language) as writer:
+        for segment in store:
+            writer.write(segment)
+    return writer.paths
+
+
+def _read_json_export(path: Path) -> Tuple[SegmentStore, Optional[Path]]:
+    """
+    Segments and source audio path of a JSON export; the audio path is None
+    for exports written before it was recorded.
+    """
+    data = json.loads(path.read_text(encoding="utf-8"))
+    audio_path = Path(data["audio_path"]) if data.get("audio_path") else None
+    store = SegmentStore(data.get("language", "unknown"))
+    for item in data.get("segments", []):
+        store.append(
+            Segment(
+                item["start"],
+                item["end"],
+                item["text"],
+                item.get("avg_logprob", 0.0),
+                item.get("no_speech_prob", 0.0),
+            )
+        )
+    return store, audio_path
+
+
+def load_store(path: Path) -> SegmentStore:
+    """
+    Read a <stem>_transcript.json export back into a SegmentStore.
+    """
+    return _read_json_export(path)[0]
+
+
+def find_segments(audio_path: Path) -> Optional[SegmentStore]:
+    """
+    Segments of an earlier transcription without re-running the model: the
+    JSON export if one exists, otherwise the transcript cache entry for the
+    current model settings.
+    """
+    json_path = export_path(audio_path, "json")
+    if json_path.is_file():
+        return load_store(json_path)
+
+    hit = lookup_cached_rows(audio_path)
+    if hit is None:
+        return None
+    language, rows = hit
+    return SegmentStore.from_rows(rows, language)
+
+
+def run_export_cli(audio_file: str, formats: List[str]) -> None:
+    """
+    CLI entry for --export: write the requested formats for an already
+    transcribed file.
+    """
+    try:
+        source = Path(audio_file).expanduser()
+        suffix = _SUFFIXES["json"]
+        if source.name.endswith(suffix):
+            store, audio_path = _read_json_export(source)
+            if audio_path is None:
+                audio_path = source.with_name(source.name[: -len(suffix)])
+        else:
+            store = find_segments(source)
+            audio_path = source
+        if store is None:
+            raise ValueError(f"没有找到 {source.name} 的转写结果，请先转写")
+        for fmt, path in write_formats(store, audio_path, formats).items():
+            print(f"  {fmt}: {path}")
+    except Exception as exc:
+        print(f"发生错误：{exc}", file=sys.stderr)
+        sys.exit(1)
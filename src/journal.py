@@ -0,0 +1,118 @@
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from config import ensure_output_dir
+from transcript_cache import SegmentRow
+
+JOURNAL_VERSION = 1
+
+
+def journal_path(audio_path: Path) -> Path:
+    """
+    Append-only segment journal kept next to the transcript in the output dir.
+    """
+    return ensure_output_dir() / f"{audio_path.stem}_transcript.journal"
+
+
+class TranscriptJournal:
+    """
+    Durable record of the segments decoded so far for one audio file.
+
+    The file is a header line identifying the audio and decode settings (the
+    transcript cache key) and the detected language, followed by one
+    [start, end, text, ...] row per finished segment, each flushed and fsynced as
+    it is written. If a run dies, the next run with the same key reads the
+    committed rows back and continues from resume_at in the same language; a
+    journal for a different key is discarded. A torn last line from a crash
+    is dropped.
+    """
+
+    def __init__(self, audio_path: Path, key: str, resume: bool = True) -> None:
+        self.path = journal_path(audio_path)
+        self.key = key
+        self.language: Optional[str] = None
+        self.rows: List[SegmentRow] = self._load() if resume else []
+        self._file = None
+
+    @property
+    def resume_at(self) -> float:
+        """End time of the last committed segment, 0.0 for a fresh run."""
+        return self.rows[-1][1] if self.rows else 0.0
+
+    def _load(self) -> List[SegmentRow]:
+        try:
+            f = self.path.open("r", encoding="utf-8")
+        except OSError:
+            return []
+        rows: List[SegmentRow] = []
+        with f:
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                return []
+            if header.get("version") != JOURNAL_VERSION or header.get("key") != self.key:
+                return []
+            self.language = header.get("language")
+            for line in f:
+                try:
+                    rows.append(tuple(json.loads(line)))
+                except ValueError:
+                    break  # Torn write at the end of the file
+        return rows
+
+    def start(self, language: str) -> None:
+        """
+        Begin appending. The committed prefix is rewritten first so a torn
+        tail never stays in the file.
+        """
+        self.language = language
+        header = {"version": JOURNAL_VERSION, "key": self.key, "language": language}
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            f.write(json.dumps(header) + "\n")
+            for row in self.rows:
+                f.write(json.dumps(list(row), ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+        self._file = self.path.open("a", encoding="utf-8")
+
+    def add(self, row: SegmentRow) -> None:
+        if self._file is None:
+            return
+        try:
+            self._file.write(json.dumps(list(row), ensure_ascii=False) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError:
+            # Disk full or similar: stop checkpointing, keep transcribing
+            self._file = None
+
+    def record(self, rows: Iterable[SegmentRow]) -> Iterator[SegmentRow]:
+        """Pass rows through, committing each one before it is yielded."""
+        for row in rows:
+            self.add(row)
+            yield row
+
+    def close(self, completed: bool = False) -> None:
+        """
+        Close the journal; a completed transcription no longer needs it.
+        """
+        if self._file is not None:
+            self._file.close()
+        if completed:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+
+def open_journal(audio_path: Path, key: str, resume: bool = True) -> Optional[TranscriptJournal]:
+    """
+    Load the journal for audio_path, or None if the output dir is not usable
+    (checkpointing is best effort and never fails a transcription).
+    """
+    try:
+        return TranscriptJournal(audio_path, key, resume=resume)
+    except OSError:
+        return None
@@ -0,0 +1,148 @@
+import json
+import statistics
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+from config import ensure_output_dir
+
+
+class ProgressInfo(NamedTuple):
+    progress: float  # percent of audio processed
+    language: str
+    audio_done: float  # seconds of audio processed so far
+    audio_duration: float  # total seconds of audio (0 if unknown)
+    elapsed: float  # wall seconds since the job started
+    speed: float  # audio seconds per wall second while decoding (1 / RTF)
+    eta: Optional[float]  # estimated wall seconds remaining, None if unknown
+    refined: int = 0  # draft segments re-decoded so far in refine mode
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """
+    Format a duration as M:SS or H:MM:SS; '--' when unknown.
+    """
+    if seconds is None:
+        return "--"
+    total = int(round(seconds))
+    h, rest = divmod(total, 3600)
+    m, s = divmod(rest, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+
+
+def metrics_path(audio_path: Path) -> Path:
+    """
+    JSON-lines metrics file kept next to the transcript in the output dir.
+    """
+    return ensure_output_dir() / f"{audio_path.stem}_metrics.jsonl"
+
+
+class JobMetrics:
+    """
+    Per-job timing collector.
+
+    Stages are timed with the stage() context manager: model_load, decode,
+    vad (parallel mode), prepare (work faster-whisper does before the first
+    segment: VAD, feature extraction and language detection) and inference
+    (encoder + decoder time spent producing each segment).
+    """
+
+    def __init__(self, audio_path: Path) -> None:
+        self.audio_path = audio_path
+        self.started = time.perf_counter()
+        self.timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.stages: Dict[str, float] = {}
+        self.segment_times: List[float] = []
+        self.audio_duration = 0.0
+        self.audio_done = 0.0
+        self.language = "unknown"
+        self.cache_hit = False
+        self.refined_segments = 0
+        self.model: Optional[str] = None  # model directory name
+        self.escalated = False  # redone with a larger model (model "auto")
+        self.first_segment_at: Optional[float] = None
+        self._inference_started: Optional[float] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def start_inference(self) -> None:
+        if self._inference_started is None:
+            self._inference_started = time.perf_counter()
+
+    def record_segment(self, seconds: float, audio_end: float) -> None:
+        """Record the time spent producing one segment that ends at audio_end."""
+        if self.first_segment_at is None:
+            self.first_segment_at = time.perf_counter() - self.started
+        self.segment_times.append(seconds)
+        stage = "cache_read" if self.cache_hit else "inference"
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        self.audio_done = max(self.audio_done, audio_end)
+
+    def progress(self) -> ProgressInfo:
+        """Current progress with a running speed and ETA estimate."""
+        now = time.perf_counter()
+        elapsed = now - self.started
+        decoding = now - (self._inference_started or self.started)
+        speed = self.audio_done / decoding if decoding > 0 else 0.0
+
+        duration = self.audio_duration
+        if duration > 0:
+            progress = min(100.0, self.audio_done / duration * 100)
+            eta = max(0.0, duration - self.audio_done) / speed if speed > 0 else None
+        else:
+            progress, eta = 0.0, None
+        return ProgressInfo(
+            progress,
+            self.language,
+            self.audio_done,
+            duration,
+            elapsed,
+            speed,
+            eta,
+            self.refined_segments,
+        )
+
+    def to_record(self, status: str) -> Dict[str, Any]:
+        wall = time.perf_counter() - self.started
+        record: Dict[str, Any] = {
+            "timestamp": self.timestamp,
+            "audio_path": str(self.audio_path),
+            "status": status,
+            "cache_hit": self.cache_hit,
+            "language": self.language,
+            "audio_duration": round(self.audio_duration, 3),
+            "audio_done": round(self.audio_done, 3),
+            "wall_time": round(wall, 3),
+            "rtf": round(wall / self.audio_duration, 4) if self.audio_duration > 0 else None,
+            "first_segment_latency": (
+                round(self.first_segment_at, 3) if self.first_segment_at is not None else None
+            ),
+            "stages": {name: round(value, 3) for name, value in self.stages.items()},
+            "segments": len(self.segment_times),
+            "refined_segments": self.refined_segments,
+            "model": self.model,
+            "escalated": self.escalated,
+        }
+        if self.segment_times:
+            times = sorted(self.segment_times)
+            record["segment_time"] = {
+                "mean": round(statistics.fmean(times), 4),
+                "p50": round(times[len(times) // 2], 4),
+                "p95": round(times[min(len(times) - 1, int(len(times) * 0.95))], 4),
+                "max": round(times[-1], 4),
+            }
+        return record
+
+    def write(self, status: str = "ok", path: Optional[Path] = None) -> Path:
+        """Append this job's record to the metrics JSON-lines file."""
+        path = path or metrics_path(self.audio_path)
+        with path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(self.to_record(status), ensure_ascii=False) + "\n")
+        return path
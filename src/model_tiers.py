@@ -0,0 +1,141 @@
+import re
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from config import WHISPER_MODELS_DIR, get_whisper_model_dir
+
+# Whisper sizes, smallest first; a model directory's tier is the first of
+# these words in its name (tiny-int8, small, medium.en, large-v3, ...)
+TIERS = ("tiny", "base", "small", "medium", "large")
+_TIER_RE = re.compile(r"(?<![a-z])(" + "|".join(TIERS) + r")(?![a-z])")
+# "auto" routes recordings shorter than this to the smallest model
+SHORT_CLIP_SECONDS = 60.0
+# An "auto" result whose mean avg_logprob is below this is transcribed again
+# with a larger model: the whole of a short clip is judged, and the first
+# ESCALATE_PROBE_SECONDS of a longer recording
+ESCALATE_LOGPROB = -0.8
+ESCALATE_PROBE_SECONDS = 60.0
+# Largest size "auto" escalates to; large models are too slow on a CPU
+ESCALATE_MAX_TIER = "medium"
+# Audio the language-detection model listens to at the start of a recording
+LANGUAGE_PROBE_SECONDS = 120.0
+# Runtime memory beyond the weights: decoder caches, beams, feature buffers
+MODEL_OVERHEAD_BYTES = 200 * 1024**2
+
+
+class ModelInfo(NamedTuple):
+    name: str
+    path: Path
+    tier: int  # index into TIERS; len(TIERS) when the name has no size
+    size_bytes: int  # weights on disk
+
+
+def model_tier(name: str) -> int:
+    match = _TIER_RE.search(name.lower())
+    return TIERS.index(match.group(1)) if match else len(TIERS)
+
+
+def discover_models(root: Optional[Path] = None) -> List[ModelInfo]:
+    """
+    CTranslate2 Whisper models (directories with a model.bin) under
+    models/whisper/, smallest first.
+    """
+    root = root or WHISPER_MODELS_DIR
+    models = []
+    try:
+        entries = list(root.iterdir())
+    except OSError:
+        return []
+    for path in entries:
+        weights = path / "model.bin"
+        if weights.is_file():
+            models.append(ModelInfo(path.name, path, model_tier(path.name), weights.stat().st_size))
+    return sorted(models, key=lambda m: (m.tier, m.size_bytes, m.name))
+
+
+def find_model(name: str) -> Path:
+    """
+    Resolve a model name: a directory under models/whisper/ (e.g.
+    medium-int8), a size (e.g. tiny: the smallest model of that size) or a
+    path to a model directory.
+    """
+    models = discover_models()
+    for model in models:
+        if model.name == name:
+            return model.path
+    if name in TIERS:
+        for model in models:
+            if model.tier == TIERS.index(name):
+                return model.path
+    path = Path(name).expanduser()
+    if (path / "model.bin").is_file():
+        return path
+    available = "、".join(m.name for m in models) or "无"
+    raise FileNotFoundError(f"找不到模型：{name}（models/whisper/ 下可用：{available}）")
+
+
+def estimate_model_bytes(model_dir: Path) -> int:
+    """
+    Rough resident size of a loaded model: its weights file plus runtime
+    overhead. Used to keep the loaded models under the memory budget.
+    """
+    try:
+        weights = (Path(model_dir) / "model.bin").stat().st_size
+    except OSError:
+        weights = 0
+    return weights + MODEL_OVERHEAD_BYTES
+
+
+def smaller_model(default: Path) -> Optional[Path]:
+    """
+    The smallest installed model when it is a smaller size than the default
+    model, else None.
+    """
+    models = discover_models()
+    if not models:
+        return None
+    smallest = models[0]
+    if smallest.path.resolve() == Path(default).resolve():
+        return None
+    if smallest.tier >= model_tier(Path(default).name):
+        return None
+    return smallest.path
+
+
+def larger_model(default: Path) -> Optional[Path]:
+    """
+    The smallest installed model of a larger size than the default model, up
+    to ESCALATE_MAX_TIER, else None.
+    """
+    default_tier = model_tier(Path(default).name)
+    max_tier = TIERS.index(ESCALATE_MAX_TIER)
+    for model in discover_models():
+        if default_tier < model.tier <= max_tier:
+            return model.path
+    return None
+
+
+def route_short_clip(duration: float, default: Path) -> Optional[Path]:
+    """
+    The "auto" policy for short clips: the smallest model for a clip shorter
+    than SHORT_CLIP_SECONDS when it is smaller than the default model, else
+    None (use the default model).
+    """
+    if not 0 < duration < SHORT_CLIP_SECONDS:
+        return None
+    return smaller_model(default)
+
+
+def print_models() -> None:
+    """CLI entry for --list-models."""
+    models = discover_models()
+    if not models:
+        print(f"{WHISPER_MODELS_DIR} 下没有找到模型。")
+        return
+    try:
+        default = get_whisper_model_dir().resolve()
+    except FileNotFoundError:
+        default = None
+    for model in models:
+        mark = "*" if model.path.resolve() == default else " "
+        print(f"{mark} {model.name:<20} {model.size_bytes / 1024**2:8.0f} MB  {model.path}")
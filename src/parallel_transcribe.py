@@ -0,0 +1,196 @@
+import multiprocessing as mp
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+from metrics import JobMetrics
+from whisper_local import (
+    SAMPLING_RATE,
+    TRANSCRIBE_OPTIONS,
+    ModelKey,
+    Row,
+    configure_model,
+    current_model_key,
+    decode_audio_file,
+    get_model,
+    transcribe_rows,
+)
+
+# Chunks shorter than this are not worth a separate process (model load,
+# language detection and decoder warm-up dominate).
+MIN_CHUNK_SECONDS = 120.0
+
+
+def plan_chunks(
+    speech: Sequence[Dict[str, int]], total_samples: int, n_chunks: int
+) -> List[Tuple[int, int]]:
+    """
+    Split [0, total_samples) into up to n_chunks (start, end) sample ranges of
+    roughly equal length, cutting only in the middle of silences between the
+    VAD speech regions so no word straddles a cut.
+    """
+    if n_chunks <= 1 or len(speech) < 2:
+        return [(0, total_samples)]
+
+    gaps = [
+        (speech[i]["end"] + speech[i + 1]["start"]) // 2 for i in range(len(speech) - 1)
+    ]
+    cuts: List[int] = []
+    last = 0
+    for k in range(1, n_chunks):
+        target = total_samples * k // n_chunks
+        candidates = [g for g in gaps if g > last]
+        if not candidates:
+            break
+        best = min(candidates, key=lambda g: abs(g - target))
+        cuts.append(best)
+        last = best
+
+    bounds = [0] + cuts + [total_samples]
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _init_worker(model_dir: str, compute_type: str, cpu_threads: int) -> None:
+    configure_model(model_dir=Path(model_dir), compute_type=compute_type, cpu_threads=cpu_threads)
+    get_model()
+
+
+def _read_chunk(shm_name: str, total_samples: int, start: int, end: int) -> np.ndarray:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        audio = np.ndarray((total_samples,), dtype=np.float32, buffer=shm.buf)
+        chunk = audio[start:end].copy()
+        del audio
+    finally:
+        shm.close()
+    return chunk
+
+
+def _detect_language(shm_name: str, total_samples: int, start: int, end: int) -> str:
+    """Worker: the language of the speech in samples [start, end)."""
+    chunk = _read_chunk(shm_name, total_samples, start, end)
+    vad_parameters = TRANSCRIBE_OPTIONS.get("vad_parameters") or {}
+    # detect_language, unlike transcribe, takes VadOptions only
+    language, _, _ = get_model().detect_language(
+        chunk, vad_filter=True, vad_parameters=VadOptions(**vad_parameters)
+    )
+    return language
+
+
+def _transcribe_chunk(
+    shm_name: str, total_samples: int, start: int, end: int, language: str
+) -> Tuple[str, List[Row]]:
+    """
+    Worker: transcribe samples [start, end) of the shared audio buffer in
+    the given language and return rows in absolute time.
+    """
+    chunk = _read_chunk(shm_name, total_samples, start, end)
+    language, rows = transcribe_rows(
+        chunk, offset=start / SAMPLING_RATE, options=dict(language=language)
+    )
+    return language, list(rows)
+
+
+def transcribe_rows_parallel(
+    audio_path: Path,
+    workers: int,
+    cpu_threads: Optional[int] = None,
+    progress_callback: Optional[Callable[[float, str], None]] = None,
+    metrics: Optional[JobMetrics] = None,
+    model_key: Optional[ModelKey] = None,
+) -> Tuple[str, Iterator[Row]]:
+    """
+    Transcribe one long recording by cutting it at VAD-detected silences and
+    decoding the chunks concurrently in a process pool.
+
+    The decoded audio is shared with the workers through shared memory, so
+    each worker only copies its own chunk. Returns (language, rows) like
+    whisper_local.transcribe_rows; the language (TRANSCRIBE_OPTIONS' or, by
+    default, the one detected on the first chunk before the others start)
+    is used for every chunk, and rows are yielded in order as soon as each
+    chunk and all chunks before it are done. The pool and the shared memory
+    are released when the rows are exhausted or closed, or when the
+    generator is dropped without being iterated.
+    """
+    if metrics is None:
+        metrics = JobMetrics(audio_path)
+    with metrics.stage("decode"):
+        audio = decode_audio_file(audio_path)
+    total = len(audio)
+    n_chunks = min(workers, max(1, int(total / SAMPLING_RATE // MIN_CHUNK_SECONDS)))
+
+    vad_parameters = TRANSCRIBE_OPTIONS.get("vad_parameters") or {}
+    with metrics.stage("vad"):
+        speech = get_speech_timestamps(audio, VadOptions(**vad_parameters))
+    chunks = plan_chunks(speech, total, n_chunks)
+    if len(chunks) == 1:
+        return transcribe_rows(
+            audio, progress_callback=progress_callback, metrics=metrics, model_key=model_key
+        )
+    metrics.audio_duration = total / SAMPLING_RATE
+
+    if cpu_threads is None:
+        cpu_threads = max(1, (os.cpu_count() or 1) // len(chunks))
+    # Workers use the job's model and compute type, with their share of cores
+    model_key = model_key or current_model_key()
+    metrics.model = Path(model_key.model_dir).name
+
+    shm = shared_memory.SharedMemory(create=True, size=audio.nbytes)
+    np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)[:] = audio
+    del audio
+
+    pool = ProcessPoolExecutor(
+        max_workers=len(chunks),
+        mp_context=mp.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_key.model_dir, model_key.compute_type, cpu_threads),
+    )
+
+    def cleanup() -> None:
+        pool.shutdown(wait=True, cancel_futures=True)
+        shm.close()
+        shm.unlink()
+
+    metrics.start_inference()
+    try:
+        # One language for every chunk: detected separately, chunks could
+        # each decode a mixed or ambiguous recording in a different one
+        language = TRANSCRIBE_OPTIONS.get("language")
+        if not language:
+            with metrics.stage("prepare"):
+                language = pool.submit(_detect_language, shm.name, total, *chunks[0]).result()
+        futures = [
+            pool.submit(_transcribe_chunk, shm.name, total, start, end, language)
+            for start, end in chunks
+        ]
+        with metrics.stage("inference"):
+            _, first_rows = futures[0].result()
+    except BaseException:
+        cleanup()
+        raise
+    metrics.language = language
+
+    def rows() -> Iterator[Row]:
+        # Cuts fall inside silences, so chunk outputs never overlap; yielding
+        # them in chunk order gives the transcript in absolute time.
+        try:
+            done_samples = 0
+            for i, future in enumerate(futures):
+                chunk_rows = first_rows if i == 0 else future.result()[1]
+                done_samples += chunks[i][1] - chunks[i][0]
+                yield from chunk_rows
+                if progress_callback:
+                    progress_callback(done_samples / total * 100, language)
+        finally:
+            release()
+
+    generator = rows()
+    # A generator that is never started never runs its finally block
+    release = weakref.finalize(generator, cleanup)
+    return language, generator
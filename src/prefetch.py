@@ -0,0 +1,111 @@
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List, NamedTuple, Optional
+
+from whisper_local import decode_audio_file
+
+if TYPE_CHECKING:
+    import numpy
+
+# Decoded audio held ahead of the model: 16 kHz float32 is ~3.7 MB per minute,
+# so the default fits a couple of long recordings or many short memos.
+DEFAULT_PREFETCH_BYTES = 512 * 1024 * 1024
+DEFAULT_PREFETCH_FILES = 2
+
+
+class DecodedAudio(NamedTuple):
+    path: Path
+    audio: Optional["numpy.ndarray"]  # None when skipped or decoding failed
+    error: Optional[Exception]
+
+
+class AudioPrefetcher:
+    """
+    Decodes audio files to 16 kHz float32 samples in a background thread, in
+    input order, while the caller transcribes earlier files.
+
+    At most max_files decoded files and max_bytes of samples are buffered;
+    the decoder thread waits once either limit is reached (a single file
+    larger than max_bytes is still decoded, but only when the buffer is
+    empty). Paths for which skip(path) returns True are passed through
+    without decoding, e.g. files already in the transcript cache.
+
+    paths is consumed lazily from the decoder thread, so it may be a blocking
+    source such as iter(task_queue.get, None).
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[Path],
+        max_files: int = DEFAULT_PREFETCH_FILES,
+        max_bytes: int = DEFAULT_PREFETCH_BYTES,
+        skip: Optional[Callable[[Path], bool]] = None,
+    ) -> None:
+        self.max_files = max(1, max_files)
+        self.max_bytes = max_bytes
+        self._paths = iter(paths)
+        self._skip = skip
+        self._ready: List[DecodedAudio] = []
+        self._buffered_bytes = 0
+        self._done = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="audio-prefetch", daemon=True)
+        self._thread.start()
+
+    def _has_room(self) -> bool:
+        if not self._ready:
+            return True
+        return len(self._ready) < self.max_files and self._buffered_bytes < self.max_bytes
+
+    def _run(self) -> None:
+        try:
+            for path in self._paths:
+                path = Path(path)
+                with self._cond:
+                    self._cond.wait_for(lambda: self._closed or self._has_room())
+                    if self._closed:
+                        return
+                try:
+                    if self._skip is not None and self._skip(path):
+                        item = DecodedAudio(path, None, None)
+                    else:
+                        item = DecodedAudio(path, decode_audio_file(path), None)
+                except Exception as exc:
+                    item = DecodedAudio(path, None, exc)
+                with self._cond:
+                    self._ready.append(item)
+                    if item.audio is not None:
+                        self._buffered_bytes += item.audio.nbytes
+                    self._cond.notify_all()
+        finally:
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    def __iter__(self) -> Iterator[DecodedAudio]:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._ready or self._done)
+                if not self._ready:
+                    return
+                item = self._ready.pop(0)
+                if item.audio is not None:
+                    self._buffered_bytes -= item.audio.nbytes
+                self._cond.notify_all()
+            yield item
+
+    def close(self) -> None:
+        """Stop decoding further files and drop anything buffered."""
+        with self._cond:
+            self._closed = True
+            self._ready.clear()
+            self._buffered_bytes = 0
+            self._cond.notify_all()
+
+    def __enter__(self) -> "AudioPrefetcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
@@ -0,0 +1,170 @@
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from config import ensure_output_dir
+
+PROFILE_MODES = ("sample", "cprofile")
+# Sampling interval of the stack sampler
+DEFAULT_INTERVAL = 0.005
+# Functions listed in the summary
+TOP_N = 30
+
+Stack = Tuple[str, ...]
+# Only one cProfile profiler can be active at a time on Python 3.12+, so
+# concurrent jobs (GUI queue) beyond the first are sampled instead
+_cprofile_lock = threading.Lock()
+
+
+def profile_path(audio_path: Path, suffix: str) -> Path:
+    """Profile outputs sit next to the transcript: <stem>_profile<suffix>."""
+    return ensure_output_dir() / f"{audio_path.stem}_profile{suffix}"
+
+
+class StackSampler:
+    """
+    Wall-clock sampler for one thread: every `interval` seconds it records
+    the thread's Python stack, weighted by the time since the previous
+    sample. Native calls (CTranslate2 generate, feature extraction in
+    numpy) show up as the Python frame that made them; when such a call
+    holds the GIL the next sample is late and carries the whole wait, so
+    time stays correctly attributed.
+    """
+
+    def __init__(
+        self, thread_id: Optional[int] = None, interval: float = DEFAULT_INTERVAL
+    ) -> None:
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks: Dict[Stack, float] = Counter()
+        self.samples = 0
+        self._labels: Dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            weight, last = now - last, now
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += weight
+            self.samples += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def write_folded(self, path: Path) -> None:
+        """
+        Collapsed stacks ("root;...;leaf microseconds" per line), the input
+        format of flamegraph.pl, speedscope and inferno.
+        """
+        with path.open("w", encoding="utf-8") as f:
+            for stack, seconds in sorted(self.stacks.items()):
+                micros = int(round(seconds * 1e6))
+                if micros:
+                    f.write(f"{';'.join(stack)} {micros}\n")
+
+    def summary(self, top: int = TOP_N) -> str:
+        total = sum(self.stacks.values()) or 1e-9
+        own: Dict[str, float] = Counter()
+        inclusive: Dict[str, float] = Counter()
+        for stack, seconds in self.stacks.items():
+            own[stack[-1]] += seconds
+            for label in set(stack):
+                inclusive[label] += seconds
+
+        lines = [f"采样 {self.samples} 次，间隔 {self.interval * 1000:.0f} ms，共 {total:.2f} s", ""]
+        for title, table in (("自身耗时", own), ("累计耗时（含调用）", inclusive)):
+            lines.append(f"== 前 {top} 项：{title} ==")
+            for label, seconds in sorted(table.items(), key=lambda item: -item[1])[:top]:
+                lines.append(f"{seconds:9.3f} s {seconds / total * 100:6.1f}%  {label}")
+            lines.append("")
+        return "\n".join(lines)
+
+
+class JobProfiler:
+    """
+    Profile the code run inside the with-block on the current thread and
+    write the results next to the transcript when it ends:
+
+    - "sample": StackSampler; <stem>_profile.folded (collapsed stacks for a
+      flame graph) and <stem>_profile.txt (top functions by self and total
+      time). Low overhead, so timings stay realistic.
+    - "cprofile": deterministic cProfile; <stem>_profile.prof (pstats, for
+      snakeviz and similar) and the top-N summary. Exact call counts, but
+      per-call overhead inflates Python-heavy code.
+
+    Only the profiling thread is covered: worker processes of --parallel
+    are not. A "cprofile" job started while another one runs is sampled.
+    """
+
+    def __init__(self, audio_path: Path, mode: str = "sample", top: int = TOP_N) -> None:
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"不支持的分析模式：{mode}，可选：{', '.join(PROFILE_MODES)}")
+        self.audio_path = audio_path
+        self.mode = mode
+        self.top = top
+        self.paths: Dict[str, Path] = {}
+        self._sampler: Optional[StackSampler] = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._started = 0.0
+
+    def __enter__(self) -> "JobProfiler":
+        self._started = time.perf_counter()
+        if self.mode == "cprofile" and not _cprofile_lock.acquire(blocking=False):
+            self.mode = "sample"
+        if self.mode == "sample":
+            self._sampler = StackSampler()
+            self._sampler.start()
+        else:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        wall = time.perf_counter() - self._started
+        header = f"{self.audio_path}\n模式 {self.mode}，总耗时 {wall:.2f} s\n"
+        summary_path = profile_path(self.audio_path, ".txt")
+        if self._sampler is not None:
+            self._sampler.stop()
+            folded_path = profile_path(self.audio_path, ".folded")
+            self._sampler.write_folded(folded_path)
+            summary = self._sampler.summary(self.top)
+            self.paths["folded"] = folded_path
+        else:
+            self._profile.disable()
+            _cprofile_lock.release()
+            prof_path = profile_path(self.audio_path, ".prof")
+            self._profile.dump_stats(str(prof_path))
+            out = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=out).strip_dirs()
+            stats.sort_stats("tottime").print_stats(self.top)
+            stats.sort_stats("cumulative").print_stats(self.top)
+            summary = out.getvalue()
+            self.paths["prof"] = prof_path
+        summary_path.write_text(header + "\n" + summary, encoding="utf-8")
+        self.paths["summary"] = summary_path
@@ -0,0 +1,300 @@
+import json
+import re
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from config import ensure_output_dir, get_cache_dir
+
+_INDEX_NAME = "search.sqlite3"
+_SCHEMA_VERSION = 1
+_TRANSCRIPT_SUFFIX = "_transcript.md"
+_JSON_SUFFIX = "_transcript.json"
+# One transcript line: [HH:MM:SS - HH:MM:SS] text
+_LINE_RE = re.compile(r"^\[(\d+):(\d{2}):(\d{2}) - (\d+):(\d{2}):(\d{2})\] ?(.*)$")
+# Han, kana and hangul: scripts written without spaces between words
+_CJK_RE = re.compile(
+    "([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff66-\uff9f])"
+)
+# Segment rowids are file_id << _ROWID_BITS | index, so a file's segments
+# form one rowid range that can be deleted without scanning the table
+_ROWID_BITS = 20
+_write_lock = threading.Lock()
+
+
+class SearchHit(NamedTuple):
+    transcript: str
+    audio_path: Optional[str]
+    start_ms: int
+    end_ms: int
+    text: str
+
+
+def get_index_path() -> Path:
+    return get_cache_dir() / _INDEX_NAME
+
+
+def cjk_tokens(text: str) -> str:
+    """
+    Put spaces around every CJK character so FTS5's unicode61 tokenizer
+    indexes each one as a token; a phrase query over consecutive characters
+    then matches any substring, including single- and two-character words.
+    Latin words are left intact.
+    """
+    return _CJK_RE.sub(r" \1 ", text)
+
+
+def build_query(query: str) -> str:
+    """
+    Turn user input into an FTS5 expression: every whitespace-separated term
+    becomes a quoted phrase (so CJK runs match in order and FTS5 syntax
+    characters are taken literally); terms are ANDed.
+    """
+    phrases = []
+    for term in query.split():
+        tokens = " ".join(cjk_tokens(term).split())
+        if tokens:
+            phrases.append('"' + tokens.replace('"', '""') + '"')
+    return " ".join(phrases)
+
+
+def _connect(path: Optional[Path] = None) -> sqlite3.Connection:
+    path = path or get_index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version != _SCHEMA_VERSION:
+        conn.executescript(
+            """
+            DROP TABLE IF EXISTS files;
+            DROP TABLE IF EXISTS segments;
+            CREATE TABLE files (
+                id INTEGER PRIMARY KEY,
+                transcript TEXT UNIQUE,
+                audio_path TEXT,
+                size INTEGER,
+                mtime_ns INTEGER
+            );
+            CREATE VIRTUAL TABLE segments USING fts5(
+                tokens,
+                text UNINDEXED,
+                start_ms UNINDEXED,
+                end_ms UNINDEXED,
+                tokenize = 'unicode61'
+            );
+            """
+        )
+        conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        conn.commit()
+    return conn
+
+
+def _parse_markdown(path: Path) -> Iterator[Tuple[int, int, str]]:
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            match = _LINE_RE.match(line.rstrip("\n"))
+            if not match:
+                continue
+            h1, m1, s1, h2, m2, s2, text = match.groups()
+            start = (int(h1) * 3600 + int(m1) * 60 + int(s1)) * 1000
+            end = (int(h2) * 3600 + int(m2) * 60 + int(s2)) * 1000
+            yield start, end, text
+
+
+def _parse_json(path: Path) -> Iterator[Tuple[int, int, str]]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    for item in data.get("segments", []):
+        yield int(round(item["start"] * 1000)), int(round(item["end"] * 1000)), item["text"]
+
+
+def transcript_segments(
+    transcript: Path, source: Optional[Path] = None
+) -> Iterable[Tuple[int, int, str]]:
+    """
+    Segments of a saved transcript in milliseconds. The Markdown only has
+    whole seconds, so the JSON export next to it is preferred when it is at
+    least as new as the Markdown (an older one is left from an earlier run).
+    source names the file to read instead: the Markdown or the JSON export
+    a writer has just produced.
+    """
+    if source is None:
+        stem = transcript.name[: -len(_TRANSCRIPT_SUFFIX)]
+        json_path = transcript.with_name(stem + _JSON_SUFFIX)
+        try:
+            if json_path.stat().st_mtime_ns >= transcript.stat().st_mtime_ns:
+                source = json_path
+        except OSError:
+            pass
+    if source is not None and Path(source).name.endswith(_JSON_SUFFIX):
+        try:
+            return list(_parse_json(Path(source)))
+        except (OSError, ValueError, KeyError):
+            pass
+    return list(_parse_markdown(transcript))
+
+
+def _delete_segments(conn: sqlite3.Connection, file_id: int) -> None:
+    conn.execute(
+        "DELETE FROM segments WHERE rowid >= ? AND rowid < ?",
+        (file_id << _ROWID_BITS, (file_id + 1) << _ROWID_BITS),
+    )
+
+
+def index_transcript(
+    transcript: Path,
+    audio_path: Optional[Path] = None,
+    conn: Optional[sqlite3.Connection] = None,
+    source: Optional[Path] = None,
+) -> int:
+    """
+    (Re)index one saved transcript; returns the number of segments indexed.
+    Unchanged files (same size and mtime) are skipped. source is passed to
+    transcript_segments.
+    """
+    transcript = Path(transcript).resolve()
+    st = transcript.stat()
+    own = conn is None
+    conn = conn or _connect()
+    try:
+        key = str(transcript)
+        row = conn.execute(
+            "SELECT id, size, mtime_ns, audio_path FROM files WHERE transcript = ?", (key,)
+        ).fetchone()
+        audio = str(Path(audio_path).resolve()) if audio_path else (row[3] if row else None)
+        if row and row[1:3] == (st.st_size, st.st_mtime_ns) and row[3] == audio:
+            return 0
+
+        segments = transcript_segments(transcript, source)[: 1 << _ROWID_BITS]
+        with _write_lock, conn:
+            if row:
+                file_id = row[0]
+                _delete_segments(conn, file_id)
+                conn.execute(
+                    "UPDATE files SET audio_path = ?, size = ?, mtime_ns = ? WHERE id = ?",
+                    (audio, st.st_size, st.st_mtime_ns, file_id),
+                )
+            else:
+                file_id = conn.execute(
+                    "INSERT INTO files (transcript, audio_path, size, mtime_ns) VALUES (?, ?, ?, ?)",
+                    (key, audio, st.st_size, st.st_mtime_ns),
+                ).lastrowid
+            base = file_id << _ROWID_BITS
+            conn.executemany(
+                "INSERT INTO segments (rowid, tokens, text, start_ms, end_ms) VALUES (?, ?, ?, ?, ?)",
+                (
+                    (base + i, cjk_tokens(text), text, start, end)
+                    for i, (start, end, text) in enumerate(segments)
+                ),
+            )
+        return len(segments)
+    finally:
+        if own:
+            conn.close()
+
+
+def update_index(
+    transcript: Path, audio_path: Optional[Path] = None, source: Optional[Path] = None
+) -> None:
+    """
+    Best-effort incremental update after a transcript is written; indexing
+    problems never fail the transcription itself. Writers pass the file they
+    just wrote as source, so an older JSON export next to it is not used.
+    """
+    try:
+        index_transcript(transcript, audio_path, source=source)
+    except (OSError, sqlite3.Error):
+        pass
+
+
+def refresh_index(output_dir: Optional[Path] = None, full: bool = False) -> Tuple[int, int]:
+    """
+    Re-scan the output dir: index new or changed transcripts and drop
+    entries whose files are gone; full=True rebuilds the index from scratch.
+    Returns (files, segments) indexed.
+    """
+    output_dir = output_dir or ensure_output_dir()
+    conn = _connect()
+    if full:
+        with _write_lock, conn:
+            conn.execute("DELETE FROM segments")
+            conn.execute("DELETE FROM files")
+    try:
+        files = segments = 0
+        present = set()
+        for transcript in sorted(output_dir.glob(f"*{_TRANSCRIPT_SUFFIX}")):
+            present.add(str(transcript.resolve()))
+            count = index_transcript(transcript, conn=conn)
+            if count:
+                files += 1
+                segments += count
+        known = conn.execute("SELECT id, transcript FROM files").fetchall()
+        with _write_lock, conn:
+            for file_id, key in known:
+                if key not in present and not Path(key).exists():
+                    _delete_segments(conn, file_id)
+                    conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+        return files, segments
+    finally:
+        conn.close()
+
+
+def search(query: str, limit: int = 50) -> List[SearchHit]:
+    """
+    Return the best matching segments for query, most relevant first.
+    """
+    expression = build_query(query)
+    if not expression:
+        return []
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            """
+            SELECT f.transcript, f.audio_path, s.start_ms, s.end_ms, s.text
+            FROM segments AS s JOIN files AS f ON f.id = s.rowid >> ?
+            WHERE segments MATCH ?
+            ORDER BY rank
+            LIMIT ?
+            """,
+            (_ROWID_BITS, expression, limit),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [SearchHit(r[0], r[1], int(r[2]), int(r[3]), r[4]) for r in rows]
+
+
+def format_ms(ms: int) -> str:
+    """Format milliseconds as HH:MM:SS.mmm."""
+    seconds, millis = divmod(int(ms), 1000)
+    h, rest = divmod(seconds, 3600)
+    m, s = divmod(rest, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}.{millis:03d}"
+
+
+def run_search_cli(query: str, limit: int = 50, reindex: bool = False) -> None:
+    """
+    CLI entry for --search / --reindex: bring the index up to date with the
+    output dir (rebuilding it with reindex), then print matching segments
+    with their millisecond timestamps.
+    """
+    try:
+        files, segments = refresh_index(full=reindex)
+        if files or reindex:
+            print(f"索引已更新：{files} 个文件，{segments} 段", file=sys.stderr)
+        if not query:
+            return
+        hits = search(query, limit=limit)
+        if not hits:
+            print("没有找到匹配的片段。")
+            return
+        for hit in hits:
+            source = hit.audio_path or hit.transcript
+            print(
+                f"{source} [{format_ms(hit.start_ms)} - {format_ms(hit.end_ms)}]"
+                f" ({hit.start_ms}-{hit.end_ms} ms) {hit.text}"
+            )
+    except sqlite3.Error as exc:
+        print(f"发生错误：搜索索引不可用（{exc}）", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,78 @@
+from array import array
+from typing import Iterable, Iterator, Optional
+
+from whisper_local import Row, Segment
+
+
+class SegmentStore:
+    """
+    Column-oriented, append-only storage for a transcript's segments.
+
+    Times and confidences live in typed arrays and all text in one UTF-8
+    buffer indexed by byte offsets, so a segment costs ~40 bytes plus its
+    UTF-8 text instead of a tuple, a str and several boxed floats; a 10-hour
+    recording (~10k segments) takes about a megabyte. Segments are
+    materialized on access.
+    """
+
+    __slots__ = ("language", "_start", "_end", "_logprob", "_no_speech", "_offsets", "_text")
+
+    def __init__(self, language: str = "unknown") -> None:
+        self.language = language
+        self._start = array("d")
+        self._end = array("d")
+        self._logprob = array("f")
+        self._no_speech = array("f")
+        self._offsets = array("Q", [0])  # text of segment i is _text[o[i]:o[i+1]]
+        self._text = bytearray()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Row], language: str = "unknown") -> "SegmentStore":
+        store = cls(language)
+        for row in rows:
+            store.append(Segment(*row))
+        return store
+
+    def append(self, segment: Segment) -> None:
+        self._start.append(segment.start)
+        self._end.append(segment.end)
+        self._logprob.append(segment.avg_logprob)
+        self._no_speech.append(segment.no_speech_prob)
+        self._text += segment.text.encode("utf-8")
+        self._offsets.append(len(self._text))
+
+    def __len__(self) -> int:
+        return len(self._start)
+
+    def __getitem__(self, index: int) -> Segment:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        text = self._text[self._offsets[index] : self._offsets[index + 1]].decode("utf-8")
+        return Segment(
+            self._start[index],
+            self._end[index],
+            text,
+            self._logprob[index],
+            self._no_speech[index],
+        )
+
+    def __iter__(self) -> Iterator[Segment]:
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def duration(self) -> float:
+        return self._end[-1] if len(self) else 0.0
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns and the text buffer."""
+        columns = (self._start, self._end, self._logprob, self._no_speech, self._offsets)
+        return sum(c.itemsize * len(c) for c in columns) + len(self._text)
+
+    def text_at(self, index: int) -> Optional[str]:
+        """Text of one segment without building the whole Segment."""
+        if not 0 <= index < len(self):
+            return None
+        return self._text[self._offsets[index] : self._offsets[index + 1]].decode("utf-8")
@@ -0,0 +1,194 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import BASE_DIR, ensure_output_dir
+
+SRC_DIR = Path(__file__).resolve().parent
+DEFAULT_BUNDLE = BASE_DIR / "dist" / "EchoDraft.app" / "Contents" / "MacOS" / "EchoDraft"
+# Modules that must never be imported just by loading the given entry module
+FORBIDDEN_IMPORTS = {
+    "cli": ("PyQt6", "faster_whisper", "ctranslate2"),
+    "whisper_local": ("PyQt6", "faster_whisper", "ctranslate2"),
+    "app": ("faster_whisper", "ctranslate2"),
+}
+HEAVY_MODULES = ("PyQt6", "faster_whisper", "ctranslate2", "numpy", "av")
+# Smallest change in seconds that counts as a regression, so process
+# start-up noise on fast cases is ignored
+MIN_REGRESSION_SECONDS = 0.05
+_IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module: str, repeat: int) -> Dict[str, Any]:
+    """
+    Import time of one module in a fresh interpreter (median of repeat runs)
+    and which heavy modules it pulled in.
+    """
+    times, loaded = [], []
+    env = dict(os.environ, PYTHONPATH=str(SRC_DIR))
+    for _ in range(repeat):
+        code = _IMPORT_SNIPPET.format(module=module, heavy=HEAVY_MODULES)
+        proc = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            lines = proc.stderr.strip().splitlines()
+            raise RuntimeError(lines[-1] if lines else f"退出码 {proc.returncode}")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        times.append(result["seconds"])
+        loaded = result["loaded"]
+    return {"seconds": round(statistics.median(times), 4), "loaded": loaded}
+
+
+def measure_command(command: List[str], repeat: int) -> Dict[str, Any]:
+    """Wall time from spawning command until it exits (median of repeat runs)."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return {"seconds": round(statistics.median(times), 4)}
+
+
+def measure_window(command: List[str], repeat: int, timeout: float = 60.0) -> Dict[str, Any]:
+    """
+    Time from spawning the GUI until its main window is shown and the event
+    loop runs (reported by app.launch_gui under ECHODRAFT_STARTUP_PROBE).
+    """
+    times, inference_loaded = [], False
+    env = dict(os.environ, ECHODRAFT_STARTUP_PROBE="1")
+    for _ in range(repeat):
+        start = time.time()
+        proc = subprocess.run(
+            command, env=env, capture_output=True, text=True, timeout=timeout, check=False
+        )
+        report = [line for line in proc.stdout.splitlines() if line.startswith("window_shown ")]
+        if not report:
+            raise RuntimeError(f"窗口未能显示：{proc.stderr.strip()[-300:]}")
+        _, shown_at, loaded = report[-1].split()
+        times.append(float(shown_at) - start)
+        inference_loaded = loaded == "1"
+    return {"seconds": round(statistics.median(times), 4), "inference_loaded": inference_loaded}
+
+
+def run_startup_benchmark(repeat: int, bundle: Optional[Path], gui: bool) -> List[Dict[str, Any]]:
+    cases = []
+    for module in ("config", "cli", "whisper_local", "app", "faster_whisper"):
+        cases.append(("source", f"import:{module}", lambda m=module: measure_import(m, repeat)))
+    cli = [sys.executable, str(SRC_DIR / "cli.py"), "--help"]
+    cases.append(("source", "cli --help", lambda: measure_command(cli, repeat)))
+    if gui:
+        app = [sys.executable, str(SRC_DIR / "app.py")]
+        cases.append(("source", "time-to-window", lambda: measure_window(app, repeat)))
+    if bundle is not None:
+        cases.append(("bundle", "--help", lambda: measure_command([str(bundle), "--help"], repeat)))
+        if gui:
+            cases.append(("bundle", "time-to-window", lambda: measure_window([str(bundle)], repeat)))
+
+    results = []
+    for target, name, measure in cases:
+        print(f"[{target}] {name} ...", end="", flush=True)
+        try:
+            result, error = measure(), None
+        except Exception as exc:
+            result, error = {}, str(exc)
+        module = name.split(":", 1)[1] if name.startswith("import:") else None
+        forbidden = [m for m in result.get("loaded", []) if m in FORBIDDEN_IMPORTS.get(module, ())]
+        results.append(dict(target=target, case=name, **result, forbidden=forbidden, error=error))
+        if error:
+            print(f" 失败：{error}")
+        else:
+            extra = f"（引入了 {', '.join(forbidden)}）" if forbidden else ""
+            print(f" {result['seconds'] * 1000:.0f} ms{extra}")
+    return results
+
+
+def compare_with_baseline(
+    results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    """
+    Return descriptions of cases that got slower than the baseline by more
+    than threshold (a fraction) or now import forbidden modules.
+    """
+    previous = {(r["target"], r["case"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        if r.get("forbidden"):
+            regressions.append(f"{r['target']} / {r['case']}: 引入了 {', '.join(r['forbidden'])}")
+        base = previous.get((r["target"], r["case"]))
+        if base is None or r.get("error") or not base.get("seconds"):
+            continue
+        old, new = base["seconds"], r["seconds"]
+        if (new - old) / old > threshold and new - old >= MIN_REGRESSION_SECONDS:
+            regressions.append(f"{r['target']} / {r['case']}: {old:.3f}s -> {new:.3f}s")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="EchoDraft 启动耗时基准测试")
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复次数（取中位数）")
+    parser.add_argument(
+        "--bundle",
+        help=f"PyInstaller 打包后的可执行文件（默认 {DEFAULT_BUNDLE.relative_to(BASE_DIR)}，存在时测量）",
+    )
+    parser.add_argument("--no-gui", action="store_true", help="不测量窗口显示耗时（无图形环境时）")
+    parser.add_argument("--output", help="结果 JSON 路径")
+    parser.add_argument("--baseline", help="用于对比的基线结果 JSON")
+    parser.add_argument(
+        "--threshold", type=float, default=0.20, help="判定回退的相对阈值（默认 0.20）"
+    )
+    args = parser.parse_args()
+
+    bundle = Path(args.bundle).expanduser() if args.bundle else DEFAULT_BUNDLE
+    if not bundle.is_file():
+        if args.bundle:
+            print(f"发生错误：找不到打包程序：{bundle}", file=sys.stderr)
+            sys.exit(1)
+        bundle = None
+
+    results = run_startup_benchmark(max(1, args.repeat), bundle, gui=not args.no_gui)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "bundle": str(bundle) if bundle else None,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        out_path = Path(args.output).expanduser()
+    else:
+        out_dir = ensure_output_dir() / "benchmarks"
+        out_dir.mkdir(parents=True, exist_ok=True)
+        out_path = out_dir / f"startup-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n结果已保存：{out_path}")
+
+    baseline = {}
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).expanduser().read_text(encoding="utf-8"))
+    regressions = compare_with_baseline(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n发现 {len(regressions)} 项启动回退：")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    if args.baseline:
+        print("\n未发现超过阈值的启动回退。")
+
+
+if __name__ == "__main__":
+    main()
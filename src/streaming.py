@@ -0,0 +1,312 @@
+import os
+import queue
+import stat
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+from whisper_local import SAMPLING_RATE, Segment, format_segment, get_model
+
+# Minimum new audio between two decoding passes over the window
+DEFAULT_STEP_SECONDS = 1.0
+# Window length at which uncommitted words are force-committed, bounding
+# both latency and the audio re-decoded on every pass
+DEFAULT_MAX_WINDOW_SECONDS = 15.0
+# A committed line is closed at sentence punctuation or at this length
+MAX_LINE_SECONDS = 10.0
+_SENTENCE_END = ("。", "！", "？", ".", "!", "?", "…")
+_READ_SIZE = 3200 * 2  # 0.2 s of 16-bit mono samples
+_TAIL_POLL_SECONDS = 0.2
+
+# Decode options for each pass over the window. The window is re-decoded
+# from its start every time, so greedy decoding keeps a pass short; word
+# timestamps let agreed words be committed individually.
+STREAM_OPTIONS = dict(
+    beam_size=1,
+    task="transcribe",
+    vad_filter=True,
+    vad_parameters=dict(min_silence_duration_ms=500),
+    word_timestamps=True,
+    condition_on_previous_text=False,
+)
+
+
+class Word(NamedTuple):
+    start: float  # absolute seconds since the start of the stream
+    end: float
+    text: str
+
+
+def _normalize(text: str) -> str:
+    return text.strip().lower().strip(",.!?;:，。！？；：、")
+
+
+class StreamingTranscriber:
+    """
+    Incremental transcription of a live 16 kHz mono stream.
+
+    Audio is appended with feed(); each process() call re-decodes the
+    uncommitted window with the warm model and commits the longest prefix of
+    words on which this pass and the previous one agree (local agreement).
+    Committed words are grouped into Segments that never change afterwards.
+    The window is trimmed to the end of the last emitted segment, so only
+    uncommitted audio is decoded again; if it still grows past max_window,
+    the older half of the current hypothesis is committed without agreement.
+    """
+
+    def __init__(
+        self,
+        language: Optional[str] = None,
+        step: float = DEFAULT_STEP_SECONDS,
+        max_window: float = DEFAULT_MAX_WINDOW_SECONDS,
+    ) -> None:
+        self.model = get_model()
+        self.language = language
+        self.step = step
+        self.max_window = max_window
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.buffer_start = 0.0  # absolute time of buffer[0]
+        self.committed_until = 0.0
+        self._unprocessed = 0  # samples fed since the last pass
+        self._previous: List[Word] = []  # last pass's uncommitted words
+        self._line: List[Word] = []  # committed words not yet emitted
+        self._prompt = ""
+
+    @property
+    def received(self) -> float:
+        """Seconds of audio fed so far."""
+        return self.buffer_start + len(self.buffer) / SAMPLING_RATE
+
+    def feed(self, samples: np.ndarray) -> None:
+        self.buffer = np.concatenate([self.buffer, samples])
+        self._unprocessed += len(samples)
+
+    def ready(self) -> bool:
+        return self._unprocessed >= self.step * SAMPLING_RATE
+
+    def _decode(self) -> List[Word]:
+        options = dict(STREAM_OPTIONS, language=self.language)
+        segments, info = self.model.transcribe(
+            self.buffer, initial_prompt=self._prompt or None, **options
+        )
+        words = []
+        for segment in segments:
+            for word in segment.words or []:
+                start = self.buffer_start + word.start
+                end = self.buffer_start + word.end
+                # Skip words already committed from an earlier window
+                if end <= self.committed_until + 0.05:
+                    continue
+                words.append(Word(start, end, word.word))
+        if self.language is None and info.language:
+            self.language = info.language  # Keep the first detected language
+        return words
+
+    def _commit(self, words: List[Word]) -> Iterator[Segment]:
+        for word in words:
+            self._line.append(word)
+            self.committed_until = word.end
+            duration = word.end - self._line[0].start
+            if word.text.strip().endswith(_SENTENCE_END) or duration >= MAX_LINE_SECONDS:
+                yield self._emit_line()
+
+    def _emit_line(self) -> Segment:
+        text = "".join(w.text for w in self._line).strip()
+        segment = Segment(self._line[0].start, self._line[-1].end, text)
+        self._line = []
+        self._prompt = text
+        self._trim(segment.end)
+        return segment
+
+    def _trim(self, until: float) -> None:
+        cut = int((until - self.buffer_start) * SAMPLING_RATE)
+        if cut > 0:
+            self.buffer = self.buffer[cut:]
+            self.buffer_start += cut / SAMPLING_RATE
+
+    def process(self) -> Iterator[Segment]:
+        """Run one decoding pass and yield the segments it completes."""
+        self._unprocessed = 0
+        words = self._decode()
+
+        agreed = 0
+        for new, old in zip(words, self._previous):
+            if _normalize(new.text) != _normalize(old.text):
+                break
+            agreed += 1
+        committed, self._previous = words[:agreed], words[agreed:]
+        yield from self._commit(committed)
+
+        window = len(self.buffer) / SAMPLING_RATE
+        if window > self.max_window:
+            if self._previous:
+                half = self.buffer_start + window / 2
+                forced = [w for w in self._previous if w.end <= half] or self._previous[:1]
+                self._previous = self._previous[len(forced) :]
+                yield from self._commit(forced)
+            if self._line:
+                yield self._emit_line()
+            if not self._previous:
+                # Nothing left but silence or noise: keep one step of context
+                self._trim(self.received - self.step)
+
+    def finish(self) -> Iterator[Segment]:
+        """Commit whatever the final pass hypothesises once input has ended."""
+        if self._unprocessed:
+            self._unprocessed = 0
+            self._previous = self._decode()
+        yield from self._commit(self._previous)
+        self._previous = []
+        if self._line:
+            yield self._emit_line()
+
+
+def _pcm_to_float(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def _skip_wav_header(f: BinaryIO) -> None:
+    """
+    Position f at the start of the PCM data of a WAV file that may still be
+    written (its size fields are not trusted), checking the sample format.
+    """
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        raise ValueError("不是有效的 WAV 文件")
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            raise ValueError("WAV 文件缺少 data 块")
+        chunk_id, size = header[:4], struct.unpack("<I", header[4:])[0]
+        if chunk_id == b"data":
+            return
+        body = f.read(size + (size & 1))
+        if chunk_id == b"fmt ":
+            fmt, channels, rate = struct.unpack("<HHI", body[:8])
+            bits = struct.unpack("<H", body[14:16])[0]
+            if fmt != 1 or channels != 1 or rate != SAMPLING_RATE or bits != 16:
+                raise ValueError("流式转写只支持 16 kHz、单声道、16 位 PCM 的 WAV")
+
+
+def read_pcm(source: str, follow_idle: float = 5.0) -> Iterator[np.ndarray]:
+    """
+    Yield float32 sample blocks from a raw 16 kHz s16le mono stream.
+
+    source is "-" for stdin, a FIFO, or a WAV file that may still be growing.
+    Pipes and FIFOs end at EOF; a regular file is tailed until it has not
+    grown for follow_idle seconds.
+    """
+    if source == "-":
+        f, close, tail = sys.stdin.buffer, False, False
+    else:
+        path = Path(source).expanduser()
+        tail = stat.S_ISREG(os.stat(path).st_mode)
+        f, close = path.open("rb"), True
+    try:
+        if tail and source.lower().endswith(".wav"):
+            _skip_wav_header(f)
+        pending = b""
+        idle_since = time.monotonic()
+        while True:
+            data = f.read1(_READ_SIZE) if hasattr(f, "read1") else f.read(_READ_SIZE)
+            if not data:
+                if not tail or time.monotonic() - idle_since > follow_idle:
+                    break
+                time.sleep(_TAIL_POLL_SECONDS)
+                continue
+            idle_since = time.monotonic()
+            data = pending + data
+            usable = len(data) - len(data) % 2
+            pending = data[usable:]
+            if usable:
+                yield _pcm_to_float(data[:usable])
+    finally:
+        if close:
+            f.close()
+
+
+def _reader_thread(
+    source: str, out: "queue.Queue[Optional[np.ndarray]]", errors: List[Exception]
+) -> None:
+    try:
+        for block in read_pcm(source):
+            out.put(block)
+    except Exception as exc:
+        errors.append(exc)
+    finally:
+        out.put(None)
+
+
+def transcribe_stream(
+    source: str,
+    language: Optional[str] = None,
+    step: float = DEFAULT_STEP_SECONDS,
+    max_window: float = DEFAULT_MAX_WINDOW_SECONDS,
+) -> Iterator[Segment]:
+    """
+    Transcribe a live PCM source, yielding committed segments as they become
+    final. Input is read in a separate thread, so a pass that takes longer
+    than step simply picks up all audio that arrived meanwhile.
+    """
+    transcriber = StreamingTranscriber(language=language, step=step, max_window=max_window)
+    blocks: "queue.Queue[Optional[np.ndarray]]" = queue.Queue()
+    errors: List[Exception] = []
+    reader = threading.Thread(target=_reader_thread, args=(source, blocks, errors), daemon=True)
+    reader.start()
+
+    ended = False
+    try:
+        while not ended:
+            block = blocks.get()
+            while block is not None:
+                transcriber.feed(block)
+                try:
+                    block = blocks.get_nowait()
+                except queue.Empty:
+                    break
+            ended = block is None
+            if transcriber.ready():
+                yield from transcriber.process()
+    except KeyboardInterrupt:
+        # Ctrl+C is the usual way to stop a live source: commit the audio
+        # that has arrived, including the words local agreement still holds
+        # back, before passing the interrupt on
+        while True:
+            try:
+                block = blocks.get_nowait()
+            except queue.Empty:
+                break
+            if block is None:
+                break
+            transcriber.feed(block)
+        yield from transcriber.finish()
+        raise
+
+    if errors:
+        raise errors[0]
+    yield from transcriber.finish()
+
+
+def run_stream_cli(
+    source: str, language: Optional[str] = None, step: float = DEFAULT_STEP_SECONDS
+) -> None:
+    """
+    CLI entry for --stream: print each committed transcript line as soon as
+    consecutive decoding passes agree on it.
+    """
+    try:
+        print("正在加载模型...", file=sys.stderr, flush=True)
+        get_model()
+        print("开始实时转写（16 kHz 单声道 16 位 PCM），Ctrl+C 结束", file=sys.stderr, flush=True)
+        for segment in transcribe_stream(source, language=language, step=step):
+            print(format_segment(segment), flush=True)
+    except KeyboardInterrupt:
+        pass  # The stream has printed its last lines
+    except Exception as exc:
+        print(f"\n发生错误：{exc}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from config import get_cache_dir
+
+# Bump when the entry format changes so stale entries are never read back.
+CACHE_FORMAT_VERSION = 1
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_HASH_CHUNK_SIZE = 1024 * 1024
+# One small file per audio path, so concurrent workers hashing different
+# files never rewrite each other's entries
+_HASH_DIR_NAME = "hashes"
+
+# Raw segment rows: (start_seconds, end_seconds, text, avg_logprob,
+# no_speech_prob); rows stored before confidence was kept have 3 fields
+SegmentRow = Tuple[Any, ...]
+
+_digest_memo: Dict[str, Tuple[int, int, str]] = {}
+_memo_lock = threading.Lock()
+
+
+def _hash_file(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class TranscriptCache:
+    """
+    Content-addressed transcript cache stored under the output directory.
+
+    Each entry is a JSON-lines file: a header line with metadata followed by
+    one [start, end, text, avg_logprob, no_speech_prob] row per segment. Entry mtimes track last use, and
+    the least recently used entries are evicted once the total size exceeds
+    max_bytes.
+    """
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.root = Path(root) if root is not None else get_cache_dir() / "transcripts"
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, key: str) -> Path:
+        return self.root / f"{key}.jsonl"
+
+    def _hash_entry_path(self, resolved: str) -> Path:
+        name = hashlib.blake2b(resolved.encode("utf-8"), digest_size=16).hexdigest()
+        return self.root / _HASH_DIR_NAME / f"{name}.json"
+
+    def _load_hash_entry(self, resolved: str) -> Optional[List[Any]]:
+        """[path, size, mtime_ns, digest] memoized for resolved, if any."""
+        try:
+            entry = json.loads(self._hash_entry_path(resolved).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return entry if entry and entry[0] == resolved else None
+
+    def _save_hash_entry(self, resolved: str, entry: List[Any]) -> None:
+        path = self._hash_entry_path(resolved)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def file_digest(self, audio_path: Path) -> str:
+        """
+        Content hash of an audio file, memoized by (path, size, mtime) both in
+        memory and on disk so unchanged files are only hashed once.
+        """
+        resolved = str(Path(audio_path).resolve())
+        st = os.stat(resolved)
+        stamp = (st.st_size, st.st_mtime_ns)
+
+        with _memo_lock:
+            memo = _digest_memo.get(resolved)
+        if memo and memo[:2] == stamp:
+            return memo[2]
+
+        cached = self._load_hash_entry(resolved)
+        if cached and tuple(cached[1:3]) == stamp:
+            digest = cached[3]
+        else:
+            digest = _hash_file(Path(resolved))
+            try:
+                self._save_hash_entry(resolved, [resolved, stamp[0], stamp[1], digest])
+            except OSError:
+                pass
+
+        with _memo_lock:
+            _digest_memo[resolved] = (stamp[0], stamp[1], digest)
+        return digest
+
+    def make_key(self, audio_path: Path, params: Dict[str, Any]) -> str:
+        """
+        Build a cache key from the audio content and everything that affects
+        the decoded output (model directory, compute type, decode options).
+        """
+        payload = json.dumps(
+            {
+                "version": CACHE_FORMAT_VERSION,
+                "audio": self.file_digest(audio_path),
+                "params": params,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+    def contains(self, key: str) -> bool:
+        return self._entry_path(key).is_file()
+
+    def get(self, key: str) -> Optional[Tuple[str, Iterator[SegmentRow]]]:
+        """
+        Return (language, lazily read segment rows) for key, or None on a miss.
+        """
+        path = self._entry_path(key)
+        try:
+            f = path.open("r", encoding="utf-8")
+        except OSError:
+            return None
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            f.close()
+            return None
+        try:
+            os.utime(path)  # Mark as recently used for LRU eviction
+        except OSError:
+            pass
+        return header.get("language", "unknown"), _read_rows(f)
+
+    def writer(self, key: str, language: str) -> "CacheEntryWriter":
+        """
+        Start writing an entry incrementally; it becomes visible on commit().
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        return CacheEntryWriter(self, self._entry_path(key), language)
+
+    def put(self, key: str, language: str, rows: Iterable[SegmentRow]) -> None:
+        """
+        Store segment rows for key, then evict old entries if over budget.
+        """
+        writer = self.writer(key, language)
+        try:
+            for row in rows:
+                writer.add(row)
+        except BaseException:
+            writer.abort()
+            raise
+        writer.commit()
+
+    def evict(self) -> None:
+        """
+        Delete least recently used entries until the cache fits in max_bytes.
+        """
+        entries = []
+        total = 0
+        for path in self.root.glob("*.jsonl"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+
+
+def _read_rows(f: TextIO) -> Iterator[SegmentRow]:
+    with f:
+        for line in f:
+            if line.strip():
+                yield tuple(json.loads(line))
+
+
+class CacheEntryWriter:
+    """
+    Appends segment rows to a temporary file that is atomically renamed into
+    place on commit(), so readers never see a partial entry.
+    """
+
+    def __init__(self, cache: TranscriptCache, path: Path, language: str) -> None:
+        self.cache = cache
+        self.path = path
+        self.tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        self._file = self.tmp.open("w", encoding="utf-8")
+        self._file.write(
+            json.dumps({"version": CACHE_FORMAT_VERSION, "language": language}) + "\n"
+        )
+
+    def add(self, row: SegmentRow) -> None:
+        self._file.write(json.dumps(list(row), ensure_ascii=False) + "\n")
+
+    def commit(self) -> None:
+        self._file.close()
+        os.replace(self.tmp, self.path)
+        self.cache.evict()
+
+    def abort(self) -> None:
+        self._file.close()
+        try:
+            self.tmp.unlink()
+        except OSError:
+            pass
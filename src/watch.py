@@ -0,0 +1,268 @@
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from audio_utils import SUPPORTED_EXTENSIONS, is_supported_audio_file, probe_audio
+from config import get_cache_dir
+
+# Seconds a file's size and mtime must stay unchanged before it is considered
+# completely written
+DEFAULT_SETTLE_SECONDS = 3.0
+# Full rescan interval as a safety net for missed watchdog events
+DEFAULT_SCAN_INTERVAL = 30.0
+# Rescan interval without watchdog, where scanning is the only way to notice
+# new files
+POLL_SCAN_INTERVAL = 5.0
+_STATE_NAME = "watch_state.json"
+
+
+def get_state_path() -> Path:
+    return get_cache_dir() / _STATE_NAME
+
+
+class WatchState:
+    """
+    Persisted per-file outcome, keyed by resolved path and stamped with the
+    file's (size, mtime_ns) so a modified recording is transcribed again.
+    Entries still marked "running" after a restart were interrupted and are
+    redone.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            self.entries: Dict[str, Dict] = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            return self.entries.get(key)
+
+    def update(self, key: str, stamp: Tuple[int, int], status: str, **fields) -> None:
+        with self._lock:
+            self.entries[key] = dict(stamp=list(stamp), status=status, time=time.time(), **fields)
+            data = json.dumps(self.entries, ensure_ascii=False)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(data, encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class WatchService:
+    """
+    Watch directories for new audio files and transcribe each one once it
+    has finished being written.
+
+    File events come from watchdog when it is installed; otherwise (and as a
+    backstop) the directories are rescanned every scan_interval seconds
+    (None: POLL_SCAN_INTERVAL without watchdog, else DEFAULT_SCAN_INTERVAL). A
+    candidate is only queued after its size and mtime stayed unchanged for
+    settle seconds. Files with an up-to-date transcript, or recorded as
+    handled in the state file, are skipped. Up to `workers` files are
+    transcribed at once in threads sharing the warm model.
+    """
+
+    def __init__(
+        self,
+        dirs: List[Path],
+        workers: int = 1,
+        settle: float = DEFAULT_SETTLE_SECONDS,
+        scan_interval: Optional[float] = None,
+        use_cache: bool = True,
+    ) -> None:
+        self.dirs = [d.resolve() for d in dirs]
+        self.workers = max(1, workers)
+        self.settle = settle
+        self.scan_interval = scan_interval
+        self.use_cache = use_cache
+        self.state = WatchState(get_state_path())
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        # Candidates waiting to settle: path -> (stamp, unchanged since)
+        self._candidates: Dict[Path, Tuple[Tuple[int, int], float]] = {}
+        self._active: Set[Path] = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+
+    def notify(self, path: Path) -> None:
+        """Register a created or modified file; safe to call from any thread."""
+        path = Path(path)
+        if path.suffix.lower() not in SUPPORTED_EXTENSIONS:
+            return
+        stamp = _stamp(path)
+        if stamp is None:
+            return
+        with self._lock:
+            previous = self._candidates.get(path)
+            if previous is None or previous[0] != stamp:
+                self._candidates[path] = (stamp, time.monotonic())
+        self._wakeup.set()
+
+    def scan(self) -> None:
+        for directory in self.dirs:
+            for path in directory.rglob("*"):
+                if is_supported_audio_file(path):
+                    self.notify(path)
+
+    def _start_observer(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return None
+
+        service = self
+
+        class Handler(FileSystemEventHandler):
+            def on_created(self, event):
+                if not event.is_directory:
+                    service.notify(Path(event.src_path))
+
+            def on_modified(self, event):
+                if not event.is_directory:
+                    service.notify(Path(event.src_path))
+
+            def on_moved(self, event):
+                if not event.is_directory:
+                    service.notify(Path(event.dest_path))
+
+        observer = Observer()
+        for directory in self.dirs:
+            observer.schedule(Handler(), str(directory), recursive=True)
+        observer.start()
+        return observer
+
+    def _is_up_to_date(self, path: Path, stamp: Tuple[int, int]) -> bool:
+        from export import transcript_path
+
+        entry = self.state.get(str(path.resolve()))
+        if entry:
+            # Only a run of this very version counts: "running" means it was
+            # interrupted, an older stamp means the file has changed since
+            return tuple(entry["stamp"]) == stamp and entry["status"] in ("done", "failed")
+        # Not seen before (or the state file was lost): transcripts appear
+        # under their final name only once complete, so a newer one is done
+        out = transcript_path(path)
+        try:
+            return out.stat().st_mtime_ns >= stamp[1]
+        except OSError:
+            return False
+
+    def _settled(self) -> List[Tuple[Path, Tuple[int, int]]]:
+        """Pop candidates that have stopped changing; re-stamp the others."""
+        now = time.monotonic()
+        ready = []
+        with self._lock:
+            for path, (stamp, since) in list(self._candidates.items()):
+                current = _stamp(path)
+                if current is None:
+                    del self._candidates[path]
+                elif current != stamp:
+                    self._candidates[path] = (current, now)
+                elif now - since >= self.settle and path not in self._active:
+                    del self._candidates[path]
+                    ready.append((path, stamp))
+        return ready
+
+    def _transcribe(self, path: Path, stamp: Tuple[int, int]) -> None:
+        from export import TranscriptWriter
+        from whisper_local import format_segment, transcribe_segments
+
+        key = str(path.resolve())
+        start = time.perf_counter()
+        self.state.update(key, stamp, "running")
+        try:
+            probe_audio(path)
+            segments, _ = transcribe_segments(path, use_cache=self.use_cache)
+            with TranscriptWriter(path) as writer:
+                for segment in segments:
+                    writer.write_line(format_segment(segment))
+            self.state.update(key, stamp, "done", out_path=str(writer.path))
+            print(f"完成 {path} ({time.perf_counter() - start:.1f}s) -> {writer.path}", flush=True)
+        except Exception as exc:
+            self.state.update(key, stamp, "failed", error=str(exc))
+            print(f"失败 {path}：{exc}", file=sys.stderr, flush=True)
+        finally:
+            with self._lock:
+                self._active.discard(path)
+            self._wakeup.set()
+
+    def _next_deadline(self) -> float:
+        """Seconds until the earliest candidate could have settled."""
+        with self._lock:
+            if not self._candidates:
+                return self.scan_interval
+            oldest = min(since for _, since in self._candidates.values())
+        return max(0.2, min(self.scan_interval, oldest + self.settle - time.monotonic()))
+
+    def run(self) -> None:
+        observer = self._start_observer()
+        if self.scan_interval is None:
+            self.scan_interval = POLL_SCAN_INTERVAL if observer is None else DEFAULT_SCAN_INTERVAL
+        source = "watchdog" if observer is not None else f"每 {self.scan_interval:.0f}s 扫描"
+        dirs = "、".join(str(d) for d in self.dirs)
+        print(f"正在监视：{dirs}（{source}，并发 {self.workers}）", flush=True)
+
+        last_scan = 0.0
+        try:
+            while not self._stop.is_set():
+                if time.monotonic() - last_scan >= self.scan_interval:
+                    self.scan()
+                    last_scan = time.monotonic()
+                for path, stamp in self._settled():
+                    if self._is_up_to_date(path, stamp):
+                        continue
+                    with self._lock:
+                        self._active.add(path)
+                    self.executor.submit(self._transcribe, path, stamp)
+                self._wakeup.wait(self._next_deadline())
+                self._wakeup.clear()
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+
+
+def run_watch_cli(dirs: List[str], workers: int = 1, use_cache: bool = True) -> None:
+    """
+    CLI entry for --watch: load the model once, then transcribe new files in
+    the given directories until interrupted.
+    """
+    from whisper_local import configure_model, preload_model
+
+    paths = [Path(d).expanduser() for d in dirs]
+    for path in paths:
+        if not path.is_dir():
+            print(f"发生错误：目录不存在：{path}", file=sys.stderr)
+            sys.exit(1)
+
+    configure_model(num_workers=workers)
+    print("正在加载模型...", flush=True)
+    preload_model()
+
+    service = WatchService(paths, workers=workers, use_cache=use_cache)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: service.stop())
+    service.run()
+    print("\n监视已停止")
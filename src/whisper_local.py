@@ -1,30 +1,307 @@
+import itertools
+import statistics
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Callable
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
-from faster_whisper import WhisperModel
+from audio_utils import iter_audio_blocks, probe_audio
+from config import (
+    DEFAULT_BATCH_SIZE,
+    get_compute_type,
+    get_cpu_threads,
+    get_model_memory_budget,
+    get_model_policy,
+    get_num_workers,
+    get_whisper_model_dir,
+    get_window_seconds,
+)
+from journal import TranscriptJournal, open_journal
+from metrics import JobMetrics, ProgressInfo
+from model_tiers import (
+    ESCALATE_LOGPROB,
+    ESCALATE_PROBE_SECONDS,
+    LANGUAGE_PROBE_SECONDS,
+    SHORT_CLIP_SECONDS,
+    estimate_model_bytes,
+    find_model,
+    larger_model,
+    route_short_clip,
+    smaller_model,
+)
+from transcript_cache import CacheEntryWriter, SegmentRow, TranscriptCache
 
-from config import get_whisper_model_dir
+# faster_whisper (and with it ctranslate2, onnxruntime and tokenizers) is
+# imported on first use rather than here: it dominates import time, and
+# cache hits, the GUI's first paint and CLI argument errors never need it.
+if TYPE_CHECKING:
+    import numpy
+    from faster_whisper import WhisperModel
 
-_model: Optional[WhisperModel] = None
+SAMPLING_RATE = 16000
 
+# Decode parameters passed to model.transcribe; also part of the cache key.
+TRANSCRIBE_OPTIONS = dict(
+    beam_size=5,
+    language=None,  # Auto-detect primary language
+    task="transcribe",  # Transcribe in original language (not translate)
+    vad_filter=True,  # Use voice activity detection for better accuracy
+    vad_parameters=dict(min_silence_duration_ms=500),  # Adjust VAD sensitivity
+)
 
-def _load_model() -> WhisperModel:
+# Batched "fast" mode: speech windows from VAD are capped at Whisper's 30 s
+# input length so each window is one batch item. Windows are decoded
+# independently (no conditioning on previous text), trading a little accuracy
+# for throughput.
+FAST_TRANSCRIBE_OPTIONS = dict(
+    TRANSCRIBE_OPTIONS,
+    vad_parameters=dict(min_silence_duration_ms=500, max_speech_duration_s=30),
+)
+
+# Two-pass "refine" mode: a greedy draft pass, then only low-confidence
+# segments are re-decoded with the full TRANSCRIBE_OPTIONS beam settings.
+DRAFT_TRANSCRIBE_OPTIONS = dict(TRANSCRIBE_OPTIONS, beam_size=1, best_of=1)
+# A draft segment is re-decoded when any of these is exceeded
+REFINE_THRESHOLDS = dict(avg_logprob=-0.7, no_speech_prob=0.5, compression_ratio=2.2)
+# Consecutive weak segments are re-decoded together, up to this much audio
+MAX_REFINE_WINDOW = 30.0
+
+# Windowed (bounded-memory) mode: the file is decoded incrementally and the
+# model runs over windows of at most the configured length. Segments ending
+# in the last WINDOW_GUARD_SECONDS of a window may be cut at its edge, so the
+# next window starts again at the first of them.
+MIN_WINDOW_SECONDS = 60
+WINDOW_GUARD_SECONDS = 5.0
+
+# Raw segment rows, as stored in the transcript cache
+Row = SegmentRow
+
+
+class ModelKey(NamedTuple):
+    model_dir: str
+    compute_type: str
+    cpu_threads: int
+    num_workers: int
+
+
+class ModelRoute(NamedTuple):
+    """The models a job uses, see resolve_model_key."""
+
+    key: ModelKey
+    # Redo the result with this model when it is low confidence
+    escalate_key: Optional[ModelKey] = None
+    # Judge confidence on this much audio from the start (0 = all of it)
+    probe_seconds: float = 0.0
+    # Detect the language with this (smaller) model before decoding
+    language_key: Optional[ModelKey] = None
+
+
+# Process-wide overrides set via configure_model(); None falls back to config.
+_settings: Dict[str, Any] = {}
+# Loaded models, least recently used first, with their estimated sizes
+_models: "OrderedDict[ModelKey, WhisperModel]" = OrderedDict()
+_model_bytes: Dict[ModelKey, int] = {}
+_registry_lock = threading.Lock()
+_key_locks: Dict[ModelKey, threading.Lock] = {}
+
+
+def configure_model(
+    model_dir: Optional[Path] = None,
+    compute_type: Optional[str] = None,
+    cpu_threads: Optional[int] = None,
+    num_workers: Optional[int] = None,
+) -> None:
+    """
+    Set the default model settings used by get_model() in this process.
+    Arguments left as None keep their current value.
+    """
+    updates = dict(
+        model_dir=model_dir,
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+        num_workers=num_workers,
+    )
+    _settings.update({k: v for k, v in updates.items() if v is not None})
+
+
+def current_model_key(model_dir: Optional[Path] = None) -> ModelKey:
+    """
+    Resolve the registry key for the current default model settings, or for
+    model_dir with the current compute settings. Values from the tuning
+    profile only apply to the model it was measured for, the configured
+    WHISPER_MODEL_DIR; other models (tiers of "auto", --model) get the
+    defaults unless the settings were given explicitly.
+    """
+    model_dir = Path(model_dir or _settings.get("model_dir") or get_whisper_model_dir()).resolve()
+    try:
+        tuned = model_dir == get_whisper_model_dir().resolve()
+    except FileNotFoundError:
+        tuned = False
+    return ModelKey(
+        model_dir=str(model_dir),
+        compute_type=_settings.get("compute_type") or get_compute_type(tuned),
+        cpu_threads=_settings.get("cpu_threads", get_cpu_threads(tuned)),
+        num_workers=_settings.get("num_workers") or get_num_workers(),
+    )
+
+
+def _load_model(key: ModelKey) -> "WhisperModel":
     """
     Load local faster-whisper model (small quantized).
     """
-    model_dir = get_whisper_model_dir()
-    model = WhisperModel(str(model_dir), device="cpu", compute_type="int8")
+    from faster_whisper import WhisperModel
+
+    model = WhisperModel(
+        key.model_dir,
+        device="cpu",
+        compute_type=key.compute_type,
+        cpu_threads=key.cpu_threads,
+        num_workers=key.num_workers,
+    )
     return model
 
 
-def get_model() -> WhisperModel:
+def resolve_model_key(model: Optional[str] = None, duration: float = 0.0) -> ModelRoute:
     """
-    Lazily load and cache Whisper model instance.
+    Pick the models for a job from a policy (see config.get_model_policy;
+    None uses it). Only "auto" uses more than one model:
+
+    - a clip shorter than SHORT_CLIP_SECONDS goes to the smallest model
+      (which also detects its language) and is redone whole with the next
+      larger size up to medium, or the default model, if the result is low
+      confidence;
+    - a longer recording has its language detected by the smallest model
+      and is decoded by the default model; if the first
+      ESCALATE_PROBE_SECONDS come out low confidence it is redone with the
+      next larger size (when one is installed).
     """
-    global _model
-    if _model is None:
-        _model = _load_model()
-    return _model
+    policy = get_model_policy() if model is None else model
+    if policy == "auto":
+        default = current_model_key()
+        default_dir = Path(default.model_dir)
+        larger = larger_model(default_dir)
+        escalate = current_model_key(larger) if larger is not None else None
+        routed = route_short_clip(duration, default_dir)
+        if routed is not None:
+            return ModelRoute(current_model_key(routed), escalate or default)
+        smaller = smaller_model(default_dir)
+        return ModelRoute(
+            default,
+            escalate,
+            probe_seconds=0.0 if 0 < duration < SHORT_CLIP_SECONDS else ESCALATE_PROBE_SECONDS,
+            language_key=current_model_key(smaller) if smaller is not None else None,
+        )
+    if policy in ("", "default"):
+        return ModelRoute(current_model_key())
+    return ModelRoute(current_model_key(find_model(policy)))
+
+
+def _plan_route(
+    model: Optional[str], duration: float, window: float, parallel: int
+) -> Tuple[ModelRoute, float, int]:
+    """
+    resolve_model_key, adjusted to how the job decodes; returns (route,
+    window, parallel). Escalation judges rows of one whole-file pass: a short
+    clip is decoded whole for it, a longer recording that is decoded in
+    windows or chunks is not escalated.
+    """
+    route = resolve_model_key(model, duration)
+    if route.escalate_key is not None:
+        if route.probe_seconds <= 0:
+            window, parallel = 0, 0
+        elif window > 0 or parallel > 1:
+            route = route._replace(escalate_key=None)
+    if parallel > 1:
+        # Chunk workers agree on a language themselves
+        route = route._replace(language_key=None)
+    return route, window, parallel
+
+
+def _evict_models(needed: int) -> None:
+    """
+    Unload least recently used models until `needed` more bytes fit in the
+    memory budget. Call with _registry_lock held. A job still decoding with
+    an evicted model keeps its reference, so the memory is freed when the
+    job ends.
+    """
+    budget = get_model_memory_budget()
+    while _models and sum(_model_bytes.values()) + needed > budget:
+        key, _ = _models.popitem(last=False)
+        _model_bytes.pop(key, None)
+
+
+def get_model(key: Optional[ModelKey] = None) -> "WhisperModel":
+    """
+    Lazily load and cache Whisper model instances, one per ModelKey.
+    Defaults to the key from the current settings; concurrent callers asking
+    for the same key wait for a single load. Several models (e.g. tiny and
+    small) stay loaded while their estimated sizes fit in
+    config.get_model_memory_budget(); beyond that the least recently used
+    are unloaded.
+    """
+    if key is None:
+        key = current_model_key()
+    with _registry_lock:
+        model = _models.get(key)
+        if model is not None:
+            _models.move_to_end(key)
+            return model
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    with key_lock:
+        with _registry_lock:
+            model = _models.get(key)
+        if model is None:
+            size = estimate_model_bytes(Path(key.model_dir))
+            with _registry_lock:
+                _evict_models(size)
+            model = _load_model(key)
+            with _registry_lock:
+                _evict_models(size)
+                _models[key] = model
+                _model_bytes[key] = size
+    return model
+
+
+def loaded_models() -> List[ModelKey]:
+    """Keys of the models currently loaded, least recently used first."""
+    with _registry_lock:
+        return list(_models)
+
+
+def warm_up(model: "WhisperModel") -> None:
+    """
+    Run a tiny inference on one second of silence so the first real job does
+    not pay for lazy initialisation (allocations, kernel selection).
+    """
+    import numpy as np
+
+    silence = np.zeros(16000, dtype=np.float32)
+    segments, _ = model.transcribe(silence, beam_size=1, language="en", vad_filter=False)
+    for _ in segments:
+        pass
+
+
+def preload_model(key: Optional[ModelKey] = None) -> "WhisperModel":
+    """
+    Load (if needed) and warm up a model; meant to run in a background thread
+    at startup so the first transcription starts on a ready model.
+    """
+    model = get_model(key)
+    warm_up(model)
+    return model
 
 
 def format_timestamp(seconds: float) -> str:
@@ -38,53 +315,757 @@ def format_timestamp(seconds: float) -> str:
     return f"{h:02d}:{m:02d}:{s:02d}"
 
 
-def transcribe_audio(
+class Segment(NamedTuple):
+    start: float
+    end: float
+    text: str
+    avg_logprob: float = 0.0
+    no_speech_prob: float = 0.0
+
+
+def format_segment(segment: Segment) -> str:
+    """
+    Format one segment as a transcript line: [HH:MM:SS - HH:MM:SS] text
+    """
+    return f"[{format_timestamp(segment.start)} - {format_timestamp(segment.end)}] {segment.text}"
+
+
+def _cache_key(
+    cache: TranscriptCache,
     audio_path: Path,
-    progress_callback: Optional[Callable[[float, str], None]] = None,
+    parallel: int = 0,
+    batch_size: int = 0,
+    refine: bool = False,
+    window: float = 0,
+    model_key: Optional[ModelKey] = None,
+    route: Optional[ModelRoute] = None,
+) -> str:
+    model_key = model_key or current_model_key()
+    if batch_size > 0:
+        options = FAST_TRANSCRIBE_OPTIONS
+    elif refine:
+        options = DRAFT_TRANSCRIBE_OPTIONS
+    else:
+        options = TRANSCRIBE_OPTIONS
+    params = dict(model_dir=model_key.model_dir, compute_type=model_key.compute_type, **options)
+    if batch_size > 0:
+        params["batched"] = True
+    elif refine:
+        params["refine"] = REFINE_THRESHOLDS
+    elif parallel > 1:
+        # Chunked decoding can differ slightly at the cuts, so keep it apart
+        params["parallel_chunks"] = parallel
+    if window > 0:
+        params["window"] = max(window, MIN_WINDOW_SECONDS)
+    if route is not None and route.escalate_key is not None:
+        # An auto-routed result may come from either model
+        params["escalate"] = dict(
+            model_dir=route.escalate_key.model_dir,
+            avg_logprob=ESCALATE_LOGPROB,
+            probe_seconds=route.probe_seconds,
+        )
+    if route is not None and route.language_key is not None:
+        params["language_model"] = route.language_key.model_dir
+    return cache.make_key(audio_path, params)
+
+
+def _job_cache_key(
+    cache: TranscriptCache,
+    audio_path: Path,
+    batch_size: int,
+    refine: bool,
+    window: Optional[float],
+    model: Optional[str],
 ) -> str:
+    """Cache key of a plain (non-parallel) job as transcribe_segments runs it."""
+    window = get_window_seconds() if window is None else window
+    policy = get_model_policy() if model is None else model
+    duration = probe_audio(audio_path).duration if policy == "auto" else 0.0
+    route, window, _ = _plan_route(model, duration, window, 0)
+    return _cache_key(
+        cache,
+        audio_path,
+        batch_size=batch_size,
+        refine=refine,
+        window=window,
+        model_key=route.key,
+        route=route,
+    )
+
+
+def lookup_cached_rows(
+    audio_path: Path,
+    batch_size: int = 0,
+    refine: bool = False,
+    window: Optional[float] = None,
+    model: Optional[str] = None,
+) -> Optional[Tuple[str, Iterator[Row]]]:
     """
-    Transcribe audio into a timestamped transcript string.
-    Each line is formatted as: [HH:MM:SS - HH:MM:SS] text
+    Return (detected_language, rows) if this audio was already transcribed
+    with the current model and settings, else None.
+    """
+    cache = TranscriptCache()
+    return cache.get(_job_cache_key(cache, audio_path, batch_size, refine, window, model))
 
-    Args:
-        audio_path: Path to the audio file
-        progress_callback: Optional callback function(progress_percent, detected_language)
-                          Called with progress updates during transcription
+
+def lookup_cached_transcript(
+    audio_path: Path,
+    batch_size: int = 0,
+    refine: bool = False,
+    window: Optional[float] = None,
+    model: Optional[str] = None,
+) -> Optional[Tuple[str, str]]:
     """
-    model = get_model()
+    Return (transcript, detected_language) if this audio was already
+    transcribed with the current model and settings, else None.
+    """
+    hit = lookup_cached_rows(
+        audio_path, batch_size=batch_size, refine=refine, window=window, model=model
+    )
+    if hit is None:
+        return None
+    language, rows = hit
+    return "\n".join(format_segment(Segment(*row)) for row in rows), language
 
-    # Auto-detect language with multi-language support
-    # Using initial_prompt to hint the model to preserve original languages
-    segments, info = model.transcribe(
-        str(audio_path),
-        beam_size=5,
-        language=None,  # Auto-detect primary language
-        task="transcribe",  # Transcribe in original language (not translate)
-        vad_filter=True,  # Use voice activity detection for better accuracy
-        vad_parameters=dict(min_silence_duration_ms=500),  # Adjust VAD sensitivity
+
+def has_cached_transcript(
+    audio_path: Path,
+    batch_size: int = 0,
+    refine: bool = False,
+    window: Optional[float] = None,
+    model: Optional[str] = None,
+) -> bool:
+    """
+    Cheap check for a cache entry for this audio under the current settings,
+    without reading it.
+    """
+    cache = TranscriptCache()
+    return cache.contains(_job_cache_key(cache, audio_path, batch_size, refine, window, model))
+
+
+def decode_audio_file(audio_path: Path) -> "numpy.ndarray":
+    """
+    Decode an audio file to 16 kHz mono float32 samples.
+    """
+    from faster_whisper.audio import decode_audio
+
+    return decode_audio(str(audio_path), sampling_rate=SAMPLING_RATE)
+
+
+def _is_weak_segment(segment: Any) -> bool:
+    return (
+        segment.avg_logprob < REFINE_THRESHOLDS["avg_logprob"]
+        or segment.no_speech_prob > REFINE_THRESHOLDS["no_speech_prob"]
+        or segment.compression_ratio > REFINE_THRESHOLDS["compression_ratio"]
     )
 
+
+def _refine_segments(
+    model: "WhisperModel",
+    samples: "numpy.ndarray",
+    draft: Iterator[Any],
+    language: str,
+    metrics: JobMetrics,
+) -> Iterator[Any]:
+    """
+    Pass draft segments through, re-decoding runs of weak ones with the full
+    beam settings and yielding the re-decoded segments in their place.
+    """
+    refine_options = dict(
+        TRANSCRIBE_OPTIONS,
+        language=language,
+        vad_filter=False,  # The draft segments are already speech windows
+        condition_on_previous_text=False,
+    )
+    pending: List[Any] = []
+    previous_text = ""
+
+    def redecode() -> Iterator[Segment]:
+        start, end = pending[0].start, pending[-1].end
+        window = samples[int(start * SAMPLING_RATE) : int(end * SAMPLING_RATE)]
+        metrics.refined_segments += len(pending)
+        pending.clear()
+        if len(window) == 0:
+            return
+        segments, _ = model.transcribe(
+            window, initial_prompt=previous_text or None, **refine_options
+        )
+        for segment in segments:
+            yield Segment(
+                start + segment.start,
+                min(end, start + segment.end),
+                segment.text,
+                segment.avg_logprob,
+                segment.no_speech_prob,
+            )
+
+    for segment in draft:
+        if _is_weak_segment(segment):
+            if pending and segment.end - pending[0].start > MAX_REFINE_WINDOW:
+                yield from redecode()
+            pending.append(segment)
+            continue
+        if pending:
+            yield from redecode()
+        previous_text = segment.text
+        yield segment
+    if pending:
+        yield from redecode()
+
+
+def transcribe_rows(
+    audio: Union[str, "numpy.ndarray"],
+    progress_callback: Optional[Callable[[float, str], None]] = None,
+    offset: float = 0.0,
+    options: Optional[Dict[str, Any]] = None,
+    metrics: Optional[JobMetrics] = None,
+    batch_size: int = 0,
+    refine: bool = False,
+    model_key: Optional[ModelKey] = None,
+) -> Tuple[str, Iterator[Row]]:
+    """
+    Run the model over a file path or 16 kHz float32 samples.
+    Returns (detected_language, rows) where rows lazily yields
+    (start, end, text, avg_logprob, no_speech_prob) as the model decodes,
+    with times shifted by offset seconds.
+    options overrides individual TRANSCRIBE_OPTIONS entries; metrics, if
+    given, records model load and preparation time and the audio duration.
+    batch_size > 0 selects the batched "fast" pipeline with that batch size;
+    otherwise refine=True decodes greedily first and re-decodes only
+    low-confidence segments with beam search (counted in
+    metrics.refined_segments). model_key selects the model (default: the
+    current settings).
+    """
+    if metrics is None:
+        metrics = JobMetrics(Path(audio) if isinstance(audio, str) else Path("<samples>"))
+    model_key = model_key or current_model_key()
+    with metrics.stage("model_load"):
+        model = get_model(model_key)
+    metrics.model = Path(model_key.model_dir).name
+
+    # Auto-detect language with multi-language support
+    with metrics.stage("prepare"):
+        if batch_size > 0:
+            from faster_whisper import BatchedInferencePipeline
+
+            decode_options = dict(FAST_TRANSCRIBE_OPTIONS, **(options or {}))
+            pipeline = BatchedInferencePipeline(model=model)
+            segments, info = pipeline.transcribe(audio, batch_size=batch_size, **decode_options)
+        elif refine:
+            if isinstance(audio, str):
+                audio = decode_audio_file(Path(audio))
+            decode_options = dict(DRAFT_TRANSCRIBE_OPTIONS, **(options or {}))
+            segments, info = model.transcribe(audio, **decode_options)
+        else:
+            decode_options = dict(TRANSCRIBE_OPTIONS, **(options or {}))
+            segments, info = model.transcribe(audio, **decode_options)
+
     # Get audio duration and detected language
     duration = info.duration if hasattr(info, "duration") else 0
     detected_language = info.language if hasattr(info, "language") else "unknown"
+    metrics.audio_duration = duration
+    metrics.language = detected_language
+    if refine and batch_size <= 0:
+        segments = _refine_segments(model, audio, segments, detected_language, metrics)
 
-    lines = []
-    for segment in segments:
-        start = format_timestamp(segment.start)
-        end = format_timestamp(segment.end)
-        text = (segment.text or "").strip()
-        if not text:
-            continue
-        lines.append(f"[{start} - {end}] {text}")
+    def rows() -> Iterator[Row]:
+        for segment in segments:
+            text = (segment.text or "").strip()
+            if not text:
+                continue
+            yield (
+                segment.start + offset,
+                segment.end + offset,
+                text,
+                round(segment.avg_logprob, 4),
+                round(segment.no_speech_prob, 4),
+            )
+
+            # Report progress based on time processed
+            if progress_callback and duration > 0:
+                progress = min(100.0, (segment.end / duration) * 100)
+                progress_callback(progress, detected_language)
+
+    return detected_language, rows()
+
+
+def transcribe_windowed(
+    audio_path: Path,
+    window: float,
+    offset: float = 0.0,
+    options: Optional[Dict[str, Any]] = None,
+    metrics: Optional[JobMetrics] = None,
+    batch_size: int = 0,
+    refine: bool = False,
+    model_key: Optional[ModelKey] = None,
+) -> Tuple[str, Iterator[Row]]:
+    """
+    Bounded-memory transcription of audio_path from offset seconds: the file
+    is decoded incrementally and the model runs over consecutive windows of
+    at most `window` seconds, so only one window of samples (about 19 MB per
+    5 minutes) is held however long the recording is. Returns
+    (detected_language, rows) like transcribe_rows, with absolute timestamps.
+
+    Rows are passed on as they are decoded until one ends in the window's
+    last WINDOW_GUARD_SECONDS; that row may be cut at the edge, so decoding
+    of the window stops and the next window starts at its start. Windows
+    therefore overlap by the re-decoded tail, and every row comes from a
+    window that contained all of its audio. The language detected on the
+    first window is kept, and each window is prompted with the last text of
+    the previous one.
+    """
+    import numpy as np
 
-        # Report progress based on time processed
-        if progress_callback and duration > 0:
-            progress = min(100.0, (segment.end / duration) * 100)
-            progress_callback(progress, detected_language)
+    if metrics is None:
+        metrics = JobMetrics(audio_path)
+    total_duration = metrics.audio_duration
+    window_samples = int(max(window, MIN_WINDOW_SECONDS) * SAMPLING_RATE)
+    guard_samples = int(WINDOW_GUARD_SECONDS * SAMPLING_RATE)
+    blocks = iter_audio_blocks(audio_path, SAMPLING_RATE, skip=offset)
+    buffer = np.empty(window_samples, dtype=np.float32)
+    state = dict(filled=0, start=0, pending=np.zeros(0, dtype=np.float32), eof=False)
+
+    def fill() -> None:
+        """Top the buffer up from the decoder; look one block ahead for EOF."""
+        pending = state["pending"]
+        while True:
+            if not len(pending):
+                block = next(blocks, None)
+                if block is None:
+                    state["eof"] = True
+                    break
+                pending = block
+            if state["filled"] == window_samples:
+                break
+            n = min(len(pending), window_samples - state["filled"])
+            buffer[state["filled"] : state["filled"] + n] = pending[:n]
+            pending = pending[n:]
+            state["filled"] += n
+        state["pending"] = pending
+
+    def run(window_options: Optional[Dict[str, Any]]) -> Tuple[str, Iterator[Row]]:
+        start = offset + state["start"] / SAMPLING_RATE
+        with metrics.stage("decode"):
+            fill()
+        language, rows = transcribe_rows(
+            buffer[: state["filled"]],
+            offset=start,
+            options=window_options,
+            metrics=metrics,
+            batch_size=batch_size,
+            refine=refine,
+            model_key=model_key,
+        )
+        # transcribe_rows reports the window's duration; keep the file's
+        metrics.audio_duration = total_duration
+        return language, rows
+
+    with metrics.stage("decode"):
+        fill()
+    if not state["filled"]:
+        return (options or {}).get("language") or "unknown", iter(())
+    detected_language, first_rows = run(options)
+
+    def rows() -> Iterator[Row]:
+        window_rows = first_rows
+        while True:
+            last = state["eof"] and not len(state["pending"])
+            start = offset + state["start"] / SAMPLING_RATE
+            guard = start + (state["filled"] - guard_samples) / SAMPLING_RATE
+            resume_at = guard
+            prompt = ""
+            try:
+                for row in window_rows:
+                    if not last and row[1] > guard:
+                        resume_at = min(row[0], guard)
+                        break
+                    prompt = row[2]
+                    yield row
+            finally:
+                window_rows.close()
+            if last:
+                return
+
+            cut = int(round((resume_at - start) * SAMPLING_RATE))
+            if cut <= 0:
+                cut = state["filled"] - guard_samples  # No progress otherwise
+            buffer[: state["filled"] - cut] = buffer[cut : state["filled"]]
+            state["filled"] -= cut
+            state["start"] += cut
+            window_options = dict(options or {}, language=detected_language)
+            if prompt and batch_size <= 0:
+                window_options["initial_prompt"] = prompt
+            _, window_rows = run(window_options)
+
+    return detected_language, rows()
+
+
+def _escalating_rows(
+    rows: Iterator[Row],
+    redo: Callable[[], Iterator[Row]],
+    metrics: JobMetrics,
+    cancel: Optional[threading.Event] = None,
+    probe_until: Optional[float] = None,
+) -> Iterator[Row]:
+    """
+    Rows of an "auto" job that may be redone with a larger model: the rows
+    up to probe_until seconds (None: the whole recording) are held back, and
+    if their mean avg_logprob is below ESCALATE_LOGPROB the recording is
+    transcribed again by redo() and those rows are yielded instead;
+    otherwise the held rows and the rest follow. Setting cancel stops the
+    draft between segments without yielding anything.
+    """
+    draft = []
+    for row in rows:
+        if cancel is not None and cancel.is_set():
+            rows.close()
+            return
+        draft.append(row)
+        if probe_until is not None and row[1] >= probe_until:
+            break
+    scores = [row[3] for row in draft if len(row) > 3]
+    if not scores or statistics.fmean(scores) >= ESCALATE_LOGPROB:
+        yield from draft
+        yield from rows
+        return
+    rows.close()
+    metrics.escalated = True
+    yield from redo()
+
+
+def _read_head(
+    audio_path: Path, offset: float, seconds: float, metrics: JobMetrics
+) -> "numpy.ndarray":
+    """The first `seconds` of audio after offset, decoded incrementally."""
+    import numpy as np
+
+    blocks, size = [], 0
+    with metrics.stage("decode"):
+        for block in iter_audio_blocks(audio_path, SAMPLING_RATE, skip=offset):
+            blocks.append(block)
+            size += len(block)
+            if size >= seconds * SAMPLING_RATE:
+                break
+    return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+
+
+def _detect_language(
+    audio: "numpy.ndarray", key: ModelKey, metrics: JobMetrics
+) -> Optional[str]:
+    """
+    Language of the speech in the first LANGUAGE_PROBE_SECONDS of audio as
+    detected by the (small) model of key, or None if there is no speech.
+    """
+    import numpy as np
+    from faster_whisper.vad import VadOptions, collect_chunks, get_speech_timestamps
+
+    head = audio[: int(LANGUAGE_PROBE_SECONDS * SAMPLING_RATE)]
+    with metrics.stage("model_load"):
+        model = get_model(key)
+    with metrics.stage("prepare"):
+        vad_options = VadOptions(**(TRANSCRIBE_OPTIONS.get("vad_parameters") or {}))
+        speech = get_speech_timestamps(head, vad_options)
+        if not speech:
+            return None
+        chunks, _ = collect_chunks(head, speech)
+        language, _, _ = model.detect_language(np.concatenate(chunks))
+    return language
+
+
+def _stream_segments(
+    rows: Iterator[Row],
+    metrics: JobMetrics,
+    writer: Optional[CacheEntryWriter],
+    progress_callback: Optional[Callable[[float, str], None]],
+    stats_callback: Optional[Callable[[ProgressInfo], None]],
+    write_metrics: bool,
+    journal: Optional[TranscriptJournal] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Iterator[Segment]:
+    status = "incomplete"
+    metrics.start_inference()
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                row = next(rows)
+            except StopIteration:
+                break
+            metrics.record_segment(time.perf_counter() - start, row[1])
+            if writer is not None:
+                writer.add(row)
+            yield Segment(*row)
+
+            # Report progress based on time processed
+            if progress_callback or stats_callback:
+                info = metrics.progress()
+                if progress_callback and info.audio_duration > 0:
+                    progress_callback(info.progress, metrics.language)
+                if stats_callback:
+                    stats_callback(info)
+        if cancel is not None and cancel.is_set():
+            return  # Rows ended early: neither cached nor journal-completed
+        status = "ok"
+    except Exception:
+        status = "failed"
+        raise
+    finally:
+        if writer is not None:
+            if status == "ok":
+                try:
+                    writer.commit()
+                except OSError:
+                    pass  # A cache write failure must not fail the transcription
+            else:
+                writer.abort()
+        if journal is not None:
+            journal.close(completed=status == "ok")
+        if write_metrics:
+            try:
+                metrics.write(status)
+            except OSError:
+                pass
 
     # Final progress update
     if progress_callback:
-        progress_callback(100.0, detected_language)
+        progress_callback(100.0, metrics.language)
+    if stats_callback:
+        stats_callback(metrics.progress()._replace(progress=100.0, eta=0.0))
+
+
+def transcribe_segments(
+    audio_path: Path,
+    progress_callback: Optional[Callable[[float, str], None]] = None,
+    use_cache: bool = True,
+    parallel: int = 0,
+    stats_callback: Optional[Callable[[ProgressInfo], None]] = None,
+    write_metrics: bool = True,
+    batch_size: int = 0,
+    audio: Optional["numpy.ndarray"] = None,
+    resume: bool = True,
+    refine: bool = False,
+    window: Optional[float] = None,
+    model: Optional[str] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Tuple[Iterator[Segment], str]:
+    """
+    Streaming transcription: returns (segments, detected_language) where
+    segments is a generator yielding each Segment as soon as it is decoded.
+
+    Arguments are the same as transcribe_audio. A cache entry is only
+    committed once the generator has been consumed to the end; the job's
+    metrics record is appended to <stem>_metrics.jsonl when it stops.
+    cancel, when set, ends the generator early even where no segment is
+    yielded for a long time (the "auto" draft being judged); the caller
+    still stops at its own segment boundaries otherwise.
+    """
+    metrics = JobMetrics(audio_path)
+    # Known duration from the header gives progress and ETA from the start
+    # (and for cache hits); corrupt files fail here, before the model loads
+    metrics.audio_duration = probe_audio(audio_path).duration
+    window = get_window_seconds() if window is None else window
+    if audio is not None:
+        window = 0  # Already decoded: nothing to bound
+    route, window, parallel = _plan_route(model, metrics.audio_duration, window, parallel)
+    model_key, escalate_key = route.key, route.escalate_key
+    cache = TranscriptCache() if use_cache else None
+    key = None
+    if cache is not None:
+        key = _cache_key(cache, audio_path, parallel, batch_size, refine, window, model_key, route)
+        hit = cache.get(key)
+        if hit is not None:
+            language, rows = hit
+            metrics.cache_hit = True
+            metrics.language = language
+            segments = _stream_segments(
+                rows, metrics, None, progress_callback, stats_callback, write_metrics
+            )
+            return segments, language
+
+    journal = None
+    if parallel > 1 and batch_size <= 0 and not refine and window <= 0:
+        from parallel_transcribe import transcribe_rows_parallel
+
+        detected_language, rows = transcribe_rows_parallel(
+            audio_path, parallel, metrics=metrics, model_key=model_key
+        )
+    else:
+        if key is None:
+            key = _cache_key(
+                TranscriptCache(),
+                audio_path,
+                parallel,
+                batch_size,
+                refine,
+                window,
+                model_key,
+                route,
+            )
+        journal = open_journal(audio_path, key, resume=resume)
+
+        # Continue an interrupted run from its last committed segment, in the
+        # language detected for the whole recording
+        offset, options = 0.0, None
+        if journal is not None and journal.rows:
+            offset = journal.resume_at
+            options = dict(language=journal.language) if journal.language else None
+        # "auto": a small model detects the language of a long recording
+        detect_language = (
+            route.language_key is not None
+            and not (options or {}).get("language")
+            and not TRANSCRIBE_OPTIONS.get("language")
+        )
 
-    return "\n".join(lines)
+        if window > 0:
+            if detect_language:
+                head = _read_head(audio_path, offset, LANGUAGE_PROBE_SECONDS, metrics)
+                language = _detect_language(head, route.language_key, metrics)
+                if language:
+                    options = dict(options or {}, language=language)
+            detected_language, rows = transcribe_windowed(
+                audio_path,
+                window,
+                offset=offset,
+                options=options,
+                metrics=metrics,
+                batch_size=batch_size,
+                refine=refine,
+                model_key=model_key,
+            )
+            metrics.language = detected_language
+        else:
+            if audio is None:
+                with metrics.stage("decode"):
+                    audio = decode_audio_file(audio_path)
+            clip = int(offset * SAMPLING_RATE)
+            total_duration = len(audio) / SAMPLING_RATE
+            if clip < len(audio):
+                samples = audio[clip:]
+                if detect_language:
+                    language = _detect_language(samples, route.language_key, metrics)
+                    if language:
+                        options = dict(options or {}, language=language)
+                detected_language, rows = transcribe_rows(
+                    samples,
+                    offset=offset,
+                    options=options,
+                    metrics=metrics,
+                    batch_size=batch_size,
+                    refine=refine,
+                    model_key=model_key,
+                )
+                if escalate_key is not None:
+                    # The redo keeps the language the first pass detected,
+                    # which the cache entry and exports are labelled with
+                    redo_options = dict(options or {}, language=detected_language)
 
+                    def redo() -> Iterator[Row]:
+                        _, redo_rows = transcribe_rows(
+                            samples,
+                            offset=offset,
+                            options=redo_options,
+                            metrics=metrics,
+                            batch_size=batch_size,
+                            refine=refine,
+                            model_key=escalate_key,
+                        )
+                        metrics.audio_duration = total_duration
+                        return redo_rows
+
+                    probe_until = offset + route.probe_seconds if route.probe_seconds > 0 else None
+                    rows = _escalating_rows(rows, redo, metrics, cancel, probe_until)
+            else:
+                detected_language, rows = journal.language or "unknown", iter(())
+                metrics.language = detected_language
+            metrics.audio_duration = total_duration
+
+        if journal is not None:
+            replayed = journal.rows
+            try:
+                journal.start(detected_language)
+                rows = journal.record(rows)
+            except OSError:
+                journal = None
+            rows = itertools.chain(replayed, rows)
+
+    writer = None
+    if cache is not None:
+        try:
+            writer = cache.writer(key, detected_language)
+        except OSError:
+            writer = None
+    segments = _stream_segments(
+        iter(rows),
+        metrics,
+        writer,
+        progress_callback,
+        stats_callback,
+        write_metrics,
+        journal,
+        cancel,
+    )
+    return segments, detected_language
+
+
+def transcribe_audio(
+    audio_path: Path,
+    progress_callback: Optional[Callable[[float, str], None]] = None,
+    use_cache: bool = True,
+    parallel: int = 0,
+    stats_callback: Optional[Callable[[ProgressInfo], None]] = None,
+    batch_size: int = 0,
+    audio: Optional["numpy.ndarray"] = None,
+    resume: bool = True,
+    refine: bool = False,
+    window: Optional[float] = None,
+    model: Optional[str] = None,
+) -> str:
+    """
+    Transcribe audio into a timestamped transcript string.
+    Each line is formatted as: [HH:MM:SS - HH:MM:SS] text
+
+    Args:
+        audio_path: Path to the audio file
+        progress_callback: Optional callback function(progress_percent, detected_language)
+                          Called with progress updates during transcription
+        use_cache: Reuse (and store) results in the transcript cache, keyed by
+                   audio content, model and decode parameters
+        parallel: If > 1, split the recording at silences into up to this many
+                  chunks and transcribe them concurrently in worker processes
+        stats_callback: Optional callback receiving a metrics.ProgressInfo
+                        (progress, speed, ETA, ...) after every segment
+        batch_size: If > 0, use batched "fast" inference over VAD speech
+                    windows with this batch size (parallel is then ignored)
+        audio: Samples already decoded with decode_audio_file (e.g. by a
+               prefetcher); skips decoding audio_path again
+        resume: Continue from the segment journal left by an interrupted run
+                of the same audio and settings; False starts over
+        refine: Two-pass mode: decode greedily, then re-decode only
+                low-confidence segments with the full beam settings
+                (parallel is then ignored)
+        window: If > 0, decode the file incrementally and transcribe it in
+                overlapping windows of this many seconds (at least
+                MIN_WINDOW_SECONDS), keeping memory flat for any length;
+                None uses config.get_window_seconds() (0 = off). Ignored
+                when audio is given; parallel is then ignored
+        model: "default" (the configured model), "auto" (short clips go to
+               the smallest model under models/whisper/, longer recordings
+               to the default model with the smallest one detecting their
+               language; low-confidence results are redone with a larger
+               model, see resolve_model_key) or a model name such as tiny or
+               medium-int8; None uses config.get_model_policy()
+    """
+    segments, _ = transcribe_segments(
+        audio_path,
+        progress_callback=progress_callback,
+        use_cache=use_cache,
+        parallel=parallel,
+        stats_callback=stats_callback,
+        batch_size=batch_size,
+        audio=audio,
+        resume=resume,
+        refine=refine,
+        window=window,
+        model=model,
+    )
+    return "\n".join(format_segment(segment) for segment in segments)
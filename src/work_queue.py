@@ -0,0 +1,473 @@
+import hashlib
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from audio_utils import probe_audio
+from config import ensure_output_dir, use_output_dir
+
+# A lease whose file has not been touched for this long (as seen by the
+# observing worker's own clock, so clocks need not agree across machines)
+# belongs to a dead worker and is reclaimed
+LEASE_SECONDS = 120.0
+HEARTBEAT_SECONDS = 15.0
+# A reclaiming worker moves a lease aside for a moment while it checks it, so
+# an owner that finds its lease missing looks again before giving it up
+RENEW_RETRIES = 5
+RENEW_RETRY_SECONDS = 0.2
+POLL_SECONDS = 5.0
+# Jobs whose worker died this many times are marked failed instead of retried
+MAX_ATTEMPTS = 3
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    """Atomic write: readers on other machines see the old or the new file."""
+    tmp = path.with_name(f".{path.name}.{worker_name()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _create_exclusive(path: Path, data: Dict[str, Any]) -> Optional[int]:
+    """
+    Create path with data unless it exists; returns the new file's inode, or
+    None if another worker got there first. Uses link(2), which is atomic
+    on NFS too (O_EXCL is not on older versions); a link whose reply was
+    lost is recognised by the temp file's link count.
+    """
+    tmp = path.with_name(f".{path.name}.{worker_name()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    try:
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            return None
+        except OSError:
+            if os.stat(tmp).st_nlink != 2:
+                return None
+        return os.stat(tmp).st_ino
+    finally:
+        tmp.unlink()
+
+
+class Lease:
+    """
+    A claimed job. The lease file is touched every HEARTBEAT_SECONDS while
+    the job runs; if another worker reclaimed it in the meantime (this
+    worker stalled past LEASE_SECONDS), renew() returns False and the job
+    should be abandoned.
+    """
+
+    def __init__(self, queue: "WorkQueue", job_id: str, job: Dict[str, Any], ino: int) -> None:
+        self.queue = queue
+        self.job_id = job_id
+        self.job = job
+        self.path = queue.leases_dir / f"{job_id}.lease"
+        self._ino = ino
+
+    def _owned(self) -> bool:
+        try:
+            return os.stat(self.path).st_ino == self._ino
+        except OSError:
+            return False
+
+    def renew(self) -> bool:
+        for attempt in range(RENEW_RETRIES):
+            if attempt:
+                time.sleep(RENEW_RETRY_SECONDS)
+            try:
+                if os.stat(self.path).st_ino != self._ino:
+                    return False
+                os.utime(self.path)
+                return True
+            except FileNotFoundError:
+                continue  # Possibly moved aside by reclaim_expired
+            except OSError:
+                return False
+        return False
+
+    def release(self) -> None:
+        if self._owned():
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+
+class WorkQueue:
+    """
+    Job queue kept entirely in a shared directory, so any number of workers
+    on machines that mount it can split a backlog without a central service:
+
+        jobs/<id>.json     pending job (audio path and options)
+        leases/<id>.lease  held by the worker transcribing the job
+        done/<id>.json     result record (transcript path, worker, timings)
+        failed/<id>.json   error record
+
+    A worker claims a job by creating its lease file atomically and touches
+    it while working. Workers watch each other's leases and reclaim those
+    that stop changing for LEASE_SECONDS, so the job of a crashed worker is
+    picked up again (resuming from its transcript journal when the output
+    dir is shared).
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self.jobs_dir = self.root / "jobs"
+        self.leases_dir = self.root / "leases"
+        self.done_dir = self.root / "done"
+        self.failed_dir = self.root / "failed"
+        for directory in (self.jobs_dir, self.leases_dir, self.done_dir, self.failed_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+        # Lease file -> ((mtime_ns, inode), first seen with that stamp)
+        self._seen: Dict[str, Tuple[Tuple[int, int], float]] = {}
+
+    @staticmethod
+    def job_id(audio_path: Path) -> str:
+        return hashlib.sha1(str(Path(audio_path).resolve()).encode("utf-8")).hexdigest()[:16]
+
+    def submit(
+        self,
+        files: List[Path],
+        durations: Optional[Dict[str, float]] = None,
+        use_cache: bool = True,
+        batch_size: int = 0,
+        model: Optional[str] = None,
+    ) -> Tuple[int, int]:
+        """
+        Queue files (longest first when durations are given, so the tail of
+        the backlog is short jobs). Files already queued, or done and
+        unchanged since, are skipped. Returns (queued, skipped).
+        """
+        durations = durations or {}
+        order = sorted(files, key=lambda p: durations.get(str(p), 0.0), reverse=True)
+        queued = skipped = 0
+        now = time.time()
+        for rank, path in enumerate(order):
+            path = Path(path).resolve()
+            job_id = self.job_id(path)
+            st = path.stat()
+            stamp = [st.st_size, st.st_mtime_ns]
+            done = _read_json(self.done_dir / f"{job_id}.json") or {}
+            if (self.jobs_dir / f"{job_id}.json").exists() or done.get("stamp") == stamp:
+                skipped += 1
+                continue
+            job = dict(
+                path=str(path),
+                stamp=stamp,
+                duration=durations.get(str(path)),
+                use_cache=use_cache,
+                batch_size=batch_size,
+                model=model,
+                submitted=now,
+                order=rank,
+                attempts=0,
+            )
+            (self.failed_dir / f"{job_id}.json").unlink(missing_ok=True)
+            _write_json(self.jobs_dir / f"{job_id}.json", job)
+            queued += 1
+        return queued, skipped
+
+    def pending(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Queued jobs without a lease, in submission order."""
+        leased = {p.name[: -len(".lease")] for p in self.leases_dir.glob("*.lease")}
+        jobs = []
+        for path in self.jobs_dir.glob("*.json"):
+            if path.stem in leased:
+                continue
+            job = _read_json(path)
+            if job is not None:
+                jobs.append((path.stem, job))
+        jobs.sort(key=lambda item: (item[1].get("submitted", 0), item[1].get("order", 0)))
+        return jobs
+
+    def claim(self, worker: str) -> Optional[Lease]:
+        for job_id, job in self.pending():
+            lease_path = self.leases_dir / f"{job_id}.lease"
+            ino = _create_exclusive(lease_path, dict(worker=worker, claimed=time.time()))
+            if ino is None:
+                continue
+            # The job may have finished between listing and claiming
+            job = _read_json(self.jobs_dir / f"{job_id}.json")
+            lease = Lease(self, job_id, job or {}, ino)
+            if job is None:
+                lease.release()
+                continue
+            return lease
+        return None
+
+    def complete(self, lease: Lease, result: Dict[str, Any]) -> None:
+        record = dict(result, path=lease.job.get("path"), stamp=lease.job.get("stamp"))
+        _write_json(self.done_dir / f"{lease.job_id}.json", record)
+        (self.jobs_dir / f"{lease.job_id}.json").unlink(missing_ok=True)
+        lease.release()
+
+    def fail(
+        self, job_id: str, job: Dict[str, Any], error: str, lease: Optional[Lease] = None
+    ) -> None:
+        record = dict(path=job.get("path"), stamp=job.get("stamp"), error=error, time=time.time())
+        _write_json(self.failed_dir / f"{job_id}.json", record)
+        (self.jobs_dir / f"{job_id}.json").unlink(missing_ok=True)
+        if lease is not None:
+            lease.release()
+
+    def reclaim_expired(self) -> int:
+        """
+        Release leases that have not been touched for LEASE_SECONDS, so their
+        jobs can be claimed again; returns how many were reclaimed. Expiry is
+        measured from when this worker first saw the lease unchanged, so a
+        worker that just started waits a full LEASE_SECONDS.
+        """
+        now = time.monotonic()
+        reclaimed = 0
+        current = set()
+        for lease_path in self.leases_dir.glob("*.lease"):
+            try:
+                st = os.stat(lease_path)
+            except OSError:
+                continue
+            stamp = (st.st_mtime_ns, st.st_ino)
+            current.add(lease_path.name)
+            seen = self._seen.get(lease_path.name)
+            if seen is None or seen[0] != stamp:
+                self._seen[lease_path.name] = (stamp, now)
+                continue
+            if now - seen[1] < LEASE_SECONDS:
+                continue
+
+            # Rename first: only one of several reclaiming workers succeeds
+            stale = lease_path.with_name(f".{lease_path.name}.{worker_name()}.stale")
+            try:
+                os.rename(lease_path, stale)
+            except OSError:
+                continue
+            try:
+                st = os.stat(stale)
+                if (st.st_mtime_ns, st.st_ino) != stamp:
+                    # Renewed just now: the owner is alive, put it back
+                    try:
+                        os.link(stale, lease_path)
+                    except OSError:
+                        pass
+                    continue
+            finally:
+                stale.unlink(missing_ok=True)
+            del self._seen[lease_path.name]
+            job_id = lease_path.name[: -len(".lease")]
+            self._retry(job_id)
+            reclaimed += 1
+        for name in set(self._seen) - current:
+            del self._seen[name]
+        return reclaimed
+
+    def _retry(self, job_id: str) -> None:
+        job_path = self.jobs_dir / f"{job_id}.json"
+        job = _read_json(job_path)
+        if job is None:
+            return
+        job["attempts"] = job.get("attempts", 0) + 1
+        if job["attempts"] >= MAX_ATTEMPTS:
+            self.fail(job_id, job, f"工作进程 {job['attempts']} 次在处理中退出")
+        else:
+            _write_json(job_path, job)
+
+    def counts(self) -> Dict[str, int]:
+        leased = len(list(self.leases_dir.glob("*.lease")))
+        return dict(
+            pending=len(list(self.jobs_dir.glob("*.json"))) - leased,
+            running=leased,
+            done=len(list(self.done_dir.glob("*.json"))),
+            failed=len(list(self.failed_dir.glob("*.json"))),
+        )
+
+
+class QueueWorker:
+    """
+    Claims jobs from a WorkQueue and transcribes them with this process's
+    warm model, `concurrency` at a time, saving each transcript with
+    save_transcript into the output dir.
+    """
+
+    def __init__(
+        self, queue: WorkQueue, concurrency: int = 1, exit_when_empty: bool = False
+    ) -> None:
+        self.queue = queue
+        self.concurrency = max(1, concurrency)
+        self.exit_when_empty = exit_when_empty
+        self.name = worker_name()
+        self.processed = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _heartbeat(self, lease: Lease, lost: threading.Event, done: threading.Event) -> None:
+        while not done.wait(HEARTBEAT_SECONDS):
+            if not lease.renew():
+                lost.set()
+                return
+
+    def _run_job(self, lease: Lease) -> None:
+        from export import save_transcript
+        from whisper_local import format_segment, transcribe_segments
+
+        job = lease.job
+        audio_path = Path(job["path"])
+        start = time.perf_counter()
+        lost, done = threading.Event(), threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(lease, lost, done), daemon=True)
+        heartbeat.start()
+        try:
+            probe_audio(audio_path)
+            segments, language = transcribe_segments(
+                audio_path,
+                use_cache=job.get("use_cache", True),
+                batch_size=job.get("batch_size", 0),
+                model=job.get("model"),
+            )
+            lines = []
+            for segment in segments:
+                if lost.is_set() or self._stop.is_set():
+                    segments.close()
+                    break
+                lines.append(format_segment(segment))
+            else:
+                out_path = save_transcript(audio_path, "\n".join(lines))
+                elapsed = time.perf_counter() - start
+                self.queue.complete(
+                    lease,
+                    dict(
+                        out_path=str(out_path),
+                        worker=self.name,
+                        language=language,
+                        elapsed=round(elapsed, 3),
+                        finished=time.time(),
+                    ),
+                )
+                with self._lock:
+                    self.processed += 1
+                print(f"完成 {audio_path} ({elapsed:.1f}s) -> {out_path}", flush=True)
+                return
+            if lost.is_set():
+                print(f"租约已被回收，放弃 {audio_path}", file=sys.stderr, flush=True)
+            else:
+                lease.release()  # Stopping: leave the job for another worker
+        except Exception as exc:
+            self.queue.fail(lease.job_id, job, str(exc), lease)
+            print(f"失败 {audio_path}：{exc}", file=sys.stderr, flush=True)
+        finally:
+            done.set()
+            heartbeat.join()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            lease = self.queue.claim(self.name)
+            if lease is not None:
+                self._run_job(lease)
+                continue
+            if self.exit_when_empty and not any(self.queue.leases_dir.glob("*.lease")):
+                if not self.queue.pending():
+                    return
+            with self._lock:
+                self.queue.reclaim_expired()
+            self._stop.wait(POLL_SECONDS)
+
+    def run(self) -> None:
+        threads = [threading.Thread(target=self._loop) for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def run_submit_cli(
+    queue_dir: str,
+    inputs: List[str],
+    manifest: Optional[str] = None,
+    use_cache: bool = True,
+    batch_size: int = 0,
+    model: Optional[str] = None,
+) -> None:
+    """CLI entry for --queue DIR with inputs: add the files to the queue."""
+    from batch import collect_audio_files, plan_jobs
+
+    try:
+        queue = WorkQueue(Path(queue_dir).expanduser())
+        files, durations, rejected = plan_jobs(collect_audio_files(inputs, manifest))
+        for r in rejected:
+            print(f"跳过 {r.audio_path}：{r.error}", file=sys.stderr)
+        queued, skipped = queue.submit(
+            files, durations, use_cache=use_cache, batch_size=batch_size, model=model
+        )
+    except Exception as exc:
+        print(f"发生错误：{exc}", file=sys.stderr)
+        sys.exit(1)
+    print(f"已加入队列 {queued} 个文件，跳过 {skipped} 个（已在队列中或已完成）：{queue.root}")
+
+
+def print_queue_status(queue_dir: str) -> None:
+    queue = WorkQueue(Path(queue_dir).expanduser())
+    counts = queue.counts()
+    print(
+        f"等待 {counts['pending']}，进行中 {counts['running']}，"
+        f"完成 {counts['done']}，失败 {counts['failed']}"
+    )
+    for path in sorted(queue.leases_dir.glob("*.lease")):
+        lease = _read_json(path) or {}
+        job = _read_json(queue.jobs_dir / f"{path.stem}.json") or {}
+        print(f"  进行中 {job.get('path', path.stem)}（{lease.get('worker', '?')}）")
+    for path in sorted(queue.failed_dir.glob("*.json")):
+        record = _read_json(path) or {}
+        print(f"  失败 {record.get('path', path.stem)}：{record.get('error')}")
+
+
+def run_worker_cli(
+    queue_dir: str,
+    concurrency: int = 1,
+    exit_when_empty: bool = False,
+) -> None:
+    """
+    CLI entry for --queue DIR --work: load the model once, then transcribe
+    jobs from the shared queue until interrupted (or until it is empty).
+    Transcripts go to <queue>/output unless ECHODRAFT_OUTPUT_DIR is set.
+    """
+    from whisper_local import configure_model, preload_model, resolve_model_key
+
+    queue = WorkQueue(Path(queue_dir).expanduser())
+    if not os.environ.get("ECHODRAFT_OUTPUT_DIR"):
+        use_output_dir(queue.root / "output")
+    configure_model(num_workers=concurrency)
+    print("正在加载模型...", flush=True)
+    try:
+        preload_model(resolve_model_key().key)
+    except Exception as exc:
+        print(f"发生错误：模型加载失败：{exc}", file=sys.stderr)
+        sys.exit(1)
+
+    worker = QueueWorker(queue, concurrency=concurrency, exit_when_empty=exit_when_empty)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: worker.stop())
+    print(
+        f"工作进程 {worker.name} 正在处理队列：{queue.root}（并发 {worker.concurrency}，"
+        f"输出 {ensure_output_dir()}）",
+        flush=True,
+    )
+    worker.run()
+    print(f"\n工作进程已停止，共完成 {worker.processed} 个文件")